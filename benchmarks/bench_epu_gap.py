@@ -0,0 +1,53 @@
+"""
+Micro-benchmark of the linear-mode EPU gap polynomial.
+
+Compares the original double loop over np.arange with the Horner evaluator
+in sst_hw.epu_calc, for single points and for a whole scan's worth of
+points.  Run with ``python benchmarks/bench_epu_gap.py``.
+"""
+import timeit
+
+import numpy as np
+
+from sst_hw.epu_calc import LINEAR_GAP_COEFFS, Poly2D
+
+
+def legacy_epu_gap(coeffs, x, y):
+    z = 0.0
+    for i in np.arange(coeffs.shape[0]):
+        for j in np.arange(coeffs.shape[1]):
+            z += coeffs[j, i] * (x ** j) * (y ** i)
+    return z
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main(npoints=2000):
+    poly = Poly2D(LINEAR_GAP_COEFFS)
+    phase, energy = 15000.0, 500.0
+    phases = np.linspace(0, 29500, npoints)
+    energies = np.linspace(80, 1300, npoints)
+
+    legacy = best_of(lambda: legacy_epu_gap(LINEAR_GAP_COEFFS, phase, energy), 200)
+    horner = best_of(lambda: poly(phase, energy), 5000)
+    horner_array = best_of(lambda: poly(phases, energies), 50)
+    error = max(
+        abs(poly(x, y) - legacy_epu_gap(LINEAR_GAP_COEFFS, x, y))
+        for x, y in zip(phases[::100], energies[::100])
+    )
+
+    print("legacy loop, scalar    : {:10.2f} us/call".format(legacy * 1e6))
+    print("Horner, scalar         : {:10.2f} us/call".format(horner * 1e6))
+    print(
+        "Horner, {} points    : {:10.2f} us/call ({:.3f} us/point)".format(
+            npoints, horner_array * 1e6, horner_array * 1e6 / npoints
+        )
+    )
+    print("scalar speedup         : {:10.1f}x".format(legacy / horner))
+    print("max |difference|       : {:10.3g} microns".format(error))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Gap update rate and jitter while following a flying mono: the reactive
+loop (calculate the gap for each readback that moved more than the lag)
+against a precomputed GapTrajectory (binary search per readback).
+
+A noisy mono ramp is replayed through both handlers.  The update rate is
+the number of readbacks per second each handler can keep up with, and the
+jitter is the spread of the time taken by the readbacks that move the gap,
+which is the delay added to each gap move.  The gap set itself is not
+included, only the Python work on the readback path.
+
+Run with ``python benchmarks/bench_fly_trajectory.py``.
+"""
+import time
+
+import numpy as np
+
+from sst_hw.epu_calc import LINEAR_GAP_COEFFS, CubicSplineTable, Poly2D
+from sst_hw.lut import luts
+from sst_hw.trajectory import GapTrajectory
+
+POL = 45.0
+LAG = 0.1  # eV, EnPos._flyer_lag_ev
+
+
+class Reactive:
+    """The per-readback path of EnPos._track_gap without a trajectory"""
+
+    def __init__(self, phase_of, poly):
+        self.phase_of = phase_of
+        self.poly = poly
+        self.last = None
+
+    def gap(self, energy):
+        harmonic = 1 if energy < 1200 else 3
+        phase = min(29500.0, max(0.0, self.phase_of(POL)))
+        gap = self.poly(phase, energy / harmonic)
+        return max(14000.0, min(100000.0, gap)), harmonic
+
+    def __call__(self, energy):
+        if self.last is not None and abs(self.last - energy) <= LAG:
+            return None
+        self.last = energy
+        return self.gap(energy)
+
+
+class Trajectory:
+    """The per-readback path of EnPos._track_gap with a trajectory"""
+
+    def __init__(self, trajectory):
+        self.trajectory = trajectory
+        self.last = None
+
+    def __call__(self, energy):
+        found = self.trajectory.follow(energy, self.last)
+        if found is None:
+            return None
+        self.last = found[0]
+        return found[1:]
+
+
+def ramp(start, stop, speed, period, noise=0.02, seed=0):
+    n = int(abs(stop - start) / speed / period)
+    rng = np.random.default_rng(seed)
+    return (np.linspace(start, stop, n) + rng.normal(0, noise, n)).tolist()
+
+
+def per_readback(handler, readbacks):
+    """time taken for each readback, and whether it moved the gap"""
+    costs = np.empty(len(readbacks))
+    moved = np.zeros(len(readbacks), dtype=bool)
+    clock = time.perf_counter
+    for n, energy in enumerate(readbacks):
+        t0 = clock()
+        moved[n] = handler(energy) is not None
+        costs[n] = clock() - t0
+    return costs, moved
+
+
+def main(start=250.0, stop=1300.0, speed=20.0, period=0.001):
+    polphase = luts.get("polphase")
+    phase_of = CubicSplineTable(polphase.coords["pol"], polphase.values)
+    reference = Reactive(phase_of, Poly2D(LINEAR_GAP_COEFFS))
+
+    def calculate(energies):
+        harmonics = np.where(energies < 1200, 1, 3)
+        phase = np.clip(phase_of(np.full(energies.shape, POL)), 0.0, 29500.0)
+        gaps = np.clip(reference.poly(phase, energies / harmonics), 14000.0, 1e5)
+        return gaps, harmonics
+
+    t0 = time.perf_counter()
+    trajectory = GapTrajectory.from_segments([(start, stop, speed)], LAG, 21, calculate)
+    build = time.perf_counter() - t0
+
+    readbacks = ramp(start, stop, speed, period)
+    print(
+        "{:.0f} to {:.0f} eV at {:.0f} eV/s, {} readbacks, {}-point trajectory "
+        "built in {:.1f} ms".format(
+            start, stop, speed, len(readbacks), len(trajectory), build * 1e3
+        )
+    )
+    errors = [
+        abs(trajectory.lookup(e)[1] - reference.gap(e)[0]) for e in readbacks[::97]
+    ]
+    print("max |trajectory - calculated| gap : {:.2f} microns".format(max(errors)))
+    print()
+    print(
+        "{:<11} {:>6} {:>12} {:>13} {:>11} {:>11} {:>11}".format(
+            "mode",
+            "moves",
+            "readbacks/s",
+            "move mean us",
+            "move p50 us",
+            "move p99 us",
+            "jitter us",
+        )
+    )
+    for label, make in (
+        ("reactive", lambda: Reactive(phase_of, reference.poly)),
+        ("trajectory", lambda: Trajectory(trajectory)),
+    ):
+        costs, moved = per_readback(make(), readbacks)
+        move_costs = costs[moved] * 1e6
+        p50, p99 = np.percentile(move_costs, [50, 99])
+        print(
+            "{:<11} {:>6} {:>12.0f} {:>13.2f} {:>11.2f} {:>11.2f} {:>11.2f}".format(
+                label,
+                moved.sum(),
+                1 / costs.mean(),
+                move_costs.mean(),
+                p50,
+                p99,
+                p99 - p50,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Lookup latency of the flux-table harmonic optimizer, and the flux it would
+gain over the fixed "harmonic 1 below 1200 eV" rule.  The gain scores
+harmonic h with the fundamental flux table at E / h and no calibrated
+weights, which overstates harmonic 3, so it is not a measured gain: it is
+what the uncalibrated tables claim, and why EnPos keeps optimize_harmonic
+off until harmonic_weights are measured (see HarmonicOptimizer).
+
+Run with ``python benchmarks/bench_harmonic.py``.
+"""
+import timeit
+
+import numpy as np
+
+from sst_hw.epu_calc import CubicSplineTable
+from sst_hw.gap_tables import GapTables, HarmonicOptimizer
+from sst_hw.lut import luts
+
+# (label, mode, polarization)
+CASES = [
+    ("circular", 0, -1),
+    ("linear 0 deg", 2, 0),
+    ("linear 45 deg", 2, 45),
+    ("linear 90 deg", 2, 90),
+]
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    polphase = luts.get("polphase")
+    phase_of = CubicSplineTable(polphase.coords["pol"], polphase.values)
+    gap_tables = GapTables(luts)
+    optimizer = HarmonicOptimizer(gap_tables)
+    energies = np.arange(100.0, 2000.0, 1.0)
+
+    print(
+        "weights {}: uncalibrated, harmonic 3 is overstated and the gains "
+        "below are not measured flux; optimize_harmonic stays off by default".format(
+            optimizer.weights or "1 for every harmonic"
+        )
+    )
+    print(
+        "{:<7} {:<14} {:>9} {:>11} {:>11}".format(
+            "grating", "polarization", "changed", "mean gain", "max gain"
+        )
+    )
+    for grating in ("250", "1200"):
+        for label, mode, pol in CASES:
+            phase = 15000.0 if mode in (0, 1) else phase_of(pol)
+            best, _ = optimizer.lookup(energies, phase, mode, grating)
+            rule = np.where(energies < 1200, 1, 3)
+            flux1 = optimizer.flux(energies, phase, mode, 1, grating)
+            flux3 = optimizer.flux(energies, phase, mode, 3, grating)
+            best_flux = np.where(best == 1, flux1, flux3)
+            rule_flux = np.where(rule == 1, flux1, flux3)
+            both = (best > 0) & np.isfinite(rule_flux) & (rule_flux > 0)
+            if not both.any():
+                print("{:<7} {:<14} {:>9}".format(grating, label, "no data"))
+                continue
+            gain = best_flux[both] / rule_flux[both]
+            print(
+                "{:<7} {:<14} {:>8.1f}% {:>10.3f}x {:>10.3f}x".format(
+                    grating,
+                    label,
+                    100 * np.mean(best[both] != rule[both]),
+                    gain.mean(),
+                    gain.max(),
+                )
+            )
+
+    gap_tables.update_grating("1200l/mm")
+    optimizer.lookup(900.0, 15000.0, 0)  # build the table outside the timing
+    scalar = best_of(lambda: optimizer.lookup(900.0, 15000.0, 0), 2000)
+    array = best_of(lambda: optimizer.lookup(energies, 15000.0, 0), 200)
+    print()
+    print("lookup, scalar             : {:8.2f} us/call".format(scalar * 1e6))
+    print(
+        "lookup, {} energies      : {:8.2f} us/call".format(len(energies), array * 1e6)
+    )
+
+
+if __name__ == "__main__":
+    main()
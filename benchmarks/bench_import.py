@@ -0,0 +1,82 @@
+"""
+Startup cost of importing an sst_hw module, at a baseline commit and in
+this working tree.
+
+The baseline is checked out into a temporary git worktree, and every
+measurement imports the module in a fresh interpreter with only that tree
+on the front of sys.path.  Run with
+``python benchmarks/bench_import.py [module] [baseline]``; the default
+baseline, dd8ebb0, is the last commit that imported xarray and the device
+modules eagerly.
+"""
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = pathlib.Path(__file__).absolute().parent.parent
+BASELINE = "dd8ebb0"
+
+SNIPPET = """
+import sys, time
+sys.path.insert(0, {tree!r})
+_t = time.perf_counter()
+import {module}
+_t = time.perf_counter() - _t
+assert {module}.__file__.startswith({tree!r}), {module}.__file__
+print(_t, "xarray" in sys.modules)
+"""
+
+
+def time_import(tree, module, repeat=5):
+    """median seconds to import module from tree, and whether xarray came too"""
+    env = dict(os.environ)
+    env.pop("SST_HW_SIMULATE", None)
+    code = SNIPPET.format(tree=str(tree), module=module)
+    times = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", code],
+            check=True,
+            capture_output=True,
+            text=True,
+            cwd=tempfile.gettempdir(),
+            env=env,
+        )
+        seconds, xarray = out.stdout.strip().splitlines()[-1].split()
+        times.append(float(seconds))
+    return statistics.median(times), xarray == "True"
+
+
+def main(module="sst_hw.energy", baseline=BASELINE):
+    with tempfile.TemporaryDirectory() as tmp:
+        tree = pathlib.Path(tmp) / "baseline"
+        git = ["git", "-C", str(ROOT), "worktree"]
+        subprocess.run(
+            git + ["add", "--detach", str(tree), baseline],
+            check=True,
+            capture_output=True,
+        )
+        try:
+            before, before_xarray = time_import(tree, module)
+        finally:
+            subprocess.run(
+                git + ["remove", "--force", str(tree)], check=True, capture_output=True
+            )
+    after, after_xarray = time_import(ROOT, module)
+    for label, value, xarray in [
+        ("import {} at {}".format(module, baseline), before, before_xarray),
+        ("import {} in {}".format(module, ROOT.name), after, after_xarray),
+    ]:
+        print(
+            "{:<45}: {:8.1f} ms{}".format(
+                label, value * 1e3, ", imports xarray" if xarray else ""
+            )
+        )
+    print("{:<45}: {:8.1f} ms".format("saved", (before - after) * 1e3))
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,68 @@
+"""
+Accuracy and latency of the polarization <-> phase splines.
+
+Compares the CubicSplineTable lookups EnPos uses for phase() and pol() with
+the xarray ``interp(method="cubic")`` calls they replaced.  Run with
+``python benchmarks/bench_polphase.py``; tests/test_epu_calc.py checks that
+they agree.
+"""
+import pathlib
+import timeit
+
+import numpy as np
+import xarray as xr
+
+from sst_hw.epu_calc import CubicSplineTable
+
+CONFIG = pathlib.Path(__file__).parent.parent / "sst_hw" / "config"
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def main():
+    polphase = xr.load_dataarray(CONFIG / "polphase.nc")
+    phasepol = xr.DataArray(
+        data=polphase.pol, coords={"phase": polphase.values}, dims={"phase"}
+    )
+    phase_spline = CubicSplineTable(polphase.pol.values, polphase.values)
+    pol_spline = CubicSplineTable(polphase.values, polphase.pol.values)
+
+    pols = np.linspace(-1, 91, 4001)
+    phases = np.linspace(-100, 30100, 4001)
+    phase_err = np.nanmax(
+        np.abs(polphase.interp(pol=pols, method="cubic").values - phase_spline(pols))
+    )
+    pol_err = np.nanmax(
+        np.abs(
+            phasepol.interp(phase=phases, method="cubic").values - pol_spline(phases)
+        )
+    )
+    nan_ok = np.array_equal(
+        np.isnan(polphase.interp(pol=pols, method="cubic").values),
+        np.isnan(phase_spline(pols)),
+    )
+    scalar_err = max(
+        abs(float(polphase.interp(pol=p, method="cubic")) - phase_spline(p))
+        for p in pols[40:-40:50]
+    )
+
+    xr_time = best_of(lambda: float(polphase.interp(pol=45.0, method="cubic")), 100)
+    spline_time = best_of(lambda: phase_spline(45.0), 10000)
+    array_time = best_of(lambda: phase_spline(pols), 200)
+
+    print("phase(pol) max |difference|   : {:.3g}".format(max(phase_err, scalar_err)))
+    print("pol(phase) max |difference|   : {:.3g}".format(pol_err))
+    print("nan outside table matches     : {}".format(nan_ok))
+    print("xarray interp, scalar         : {:10.2f} us/call".format(xr_time * 1e6))
+    print("spline table, scalar          : {:10.2f} us/call".format(spline_time * 1e6))
+    print(
+        "spline table, {} points     : {:10.2f} us/call".format(
+            len(pols), array_time * 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Benchmark suite for the sst_hw hot paths, run against the simulated backend
+(sst_hw.sim) so that it needs no beamline.
+
+Measures
+  * import time of every device module (fresh interpreter each time)
+  * EnPos.forward / inverse calls per second, with and without cache hits
+  * EnPos.where_sp latency
+  * fly-scan readback events captured per second, reactive and trajectory
+
+Results are written as JSON so that runs on different commits can be
+compared::
+
+    python benchmarks/bench_sim.py --output before.json
+    git checkout other-branch
+    python benchmarks/bench_sim.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+MODULES = [
+    "diode",
+    "vacuum",
+    "gatevalves",
+    "shutters",
+    "mirrors",
+    "motors",
+    "manipulator",
+    "energy",
+]
+
+
+def result(value, unit, higher_is_better):
+    return {"value": float(value), "unit": unit, "higher_is_better": higher_is_better}
+
+
+def commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_imports(repeat=3):
+    env = dict(os.environ, SST_HW_SIMULATE="1")
+    results = {}
+    for module in MODULES:
+        code = (
+            "import time; t = time.perf_counter(); import sst_hw.{}; "
+            "print(time.perf_counter() - t)".format(module)
+        )
+        times = []
+        for _ in range(repeat):
+            out = subprocess.run(
+                [sys.executable, "-c", code], capture_output=True, text=True, env=env
+            )
+            if out.returncode != 0:
+                break
+            times.append(float(out.stdout.strip().splitlines()[-1]))
+        if times:
+            results["import." + module] = result(np.median(times), "s", False)
+    return results
+
+
+def rate(func, args, min_time=0.5):
+    """calls per second of func over args, cycling until min_time has passed"""
+    calls = 0
+    t0 = time.perf_counter()
+    while True:
+        for arg in args:
+            func(arg)
+        calls += len(args)
+        elapsed = time.perf_counter() - t0
+        if elapsed > min_time:
+            return calls / elapsed
+
+
+def make_enpos():
+    from ophyd import EpicsMotor
+
+    from sst_hw import sim
+    from sst_hw.energy import EnPos
+
+    rotation = EpicsMotor("SIM{Rot}Mtr", name="sim_rotation")
+    en = EnPos("", name="en", rotation_motor=rotation)
+    en.wait_for_connection(timeout=10)
+    sim.simulate_positioners(en, move_time=0.001)
+    sim.simulate_positioners(rotation, move_time=0.001)
+    sim.seed({en.monoen.gratingx.readback.pvname: "1200l/mm"})
+    return en
+
+
+def bench_enpos(en):
+    results = {}
+    rng = np.random.default_rng(0)
+    energies = rng.uniform(100, 1200, 2000)
+    pols = rng.uniform(0, 180, 2000)
+    points = [
+        en.PseudoPosition(energy=e, polarization=p, sample_polarization=0)
+        for e, p in zip(energies, pols)
+    ]
+    phases = rng.uniform(0, 29500, 2000)
+    reals = [
+        en.RealPosition(monoen=e, epugap=20000.0, epuphase=ph, epumode=2)
+        for e, ph in zip(energies, phases)
+    ]
+
+    def uncached(func):
+        def call(arg):
+            en.clear_caches()
+            return func(arg)
+
+        return call
+
+    results["forward.uncached"] = result(
+        rate(uncached(en.forward), points), "calls/s", True
+    )
+    results["forward.cached"] = result(rate(en.forward, points[:50]), "calls/s", True)
+    results["inverse.uncached"] = result(
+        rate(uncached(en.inverse), reals), "calls/s", True
+    )
+    results["inverse.cached"] = result(rate(en.inverse, reals[:50]), "calls/s", True)
+
+    latencies = []
+    for _ in range(50):
+        t0 = time.perf_counter()
+        en.where_sp()
+        latencies.append(time.perf_counter() - t0)
+    results["where_sp.p50"] = result(np.percentile(latencies, 50), "s", False)
+    results["where_sp.p95"] = result(np.percentile(latencies, 95), "s", False)
+    return results
+
+
+def bench_fly(en, trajectory):
+    """
+    Push as many mono readback updates as the flyer buffer holds, as fast
+    as possible, through a kicked-off EnPos flyer (fly() itself is not
+    called, so the mono does not move)
+    """
+    from sst_hw import sim
+
+    en.preflight(270, 280, 1, trajectory=trajectory)
+    en.kickoff()
+    events = en._flyer_buffer.capacity - 1
+    pvname = en.monoen.readback.pvname
+    ioc = sim.ioc()
+    values = np.linspace(270, 280, events).tolist()
+    t0 = time.perf_counter()
+    for value in values:
+        ioc.put(pvname, value)
+    # wait for the monitor thread to work through the queued updates
+    while len(en._flyer_buffer) < events:
+        if time.perf_counter() - t0 > 60:
+            break
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - t0
+    en.complete()
+    captured = sum(len(page["time"]) for page in en.collect_pages())
+    en.scanlock.set(False).wait()
+    label = "fly.trajectory" if trajectory else "fly.reactive"
+    return {
+        label + ".events_per_s": result(captured / elapsed, "events/s", True),
+        label + ".captured_fraction": result(captured / events, "", True),
+    }
+
+
+def compare(results, baseline):
+    print(
+        "{:<34} {:>14} {:>14} {:>9}".format("benchmark", "baseline", "this run", "change")
+    )
+    for name, new in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None or not old["value"]:
+            continue
+        change = new["value"] / old["value"] - 1
+        better = (change > 0) == new["higher_is_better"]
+        print(
+            "{:<34} {:>14.6g} {:>14.6g} {:>+8.1f}% {}".format(
+                name,
+                old["value"],
+                new["value"],
+                100 * change,
+                "" if abs(change) < 0.1 else ("better" if better else "WORSE"),
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of an earlier run")
+    parser.add_argument("--get-latency", type=float, default=0.0005)
+    parser.add_argument("--put-latency", type=float, default=0.001)
+    parser.add_argument("--skip-imports", action="store_true")
+    args = parser.parse_args(argv)
+
+    from sst_hw import sim
+
+    sim.enable(get_latency=args.get_latency, put_latency=args.put_latency)
+
+    results = {} if args.skip_imports else bench_imports()
+    en = make_enpos()
+    results.update(bench_enpos(en))
+    # puts are only for driving the readback here, not part of what is measured
+    sim.ioc().put_latency = 0
+    results.update(bench_fly(en, trajectory=False))
+    results.update(bench_fly(en, trajectory=True))
+
+    report = {
+        "meta": {
+            "commit": commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "get_latency": args.get_latency,
+            "put_latency": args.put_latency,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f)["results"])
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
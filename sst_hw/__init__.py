@@ -0,0 +1,12 @@
+import os
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+# sim imports ophyd, so it is only imported when SST_HW_SIMULATE asks for it
+if _env_flag("SST_HW_SIMULATE"):
+    from sst_hw import sim
+
+    sim.enable()
@@ -0,0 +1,98 @@
+"""
+Helpers for issuing several independent ophyd operations at once.
+
+Each CA put or get costs a network round trip; when they do not depend on
+each other there is no reason to wait for one before starting the next.
+"""
+import functools
+import operator
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from ophyd.status import Status
+
+
+def combine_statuses(statuses):
+    """One status that finishes when every status in statuses has"""
+    statuses = list(statuses)
+    if not statuses:
+        st = Status()
+        st.set_finished()
+        return st
+    return functools.reduce(operator.and_, statuses)
+
+
+def set_many(pairs, **kwargs):
+    """
+    Start ``obj.set(value)`` for every (obj, value) pair without waiting,
+    and return a single status for all of them
+
+    Parameters
+    ----------
+    pairs : iterable of (settable, value)
+    kwargs : passed to every set
+    """
+    return combine_statuses(obj.set(value, **kwargs) for obj, value in pairs)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=32, thread_name_prefix="sst_hw_batch"
+            )
+        return _executor
+
+
+def call_many(funcs, timeout=2.0):
+    """
+    Call every function (with no arguments) concurrently, waiting at most
+    timeout seconds in total
+
+    Returns
+    -------
+    results : list
+        the return value of each function, in order, or None where it failed
+    failures : dict
+        index -> exception (or TimeoutError) for every call that failed
+    """
+    executor = _get_executor()
+    futures = [executor.submit(func) for func in funcs]
+    done, _ = wait(futures, timeout=timeout)
+    results, failures = [], {}
+    for n, future in enumerate(futures):
+        if future not in done:
+            future.cancel()
+            results.append(None)
+            failures[n] = TimeoutError(f"no reply within {timeout} s")
+        elif future.exception() is not None:
+            results.append(None)
+            failures[n] = future.exception()
+        else:
+            results.append(future.result())
+    return results, failures
+
+
+def get_many(signals, timeout=2.0):
+    """
+    Read every signal concurrently, waiting at most timeout seconds in total
+
+    Parameters
+    ----------
+    signals : sequence of readable signals
+    timeout : float
+        seconds to wait for all of the reads together
+
+    Returns
+    -------
+    values : list
+        the value of each signal, in order, or None where it failed
+    failures : dict
+        index -> exception (or TimeoutError) for every read that failed
+    """
+    return call_many([sig.get for sig in signals], timeout)
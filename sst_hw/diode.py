@@ -1,74 +1,104 @@
-from ophyd import EpicsSignal, PVPositionerPC, Signal, Component
-from ophyd.status import SubscriptionStatus
-from sst_funcs.printing import run_report
-
+from collections import deque
 
-run_report(__file__)
+from ophyd import EpicsSignal, PVPositionerPC, Signal, Component
+from sst_hw.edge_status import EdgeStatus
+from sst_hw.exposure_telemetry import ExposureTelemetry
+from sst_hw.registry import DeviceRegistry
+from sst_hw.shutter_sequencer import ShutterSequencer
 
+registry = DeviceRegistry(__name__, report=True)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
 
-Shutter_enable = EpicsSignal(
+registry.add(
+    "Shutter_enable",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}OutMaskBit:2-Sel",
     name="RSoXS Shutter Toggle Enable",
     kind="normal",
 )
-Shutter_SAXS_count = EpicsSignal(
+registry.add(
+    "Shutter_SAXS_count",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:2}InCounter01:Count-I",
     name="RSoXS SAXS Shutter Counter",
     kind="normal",
 )
-Shutter_WAXS_count = EpicsSignal(
+registry.add(
+    "Shutter_WAXS_count",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:2}InCounter00:Count-I",
     name="RSoXS WAXS Shutter Counter",
     kind="normal",
 )
-Shutter_enable1 = EpicsSignal(
+registry.add(
+    "Shutter_enable1",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}InMaskBit:1-Sel",
     name="RSoXS Shutter Toggle Enable In",
     kind="normal",
 )
-Shutter_enable2 = EpicsSignal(
+registry.add(
+    "Shutter_enable2",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}InMaskBit:2-Sel",
     name="RSoXS Shutter Toggle Enable In2",
     kind="normal",
     put_complete=False,
     auto_monitor=False,
 )
-Shutter_enable3 = EpicsSignal(
+registry.add(
+    "Shutter_enable3",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}InMaskBit:3-Sel",
     name="RSoXS Shutter Toggle Enable In3",
     kind="normal",
 )
-Shutter_delay = EpicsSignal(
+registry.add(
+    "Shutter_delay",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}OutDelaySet:2-SP",
     name="RSoXS Shutter Delay (ms)",
     kind="normal",
 )
-Shutter_open_time = EpicsSignal(
+registry.add(
+    "Shutter_open_time",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}OutWidthSet:2-SP",
     name="RSoXS Shutter Opening Time (ms)",
     kind="normal",
 )
-Shutter_trigger = EpicsSignal(
+registry.add(
+    "Shutter_trigger",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-MTO:1}Trigger:PV-Cmd",
     name="RSoXS Shutter Trigger",
     kind="normal",
 )
-Light_control = EpicsSignal(
+registry.add(
+    "Light_control",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:1}OutPt05:Data-Sel",
     name="RSoXS Light Toggle",
     kind="normal",
 )
-MC21_disable = EpicsSignal(
+registry.add(
+    "MC21_disable",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:1}OutPt06:Data-Sel",
     name="MC21_disable",
     kind="normal",
 )
-MC20_disable = EpicsSignal(
+registry.add(
+    "MC20_disable",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:1}OutPt07:Data-Sel",
     name="MC20_disable",
     kind="normal",
 )
-MC19_disable = EpicsSignal(
+registry.add(
+    "MC19_disable",
+    EpicsSignal,
     "XF:07IDB-CT{DIODE-Local:1}OutPt08:Data-Sel",
     name="MC19_disable",
     kind="normal",
@@ -78,24 +108,75 @@ class ShutterSet(PVPositionerPC):
     readback = Component(EpicsSignal,'-RB')
     setpoint = Component(EpicsSignal,'-SP')
 
-    def set(self, value,*args,**kwargs):
+    # seconds to wait for the shutter to open and close again: wait_timeout
+    # if set, otherwise the programmed delay and opening time plus
+    # wait_margin, or fallback_timeout if they cannot be read.  poll_period
+    # is the time between direct reads of the shutter counters, in case the
+    # readback's monitor updates are lost
+    wait_timeout = None
+    wait_margin = 60.0
+    fallback_timeout = 600.0
+    poll_period = 1.0
+
+    def __init__(
+        self, *args, delay_signal=None, width_signal=None, counters=(), **kwargs
+    ):
+        super().__init__(*args, **kwargs)
+        self.delay_signal = delay_signal
+        self.width_signal = width_signal
+        self.counters = list(counters)
+        # {edge: seconds from set to edge} of recent waits
+        self.edge_latencies = deque(maxlen=100)
+
+    def exposure_timeout(self):
+        """seconds to wait for a whole exposure, see wait_timeout"""
+        if self.wait_timeout is not None:
+            return self.wait_timeout
+        return _exposure_timeout(
+            [self.delay_signal, self.width_signal],
+            self.wait_margin,
+            self.fallback_timeout,
+        )
+
+    def set(self, value, *args, timeout=None, poll_period=None, **kwargs):
         if value is None:
-            saw_rise = False
-
-            def watcher(*,old_value,value,**kwargs):
-                nonlocal saw_rise
-                if value == 1:
-                    saw_rise = True
-                    return False
-                if value == 0 and saw_rise:
-                    return True
-            return SubscriptionStatus(self.readback, watcher)
+            edges = [
+                ("rising", lambda value: value == 1),
+                ("falling", lambda value: value == 0),
+            ]
+            status = EdgeStatus(
+                self.readback,
+                edges,
+                device=self,
+                timeout=self.exposure_timeout() if timeout is None else timeout,
+                poll_period=self.poll_period if poll_period is None else poll_period,
+                counters=self.counters,
+            )
+            status.add_callback(lambda st: self.edge_latencies.append(st.latencies))
+            return status
         else:
+            if timeout is not None:
+                kwargs["timeout"] = timeout
             return super().set(value, *args, **kwargs)
 
 
 class ShutterWait(EpicsSignal):
-    def set(self, value, *, just_wait=False, **kwargs):
+    # seconds to wait for the value when just_wait: wait_timeout if set,
+    # otherwise the programmed opening time plus wait_margin, or
+    # fallback_timeout if it cannot be read; and seconds between direct
+    # reads in case monitor updates are lost
+    wait_timeout = None
+    wait_margin = 60.0
+    fallback_timeout = 600.0
+    poll_period = 1.0
+
+    def __init__(self, *args, width_signal=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.width_signal = width_signal
+        # seconds from set to the value of recent waits
+        self.wait_latencies = deque(maxlen=100)
+
+    def set(self, value, *, just_wait=False, timeout=None, poll_period=None, **kwargs):
             """
             Set the value of the Signal, or just wait for the object to change to a value, either way returning a Status object
 
@@ -103,7 +184,9 @@ class ShutterWait(EpicsSignal):
             ----------
             value : either a set value of a value to wait for
             just_wait : boolean whether to not set anything but just wait for the value to change to this value
-            
+            timeout : seconds to wait when just waiting, default from the opening time
+            poll_period : seconds between direct reads while just waiting
+
             Returns
             -------
             Status
@@ -111,20 +194,89 @@ class ShutterWait(EpicsSignal):
             """
             if(just_wait):
                 wait_value = value
-                def watcher(*,old_value,value,**kwargs):
-                    if value == wait_value:
-                        return True
-                    else:
-                        return False
-                return SubscriptionStatus(self, watcher)
+                edge = (
+                    "value {!r}".format(wait_value),
+                    lambda value: value == wait_value,
+                )
+                status = EdgeStatus(
+                    self,
+                    [edge],
+                    timeout=self.exposure_timeout() if timeout is None else timeout,
+                    poll_period=(
+                        self.poll_period if poll_period is None else poll_period
+                    ),
+                )
+                status.add_callback(
+                    lambda st: self.wait_latencies.extend(st.latencies.values())
+                )
+                return status
             else:
+                if timeout is not None:
+                    kwargs["timeout"] = timeout
                 return super().set(value, **kwargs)
 
-Shutter_control = ShutterWait(
-    "XF:07IDB-CT{DIODE-Local:1}OutPt01:Data-Sel",
-    name="RSoXS Shutter Toggle",
-    kind="normal",
-)
+    def exposure_timeout(self):
+        """seconds to wait for the value when just_wait, see wait_timeout"""
+        if self.wait_timeout is not None:
+            return self.wait_timeout
+        return _exposure_timeout(
+            [self.width_signal], self.wait_margin, self.fallback_timeout
+        )
+
+
+def _exposure_timeout(signals, margin, fallback):
+    # signals hold times in ms, e.g. the MTO delay and opening time
+    try:
+        return sum(float(sig.get()) for sig in signals) / 1000 + margin
+    except Exception:
+        return fallback
+
+
+@registry.device("Shutter_control")
+def _shutter_control():
+    return ShutterWait(
+        "XF:07IDB-CT{DIODE-Local:1}OutPt01:Data-Sel",
+        name="RSoXS Shutter Toggle",
+        kind="normal",
+        width_signal=registry.build("Shutter_open_time"),
+    )
+
+
+@registry.device("shutter_open_set")
+def _shutter_open_set():
+    return ShutterSet(
+        "XF:07IDB-CT{DIODE-MTO:1}Output:2",
+        name="Shutter Open with Watcher",
+        delay_signal=registry.build("Shutter_delay"),
+        width_signal=registry.build("Shutter_open_time"),
+        counters=[
+            registry.build("Shutter_SAXS_count"),
+            registry.build("Shutter_WAXS_count"),
+        ],
+    )
+
+
+@registry.device("shutter_sequencer")
+def _shutter_sequencer():
+    return ShutterSequencer(
+        registry.build("Shutter_delay"),
+        registry.build("Shutter_open_time"),
+        registry.build("Shutter_trigger"),
+        [registry.build("Shutter_SAXS_count"), registry.build("Shutter_WAXS_count")],
+        name="RSoXS Shutter Sequencer",
+    )
+
 
+@registry.device("exposure_telemetry")
+def _exposure_telemetry():
+    shutter = registry.build("shutter_open_set")
+    return ExposureTelemetry(
+        [registry.build("Shutter_trigger"), shutter.setpoint],
+        shutter.readback,
+        [registry.build("Shutter_SAXS_count"), registry.build("Shutter_WAXS_count")],
+        registry.build("Shutter_open_time"),
+        name="RSoXS Exposure Telemetry",
+    )
 
-shutter_open_set = ShutterSet('XF:07IDB-CT{DIODE-MTO:1}Output:2',name = "Shutter Open with Watcher")
+# star imports build and export every device
+__all__ = registry.names()
@@ -0,0 +1,182 @@
+"""
+A status that waits for a signal to pass through a sequence of values.
+
+SubscriptionStatus relies on every monitor update arriving; if one is
+lost the status never finishes.  EdgeStatus can also give up after a
+timeout, saying which edge it was still waiting for, and can poll the
+signal directly every ``poll_period`` seconds so that an edge whose
+monitor update was lost is still seen.  A pulse shorter than the poll
+period can be over between two polls, so when the edges make up a pulse
+that a counter counts (e.g. the shutter counters), polling reads the
+counters instead, and any count since the start of the wait stands for
+all of the edges.  The time from the start of the wait to each edge is
+kept in ``latencies``.
+"""
+import logging
+import threading
+import time
+
+from ophyd.status import DeviceStatus
+
+logger = logging.getLogger(__name__)
+
+
+class EdgeStatus(DeviceStatus):
+    """
+    Parameters
+    ----------
+    signal : Signal
+        signal to watch
+    edges : list of (name, predicate)
+        the edges to see, in order; predicate(value) is True once the edge
+        has happened
+    device : Device, optional
+        device the status is for, default signal
+    timeout : float, optional
+        seconds to wait for all of the edges before failing
+    poll_period : float, optional
+        seconds between direct reads of signal, None to rely on monitors
+    counters : list of signals, optional
+        counters that count once all of the edges have happened; polling
+        reads these instead of signal
+    """
+
+    def __init__(
+        self,
+        signal,
+        edges,
+        *,
+        device=None,
+        timeout=None,
+        poll_period=None,
+        counters=None,
+        settle_time=0,
+    ):
+        super().__init__(
+            signal if device is None else device, settle_time=settle_time
+        )
+        self.signal = signal
+        self.edges = list(edges)
+        self.latencies = {}
+        self.polled_edges = []
+        self.last_value = None
+        self.counters = list(counters or ())
+        self._baseline = [counter.get() for counter in self.counters]
+        self._next = 0
+        self._start = time.monotonic()
+        self._lock = threading.Lock()
+        self._timers = []
+        if timeout is not None:
+            self._start_timer(timeout, self._timed_out)
+        if poll_period:
+            self._poll_period = poll_period
+            self._start_timer(poll_period, self._poll)
+        self.add_callback(self._cleanup)
+        signal.subscribe(self._on_value, run=True)
+
+    def _start_timer(self, delay, func):
+        timer = threading.Timer(delay, func)
+        timer.daemon = True
+        timer.start()
+        self._timers.append(timer)
+
+    def _see(self, value, polled):
+        with self._lock:
+            if self._next >= len(self.edges):
+                return
+            self.last_value = value
+            name, predicate = self.edges[self._next]
+            if not predicate(value):
+                return
+            self.latencies[name] = time.monotonic() - self._start
+            self._next += 1
+            finished = self._next == len(self.edges)
+        if polled:
+            self.polled_edges.append(name)
+            logger.warning(
+                "%s: %s edge was only seen by polling, monitor updates were lost",
+                self.signal.name,
+                name,
+            )
+        if finished and not self.done:
+            self.set_finished()
+
+    def _on_value(self, value, **kwargs):
+        self._see(value, polled=False)
+
+    def _see_counted(self):
+        with self._lock:
+            if self._next >= len(self.edges):
+                return
+            missed = [name for name, _ in self.edges[self._next :]]
+            now = time.monotonic() - self._start
+            for name in missed:
+                self.latencies[name] = now
+            self._next = len(self.edges)
+        self.polled_edges.extend(missed)
+        logger.warning(
+            "%s: %s only seen by the counters, monitor updates were lost",
+            self.signal.name,
+            ", ".join(missed),
+        )
+        if not self.done:
+            self.set_finished()
+
+    def _counted(self):
+        counts = [counter.get(use_monitor=False) for counter in self.counters]
+        return any(
+            count is not None and base is not None and count != base
+            for count, base in zip(counts, self._baseline)
+        )
+
+    def _poll(self):
+        if self.done:
+            return
+        try:
+            if self.counters:
+                if self._counted():
+                    self._see_counted()
+            else:
+                value = self.signal.get(use_monitor=False)
+                if value != self.last_value:
+                    self._see(value, polled=True)
+        except Exception as ex:
+            logger.debug("%s: poll failed: %s", self.signal.name, ex)
+        if not self.done:
+            self._start_timer(self._poll_period, self._poll)
+
+    def waiting_for(self):
+        """name of the edge not yet seen, or None"""
+        if self._next < len(self.edges):
+            return self.edges[self._next][0]
+        return None
+
+    def _timed_out(self):
+        with self._lock:
+            edge = self.waiting_for()
+            if edge is None or self.done:
+                return
+            seen = ", ".join(
+                "{} after {:.3f} s".format(name, seconds)
+                for name, seconds in self.latencies.items()
+            )
+        try:
+            self.set_exception(
+                TimeoutError(
+                    "{}: no {} edge within {:.1f} s (last value {!r}{})".format(
+                        self.signal.name,
+                        edge,
+                        time.monotonic() - self._start,
+                        self.last_value,
+                        ", saw " + seen if seen else "",
+                    )
+                )
+            )
+        except Exception:
+            # finished at the same moment
+            pass
+
+    def _cleanup(self, status):
+        self.signal.clear_sub(self._on_value)
+        for timer in self._timers:
+            timer.cancel()
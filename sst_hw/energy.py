@@ -1,757 +1,1120 @@
-from ophyd import (
-    PVPositioner,
-    EpicsSignalRO,
-    PseudoPositioner,
-    EpicsMotor,
-    EpicsSignal,
-    PVPositionerPC,
-    SoftPositioner,
-    Signal,
-)
-from ophyd import Component as Cpt
-import bluesky.plan_stubs as bps
-from ophyd.pseudopos import pseudo_position_argument, real_position_argument
-import pathlib
-import numpy as np
-import xarray as xr
-from sst_funcs.gGrEqns import energy as calc_energy
-from sst_funcs.printing import boxed_text, colored
-from sst_base.motors import PrettyMotorFMBO, FlyerMixin
-from sst_base.positioners import DeadbandEpicsMotor, DeadbandMixin, PseudoSingle
-from sst_base.mirrors import FMBHexapodMirrorAxisStandAlonePitch
-from sst_hw.shutters import psh4
-from sst_hw.motors import grating, mirror2
-from sst_hw.mirrors import mir3
-
-import time
-from ophyd.status import DeviceStatus, SubscriptionStatus
-import threading
-
-from queue import Queue, Empty
-
-##############################################################################################
-
-
-class UndulatorMotor(FlyerMixin,DeadbandEpicsMotor):
-    user_setpoint = Cpt(EpicsSignal, "-SP", limits=True)
-    # done = Cpt(EpicsSignalRO, ".MOVN")
-    # done_value = 0
-
-
-class EpuMode(PVPositionerPC):
-    setpoint = Cpt(EpicsSignal, "-SP", kind="config")
-    readback = Cpt(EpicsSignal, "-RB", kind="normal")
-
-
-# epu_mode = EpicsSignal(
-#    "SR:C07-ID:G1A{SST1:1-Ax:Phase}Phs:Mode-SP", name="EPU 60 Mode", kind="normal"
-# )
-class FMB_Mono_Grating_Type(PVPositioner):
-    setpoint = Cpt(EpicsSignal, "_TYPE_SP", string=True, kind="config")
-    readback = Cpt(EpicsSignal, "_TYPE_MON", string=True, kind="config")
-    actuate = Cpt(EpicsSignal, "_DCPL_CALC.PROC", kind="config")
-    enable = Cpt(EpicsSignal, "_ENA_CMD.PROC", kind="config")
-    kill = Cpt(EpicsSignal, "_KILL_CMD.PROC", kind="config")
-    home = Cpt(EpicsSignal, "_HOME_CMD.PROC", kind="config")
-    clear_encoder_loss = Cpt(EpicsSignal, "_ENC_LSS_CLR_CMD.PROC", kind="config")
-    done = Cpt(EpicsSignal, "_AXIS_STS", kind="config")
-
-
-class Monochromator(FlyerMixin,DeadbandMixin, PVPositioner):
-    setpoint = Cpt(EpicsSignal, ":ENERGY_SP", kind="config")
-    readback = Cpt(EpicsSignalRO, ":ENERGY_MON", kind="config")
-    en_mon = Cpt(EpicsSignalRO, ":READBACK2.A", name="Energy", kind="hinted")
-
-    grating = Cpt(PrettyMotorFMBO, "GrtP}Mtr", name="Mono Grating", kind="config")
-    mirror2 = Cpt(PrettyMotorFMBO, "MirP}Mtr", name="Mono Mirror", kind="config")
-    cff = Cpt(EpicsSignal, ":CFF_SP", name="Mono CFF", kind="config", auto_monitor=True)
-    vls = Cpt(
-        EpicsSignal, ":VLS_B2.A", name="Mono VLS", kind="config", auto_monitor=True
-    )
-    gratingx = Cpt(FMB_Mono_Grating_Type, "GrtX}Mtr", kind="config")
-    mirror2x = Cpt(FMB_Mono_Grating_Type, "MirX}Mtr", kind="config")
-
-    Scan_Start_ev = Cpt(
-        EpicsSignal, ":EVSTART_SP", name="MONO scan start energy", kind="config"
-    )
-    Scan_Stop_ev = Cpt(
-        EpicsSignal, ":EVSTOP_SP", name="MONO scan stop energy", kind="config"
-    )
-    Scan_Speed_ev = Cpt(
-        EpicsSignal, ":EVVELO_SP", name="MONO scan speed", kind="config"
-    )
-    Scan_Start = Cpt(
-        EpicsSignal, ":START_CMD.PROC", name="MONO scan start command", kind="config"
-    )
-    Scan_Stop = Cpt(
-        EpicsSignal,
-        ":ENERGY_ST_CMD.PROC",
-        name="MONO scan start command",
-        kind="config",
-    )
-
-    scanlock = Cpt(Signal, value=0, name="lock flag for during scans", kind="config")
-    done = Cpt(EpicsSignalRO, ":ERDY_STS", kind="config")
-    done_value = 1
-    stop_signal = Cpt(EpicsSignal, ":ENERGY_ST_CMD", kind="config")
-
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-    # def _setup_move(self, position):
-    #     """Move and do not wait until motion is complete (asynchronous)"""
-    #     self.log.debug("%s.setpoint = %s", self.name, position)
-    #     # copy from pv_positioner, with wait changed to false
-    #     # possible problem with IOC not returning from a set
-    #     self.setpoint.put(position, wait=False)
-    #     if self.actuate is not None:
-    #         self.log.debug("%s.actuate = %s", self.name, self.actuate_value)
-    #         self.actuate.put(self.actuate_value, wait=False)
-
-
-# mono_en= Monochromator('XF:07ID1-OP{Mono:PGM1-Ax:', name='Monochromator Energy',kind='normal')
-
-
-class EnPos(PseudoPositioner):
-    """Energy pseudopositioner class.
-    Parameters:
-    -----------
-    """
-
-    # synthetic axis
-    energy = Cpt(PseudoSingle, kind="hinted", limits=(71, 2250), name="Beamline Energy")
-    polarization = Cpt(
-        PseudoSingle, kind="normal", limits=(-1, 180), name="X-ray Polarization"
-    )
-    sample_polarization = Cpt(
-        PseudoSingle, kind="config", name="Sample X-ray polarization"
-    )
-    # real motors
-
-    monoen = Cpt(
-        Monochromator, "XF:07ID1-OP{Mono:PGM1-Ax:", kind="config", name="Mono Energy"
-    )
-    epugap = Cpt(
-        UndulatorMotor,
-        "SR:C07-ID:G1A{SST1:1-Ax:Gap}-Mtr",
-        kind="config",
-        name="EPU Gap",
-    )
-    epuphase = Cpt(
-        UndulatorMotor,
-        "SR:C07-ID:G1A{SST1:1-Ax:Phase}-Mtr",
-        kind="config",
-        name="EPU Phase",
-    )
-    epumode = Cpt(
-        EpuMode,
-        "SR:C07-ID:G1A{SST1:1-Ax:Phase}Phs:Mode",
-        name="EPU Mode",
-        kind="config",
-    )
-
-    sim_epu_mode = Cpt(
-        Signal, value=0, name="dont interact with the real EPU", kind="config"
-    )
-    scanlock = Cpt(
-        Signal, value=0, name="Lock Harmonic, Pitch, Grating for scan", kind="config"
-    )
-    harmonic = Cpt(Signal, value=1, name="EPU Harmonic", kind="config")
-    offset_gap = Cpt(Signal, value=0, name="EPU Gap offset", kind="config")
-    rotation_motor = None
-
-
-
-    @pseudo_position_argument
-    def forward(self, pseudo_pos):
-        """Run a forward (pseudo -> real) calculation"""
-        ret = self.RealPosition(
-            epugap=self.gap(
-                pseudo_pos.energy,
-                pseudo_pos.polarization,
-                self.scanlock.get(),
-                self.sim_epu_mode.get(),
-            ),
-            monoen=pseudo_pos.energy,
-            epuphase=abs(
-                self.phase(
-                    pseudo_pos.energy, pseudo_pos.polarization, self.sim_epu_mode.get()
-                )
-            ),
-            epumode=self.mode(pseudo_pos.polarization, self.sim_epu_mode.get()),
-        )
-        return ret
-
-    @real_position_argument
-    def inverse(self, real_pos):
-        """Run an inverse (real -> pseudo) calculation"""
-        # print('in Inverse')
-        ret = self.PseudoPosition(
-            energy=real_pos.monoen,
-            polarization=self.pol(real_pos.epuphase, real_pos.epumode),
-            sample_polarization=self.sample_pol(
-                self.pol(real_pos.epuphase, real_pos.epumode)
-            ),
-        )
-        # print('Finished inverse')
-        return ret
-
-    def where_sp(self):
-        return (
-            "Beamline Energy Setpoint : {}"
-            "\nMonochromator Readback : {}"
-            "\nEPU Gap Setpoint : {}"
-            "\nEPU Gap Readback : {}"
-            "\nEPU Phase Setpoint : {}"
-            "\nEPU Phase Readback : {}"
-            "\nEPU Mode Setpoint : {}"
-            "\nEPU Mode Readback : {}"
-            "\nGrating Setpoint : {}"
-            "\nGrating Readback : {}"
-            "\nGratingx Setpoint : {}"
-            "\nGratingx Readback : {}"
-            "\nMirror2 Setpoint : {}"
-            "\nMirror2 Readback : {}"
-            "\nMirror2x Setpoint : {}"
-            "\nMirror2x Readback : {}"
-            "\nCFF : {}"
-            "\nVLS : {}"
-        ).format(
-            colored(
-                "{:.2f}".format(self.monoen.setpoint.get()).rstrip("0").rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.readback.get()).rstrip("0").rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epugap.user_setpoint.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epugap.user_readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epuphase.user_setpoint.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epuphase.user_readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epumode.setpoint.get()).rstrip("0").rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.epumode.readback.get()).rstrip("0").rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.grating.user_setpoint.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.grating.user_readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                self.monoen.gratingx.setpoint.get(),
-                "yellow",
-            ),
-            colored(
-                self.monoen.gratingx.readback.get(),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.mirror2.user_setpoint.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.mirror2.user_readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                self.monoen.mirror2x.setpoint.get(),
-                "yellow",
-            ),
-            colored(
-                self.monoen.mirror2x.readback.get(),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.cff.get()).rstrip("0").rstrip("."), "yellow"
-            ),
-            colored(
-                "{:.2f}".format(self.monoen.vls.get()).rstrip("0").rstrip("."), "yellow"
-            ),
-        )
-
-    def where(self):
-        return (
-            "Beamline Energy : {}\nPolarization : {}\nSample Polarization : {}"
-        ).format(
-            colored(
-                "{:.2f}".format(self.monoen.readback.get()).rstrip("0").rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.polarization.readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-            colored(
-                "{:.2f}".format(self.sample_polarization.readback.get())
-                .rstrip("0")
-                .rstrip("."),
-                "yellow",
-            ),
-        )
-
-    def wh(self):
-        boxed_text(self.name + " location", self.where_sp(), "green", shrink=True)
-
-
-    def preflight(self, start, stop, speed, *args, locked=True, time_resolution=None):
-        self.monoen.Scan_Start_ev.set(start).wait()
-        self.monoen.Scan_Stop_ev.set(stop).wait()
-        self.monoen.Scan_Speed_ev.set(speed).wait()
-        self.monoen.Scan_Start_ev.set(start).wait()
-        self.monoen.Scan_Stop_ev.set(stop).wait()
-        self.monoen.Scan_Speed_ev.set(speed).wait()
-        if len(args) > 0:
-            if len(args) % 3 != 0:
-                raise ValueError("args must be start2, stop2, speed2[, start3, stop3, speed3, ...] and must be a multiple of 3")
-            else:
-                self.flight_segments = ((args[3*n], args[3*n + 1], args[3*n + 2]) for n in range(len(args)//3))
-        else:
-            self.flight_segments = iter(())
-
-        self._flyer_pol = self.polarization.setpoint.get()
-
-        if time_resolution is not None:
-            self._time_resolution = time_resolution
-        elif self._time_resolution is None:
-            self._time_resolution = self._default_time_resolution
-
-        self.energy.set(start + 10).wait()
-        self.energy.set(start + 10).wait()
-        if locked:
-            self.scanlock.set(True).wait()
-        self.energy.set(start).wait()
-        self.energy.set(start).wait()
-        self._last_mono_value = start
-        self._mono_stop = stop
-        self._ready_to_fly = True
-
-    def fly(self):
-        """
-        Should be called after all detectors start flying, so that we don't lose data
-        """
-        if not self._ready_to_fly:
-            self._fly_move_st = DeviceStatus(device=self)
-            self._fly_move_st.set_exception(RuntimeError)
-        else:
-            def check_value(*, old_value, value, **kwargs):
-                if (old_value != 1 and value == 1):
-                    try:
-                        start, stop, speed = next(self.flight_segments)
-                        self.monoen.Scan_Speed_ev.set(speed).wait()
-                        self.monoen.Scan_Start_ev.set(start).wait()
-                        self.monoen.Scan_Stop_ev.set(stop).wait()
-                        self.monoen.Scan_Speed_ev.set(speed).wait()
-                        self.monoen.Scan_Start.set(1)
-                        return False
-                    except StopIteration:
-                        return True
-                else:
-                    return False
-
-            self._fly_move_st = SubscriptionStatus(self.monoen.done, check_value, run=False)
-            self.monoen.Scan_Start.set(1)
-            self._flying = True
-            self._ready_to_fly = False
-        return self._fly_move_st
-
-    def land(self):
-        if self._fly_move_st.done:
-            self._flying = False
-            self._time_resolution = self._default_time_resolution
-            self.scanlock.set(False).wait()
-
-    def kickoff(self):
-        kickoff_st = DeviceStatus(device=self)
-        self._flyer_queue = Queue()
-        self._measuring = True
-        self._flyer_buffer = []
-        threading.Thread(target=self._aggregate, daemon=True).start()
-        kickoff_st.set_finished()
-        return kickoff_st
-
-    def _aggregate(self):
-        name = 'energy_readback'
-        while self._measuring:
-            rb = self.monoen.readback.read()
-            t = time.time()
-            value = rb[self.monoen.readback.name]['value']
-            ts = rb[self.monoen.readback.name]['timestamp']
-            self._flyer_buffer.append(value)
-            event = dict()
-            event['time'] = t
-            event['data'] = dict()
-            event['timestamps'] = dict()
-            event['data'][name] = value
-            event['timestamps'][name] = ts
-            self._flyer_queue.put(event)
-            if abs(self._last_mono_value - value) > self._flyer_lag_ev:
-                self._last_mono_value = value
-                self.epugap.set(self.gap(value + self._flyer_gap_lead, self._flyer_pol, False))
-            time.sleep(self._time_resolution)
-        return
-
-    def collect(self):
-        events = []
-        while True:
-            try:
-                e = self._flyer_queue.get_nowait()
-                events.append(e)
-            except Empty:
-                break
-        yield from events
-
-    def complete(self):
-        if self._measuring:
-            self._measuring = False
-        completion_status = DeviceStatus(self)
-        completion_status.set_finished()
-        self._time_resolution = None
-        return completion_status
-
-    def describe_collect(self):
-        dd = dict({"energy_readback": {'source': self.monoen.readback.pvname, 'dtype': 'number', 'shape': []}})
-        return {"energy_readback_monitor": dd}
-
-
-    # end class methods, begin internal methods
-
-    # begin LUT Functions
-
-    def __init__(
-        self,
-        a,
-        rotation_motor=None,
-        configpath=pathlib.Path(__file__).parent.absolute() / "config",
-        **kwargs,
-    ):
-        self.gap_fitnew = np.array([[-2.02817540e+03,  3.02264723e+02, -1.78252111e+00,
-                                        7.43668353e-03, -1.91232012e-05,  2.51973358e-08,
-                                        4.79962799e-12, -8.29186995e-14,  1.57617047e-16,
-                                        -1.59186547e-19,  9.43016130e-23, -3.09532281e-26,
-                                        4.36145287e-30],
-                                    [ 4.03257973e-01, -1.16153798e-02,  1.42259540e-04,
-                                        -9.21569724e-07,  3.64833617e-09, -9.41596905e-12,
-                                        1.63464324e-14, -1.92640661e-17,  1.52209377e-20,
-                                        -7.72874330e-24,  2.28187017e-27, -2.98088495e-31,
-                                        0.00000000e+00],
-                                    [ 4.56475603e-05, -4.07999403e-07,  1.18075497e-09,
-                                        -2.87363757e-12,  3.75535610e-15,  3.29862492e-18,
-                                        -1.94014184e-20,  2.74619195e-23, -1.83395988e-26,
-                                        5.77828602e-30, -6.21442519e-34,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [-5.25493975e-08,  9.13848518e-11, -8.89125498e-14,
-                                        -7.70071244e-17,  1.56845096e-19,  2.27044971e-22,
-                                        -3.84069721e-25,  1.07113860e-28,  6.45500669e-32,
-                                        -3.56486225e-35,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [ 1.69412943e-11, -1.72741103e-14,  2.32736978e-17,
-                                        -1.27270356e-20, -2.28179895e-23,  1.64992858e-26,
-                                        5.41608428e-30, -6.86000848e-33,  2.31195976e-36,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [-3.28740709e-15,  1.72993353e-18, -1.95111611e-21,
-                                        2.04503884e-24,  1.86619961e-28, -8.41281283e-31,
-                                        1.99741076e-34, -6.65135708e-38,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [ 4.12832071e-19, -1.08634915e-22,  9.38953584e-26,
-                                        -9.25160150e-29,  2.47681044e-32,  1.24161680e-35,
-                                        1.18873213e-39,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [-3.46595227e-23,  3.42794252e-27, -3.81112396e-30,
-                                        1.81952044e-33, -8.72888305e-37, -1.72881705e-40,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [ 1.97641466e-27,  2.15621764e-32,  1.26835147e-34,
-                                        -8.69314807e-39,  1.16321066e-41,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [-7.55639549e-32, -5.20717157e-36, -2.61944925e-39,
-                                        -1.53939901e-43,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [ 1.84709041e-36,  1.46245833e-40,  2.35251768e-44,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [-2.59793922e-41, -1.36029553e-45,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00],
-                                    [ 1.59420902e-46,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00,  0.00000000e+00,  0.00000000e+00,
-                                        0.00000000e+00]])
-        
-
-        # values for the minimum energy as a function of angle polynomial 10th deg
-        # 80.934 ± 0.0698
-        # -0.91614 ± 0.0446
-        # 0.39635 ± 0.00925
-        # -0.020478 ± 0.000881
-        # 0.00069047 ± 4.54e-05
-        # -1.5413e-05 ± 1.37e-06
-        # 2.1448e-07 ± 2.49e-08
-        # -1.788e-09 ± 2.68e-10
-        # 8.162e-12 ± 1.57e-12
-        # -1.5545e-14 ± 3.88e-15
-
-        self.polphase = xr.load_dataarray(configpath / "polphase.nc")
-        self.phasepol = xr.DataArray(
-            data=self.polphase.pol,
-            coords={"phase": self.polphase.values},
-            dims={"phase"},
-        )
-        self.rotation_motor = rotation_motor
-        super().__init__(a, **kwargs)
-        self.epugap.tolerance.set(3).wait()
-        self.epuphase.tolerance.set(10).wait()
-        #self.mir3Pitch.tolerance.set(0.01)
-        self.monoen.tolerance.set(0.01).wait()
-        self._ready_to_fly = False
-        self._fly_move_st = None
-        self._default_time_resolution = 0.05
-        self._flyer_lag_ev = 0.1
-        self._flyer_gap_lead = 0.0
-        self._time_resolution = None
-        self._flying = False
-    """
-    def stage(self):
-        if self.scanlock.get():
-            self.epuphase.tolerance.set(10)
-        super().stage()
-
-    def unstage(self):
-        self.epuphase.tolerance.set(0)
-        super().unstage()
-    """
-
-    def gap(self, energy, pol, locked, sim=0):
-        if sim:
-            return (
-                self.epugap.get()
-            )  # never move the gap if we are in simulated gap mode
-            # this might cause problems if someone else is moving the gap, we might move it back
-            # but I think this is not a common reason for this mode
-
-        self.harmonic.set(self.choose_harmonic(energy, pol, locked)).wait()
-        energy = energy / self.harmonic.get()
-
-        if (pol == -1) or (pol == -0.5):
-            encalc = energy
-            gap = 6202.6
-            gap += 74.094 * encalc ** 1
-            gap += 0.14654 * encalc ** 2
-            gap += -0.001609 * encalc ** 3
-            gap += 5.443e-06 * encalc ** 4
-            gap += -1.0023e-08 * encalc ** 5
-            gap += 1.1005e-11 * encalc ** 6
-            gap += -7.1779e-15 * encalc ** 7
-            gap += 2.5652e-18 * encalc ** 8
-            gap += -3.86e-22 * encalc ** 9
-
-            return max(14000.0, min(100000.0, gap)) + self.offset_gap.get()
-        elif 0 <= pol <= 90:
-            return (
-                max(14000.0, min(100000.0, self.epu_gap(energy, pol)))
-                + self.offset_gap.get()
-            )
-        elif 90 < pol <= 180:
-            return (
-                max(14000.0, min(100000.0, self.epu_gap(energy, 180.0 - pol)))
-                + self.offset_gap.get()
-            )
-        else:
-            return np.nan
-    
-    def epu_gap(self, en, pol ):
-        """
-        calculate the epu gap from the energy and polarization, using a 2D polynomial fit
-        @param en: energy (valid between ~70 and 1300
-        @param pol: polarization (valid between 0 and 90)
-        @return: gap in microns
-        """
-        y = float(en)
-        x = float(self.phase(en,pol))
-        z = 0.0
-        for i in np.arange(self.gap_fitnew.shape[0]):
-            for j in np.arange(self.gap_fitnew.shape[1]):
-                z += self.gap_fitnew[j, i] * (x ** j) * (y ** i)
-        return z
-
-    def phase(self, en, pol, sim=0):
-        if sim:
-            return (
-                self.epuphase.get()
-            )  # never move the gap if we are in simulated gap mode
-            # this might cause problems if someone else is moving the gap, we might move it back
-            # but I think this is not a common reason for this mode
-        if pol == -1:
-            return 15000
-        elif pol == -0.5:
-            return 15000
-        elif 90 < pol <= 180:
-            return -min(
-                29500.0,
-                max(0.0, float(self.polphase.interp(pol=180 - pol, method="cubic"))),
-            )
-        else:
-            return min(
-                29500.0, max(0.0, float(self.polphase.interp(pol=pol, method="cubic")))
-            )
-
-    def pol(self, phase, mode):
-        if mode == 0:
-            return -1
-        elif mode == 1:
-            return -0.5
-        elif mode == 2:
-            return float(self.phasepol.interp(phase=np.abs(phase), method="cubic"))
-        elif mode == 3:
-            return 180 - float(
-                self.phasepol.interp(phase=np.abs(phase), method="cubic")
-            )
-
-    def mode(self, pol, sim=0):
-        """
-        @param pol:
-        @return:
-        """
-        if sim:
-            return (
-                self.epumode.get()
-            )  # never move the gap if we are in simulated gap mode
-            # this might cause problems if someone else is moving the gap, we might move it back
-            # but I think this is not a common reason for this mode
-        if pol == -1:
-            return 0
-        elif pol == -0.5:
-            return 1
-        elif 90 < pol <= 180:
-            return 3
-        else:
-            return 2
-
-    def sample_pol(self, pol):
-        th = self.rotation_motor.user_setpoint.get()
-        return (
-            np.arccos(np.cos(pol * np.pi / 180) * np.sin(th * np.pi / 180))
-            * 180
-            / np.pi
-        )
-
-    def choose_harmonic(self, energy, pol, locked):
-        if locked:
-            return self.harmonic.get()
-        elif energy < 1200:
-            return 1
-        else:
-            return 3
-
-
-def base_set_polarization(pol, en):
-    yield from bps.mv(en.polarization, pol)
-    return 0
-
-
-def base_grating_to_250(mono_en, en):
-    type = mono_en.gratingx.readback.get()
-    if "250l/mm" in type:
-        print("the grating is already at 250 l/mm")
-        return 0  # the grating is already here
-    print("Moving the grating to 250 l/mm.  This will take a minute...")
-    yield from psh4.close()
-    yield from bps.abs_set(mono_en.gratingx, 2, wait=True)
-    # yield from bps.sleep(60)
-    # yield from bps.mv(mirror2.user_offset, 0.04) #0.0315)
-    # yield from bps.mv(grating.user_offset, -0.0874)#-0.0959)
-    # yield from bps.mv(en.m3offset, 7.90)
-    yield from bps.mv(mono_en.cff, 1.385)
-    yield from bps.mv(en, 270)
-    yield from psh4.open()
-    print("the grating is now at 250 l/mm signifigant higher order")
-    return 1
-
-
-def base_grating_to_1200(mono_en, en):
-    type = mono_en.gratingx.readback.get()
-    if "1200" in type:
-        print("the grating is already at 1200 l/mm")
-        return 0  # the grating is already here
-    print("Moving the grating to 1200 l/mm.  This will take a minute...")
-    yield from psh4.close()
-    yield from bps.abs_set(mono_en.gratingx, 9, wait=True)
-    # yield from bps.sleep(60)
-    # yield from bps.mv(mirror2.user_offset, 0.2044) #0.1962) #0.2052) # 0.1745)  # 8.1264)
-    # yield from bps.mv(grating.user_offset, 0.0769) #0.0687) # 0.0777) # 0.047)  # 7.2964)  # 7.2948)#7.2956
-    yield from bps.mv(mono_en.cff, 1.7)
-    # yield from bps.mv(en.m3offset, 7.791)
-    yield from bps.mv(en, 270)
-    yield from psh4.open()
-    print("the grating is now at 1200 l/mm")
-    return 1
-
-
-def base_grating_to_rsoxs(mono_en, en):
-    type = mono_en.gratingx.readback.get()
-    if "RSoXS" in type:
-        print("the grating is already at RSoXS")
-        return 0  # the grating is already here
-    print("Moving the grating to RSoXS 250 l/mm.  This will take a minute...")
-    yield from psh4.close()
-    yield from bps.abs_set(mono_en.gratingx, 10, wait=True)
-    # yield from bps.sleep(60)
-    # yield from bps.mv(mirror2.user_offset, 0.2044) #0.1962) #0.2052) # 0.1745)  # 8.1264)
-    # yield from bps.mv(grating.user_offset, 0.0769) #0.0687) # 0.0777) # 0.047)  # 7.2964)  # 7.2948)#7.2956
-    # yield from bps.mv(mono_en.cff, 1.7)
-    # yield from bps.mv(en.m3offset, 7.87)
-    yield from bps.mv(en, 270)
-    yield from psh4.open()
-    print("the grating is now at RSoXS 250 l/mm with low higher order")
-    return 1
-
+from ophyd import (
+    PVPositioner,
+    EpicsSignalRO,
+    PseudoPositioner,
+    EpicsMotor,
+    EpicsSignal,
+    PVPositionerPC,
+    SoftPositioner,
+    Signal,
+)
+from ophyd import Component as Cpt
+import bluesky.plan_stubs as bps
+from ophyd.pseudopos import pseudo_position_argument, real_position_argument
+import functools
+from collections import namedtuple
+import numpy as np
+from sst_funcs.gGrEqns import energy as calc_energy
+from sst_funcs.printing import boxed_text, colored
+from sst_base.motors import PrettyMotorFMBO, FlyerMixin
+from sst_base.positioners import DeadbandEpicsMotor, DeadbandMixin, PseudoSingle
+from sst_base.mirrors import FMBHexapodMirrorAxisStandAlonePitch
+from sst_hw import shutters
+from sst_hw.epu_calc import (
+    LINEAR_GAP_COEFFS,
+    CubicSplineTable,
+    Poly2D,
+    circular_gap,
+)
+from sst_hw.lut import CONFIG_PATH, get_registry
+from sst_hw.gap_tables import GapTables, HarmonicOptimizer
+from sst_hw.optics_config import Grating, OpticsConfig
+from sst_hw.ring_buffer import EventRingBuffer
+from sst_hw.gap_tracker import GapLeadTracker
+from sst_hw.batch import get_many, set_many
+from sst_hw.memo import LRUCache
+from sst_hw.trajectory import GapTrajectory
+
+import time
+from ophyd.status import DeviceStatus, SubscriptionStatus
+import threading
+
+##############################################################################################
+
+
+class UndulatorMotor(FlyerMixin,DeadbandEpicsMotor):
+    user_setpoint = Cpt(EpicsSignal, "-SP", limits=True)
+    # done = Cpt(EpicsSignalRO, ".MOVN")
+    # done_value = 0
+
+
+class EpuMode(PVPositionerPC):
+    setpoint = Cpt(EpicsSignal, "-SP", kind="config")
+    readback = Cpt(EpicsSignal, "-RB", kind="normal")
+
+
+# epu_mode = EpicsSignal(
+#    "SR:C07-ID:G1A{SST1:1-Ax:Phase}Phs:Mode-SP", name="EPU 60 Mode", kind="normal"
+# )
+class FMB_Mono_Grating_Type(PVPositioner):
+    setpoint = Cpt(EpicsSignal, "_TYPE_SP", string=True, kind="config")
+    readback = Cpt(EpicsSignal, "_TYPE_MON", string=True, kind="config")
+    actuate = Cpt(EpicsSignal, "_DCPL_CALC.PROC", kind="config")
+    enable = Cpt(EpicsSignal, "_ENA_CMD.PROC", kind="config")
+    kill = Cpt(EpicsSignal, "_KILL_CMD.PROC", kind="config")
+    home = Cpt(EpicsSignal, "_HOME_CMD.PROC", kind="config")
+    clear_encoder_loss = Cpt(EpicsSignal, "_ENC_LSS_CLR_CMD.PROC", kind="config")
+    done = Cpt(EpicsSignal, "_AXIS_STS", kind="config")
+
+
+class Monochromator(FlyerMixin,DeadbandMixin, PVPositioner):
+    setpoint = Cpt(EpicsSignal, ":ENERGY_SP", kind="config")
+    readback = Cpt(EpicsSignalRO, ":ENERGY_MON", kind="config")
+    en_mon = Cpt(EpicsSignalRO, ":READBACK2.A", name="Energy", kind="hinted")
+
+    grating = Cpt(PrettyMotorFMBO, "GrtP}Mtr", name="Mono Grating", kind="config")
+    mirror2 = Cpt(PrettyMotorFMBO, "MirP}Mtr", name="Mono Mirror", kind="config")
+    cff = Cpt(EpicsSignal, ":CFF_SP", name="Mono CFF", kind="config", auto_monitor=True)
+    vls = Cpt(
+        EpicsSignal, ":VLS_B2.A", name="Mono VLS", kind="config", auto_monitor=True
+    )
+    gratingx = Cpt(FMB_Mono_Grating_Type, "GrtX}Mtr", kind="config")
+    mirror2x = Cpt(FMB_Mono_Grating_Type, "MirX}Mtr", kind="config")
+
+    Scan_Start_ev = Cpt(
+        EpicsSignal, ":EVSTART_SP", name="MONO scan start energy", kind="config"
+    )
+    Scan_Stop_ev = Cpt(
+        EpicsSignal, ":EVSTOP_SP", name="MONO scan stop energy", kind="config"
+    )
+    Scan_Speed_ev = Cpt(
+        EpicsSignal, ":EVVELO_SP", name="MONO scan speed", kind="config"
+    )
+    Scan_Start = Cpt(
+        EpicsSignal, ":START_CMD.PROC", name="MONO scan start command", kind="config"
+    )
+    Scan_Stop = Cpt(
+        EpicsSignal,
+        ":ENERGY_ST_CMD.PROC",
+        name="MONO scan start command",
+        kind="config",
+    )
+
+    scanlock = Cpt(Signal, value=0, name="lock flag for during scans", kind="config")
+    done = Cpt(EpicsSignalRO, ":ERDY_STS", kind="config")
+    done_value = 1
+    stop_signal = Cpt(EpicsSignal, ":ENERGY_ST_CMD", kind="config")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    # def _setup_move(self, position):
+    #     """Move and do not wait until motion is complete (asynchronous)"""
+    #     self.log.debug("%s.setpoint = %s", self.name, position)
+    #     # copy from pv_positioner, with wait changed to false
+    #     # possible problem with IOC not returning from a set
+    #     self.setpoint.put(position, wait=False)
+    #     if self.actuate is not None:
+    #         self.log.debug("%s.actuate = %s", self.name, self.actuate_value)
+    #         self.actuate.put(self.actuate_value, wait=False)
+
+
+# mono_en= Monochromator('XF:07ID1-OP{Mono:PGM1-Ax:', name='Monochromator Energy',kind='normal')
+
+
+# (snapshot field, where_sp label, signal path relative to EnPos)
+SNAPSHOT_FIELDS = (
+    ("energy_setpoint", "Beamline Energy Setpoint", "monoen.setpoint"),
+    ("mono_readback", "Monochromator Readback", "monoen.readback"),
+    ("gap_setpoint", "EPU Gap Setpoint", "epugap.user_setpoint"),
+    ("gap_readback", "EPU Gap Readback", "epugap.user_readback"),
+    ("phase_setpoint", "EPU Phase Setpoint", "epuphase.user_setpoint"),
+    ("phase_readback", "EPU Phase Readback", "epuphase.user_readback"),
+    ("mode_setpoint", "EPU Mode Setpoint", "epumode.setpoint"),
+    ("mode_readback", "EPU Mode Readback", "epumode.readback"),
+    ("grating_setpoint", "Grating Setpoint", "monoen.grating.user_setpoint"),
+    ("grating_readback", "Grating Readback", "monoen.grating.user_readback"),
+    ("gratingx_setpoint", "Gratingx Setpoint", "monoen.gratingx.setpoint"),
+    ("gratingx_readback", "Gratingx Readback", "optics.grating_type"),
+    ("mirror2_setpoint", "Mirror2 Setpoint", "monoen.mirror2.user_setpoint"),
+    ("mirror2_readback", "Mirror2 Readback", "monoen.mirror2.user_readback"),
+    ("mirror2x_setpoint", "Mirror2x Setpoint", "monoen.mirror2x.setpoint"),
+    ("mirror2x_readback", "Mirror2x Readback", "optics.mirror_type"),
+    ("cff", "CFF", "monoen.cff"),
+    ("vls", "VLS", "monoen.vls"),
+)
+
+EnergySnapshot = namedtuple(
+    "EnergySnapshot",
+    [field for field, _, _ in SNAPSHOT_FIELDS] + ["time", "missing"],
+)
+
+
+class EnPos(PseudoPositioner):
+    """Energy pseudopositioner class.
+    Parameters:
+    -----------
+    """
+
+    # synthetic axis
+    energy = Cpt(PseudoSingle, kind="hinted", limits=(71, 2250), name="Beamline Energy")
+    polarization = Cpt(
+        PseudoSingle, kind="normal", limits=(-1, 180), name="X-ray Polarization"
+    )
+    sample_polarization = Cpt(
+        PseudoSingle, kind="config", name="Sample X-ray polarization"
+    )
+    # real motors
+
+    monoen = Cpt(
+        Monochromator, "XF:07ID1-OP{Mono:PGM1-Ax:", kind="config", name="Mono Energy"
+    )
+    epugap = Cpt(
+        UndulatorMotor,
+        "SR:C07-ID:G1A{SST1:1-Ax:Gap}-Mtr",
+        kind="config",
+        name="EPU Gap",
+    )
+    epuphase = Cpt(
+        UndulatorMotor,
+        "SR:C07-ID:G1A{SST1:1-Ax:Phase}-Mtr",
+        kind="config",
+        name="EPU Phase",
+    )
+    epumode = Cpt(
+        EpuMode,
+        "SR:C07-ID:G1A{SST1:1-Ax:Phase}Phs:Mode",
+        name="EPU Mode",
+        kind="config",
+    )
+
+    sim_epu_mode = Cpt(
+        Signal, value=0, name="dont interact with the real EPU", kind="config"
+    )
+    scanlock = Cpt(
+        Signal, value=0, name="Lock Harmonic, Pitch, Grating for scan", kind="config"
+    )
+    harmonic = Cpt(Signal, value=1, name="EPU Harmonic", kind="config")
+    offset_gap = Cpt(Signal, value=0, name="EPU Gap offset", kind="config")
+    use_gap_tables = Cpt(
+        Signal, value=0, name="Use measured EPU gap tables", kind="config"
+    )
+    # off by default, and only takes effect with calibrated harmonic_weights
+    optimize_harmonic = Cpt(
+        Signal,
+        value=0,
+        name="Choose harmonic from EPU flux tables, gap from the gap tables",
+        kind="config",
+    )
+    rotation_motor = None
+
+
+
+    @pseudo_position_argument
+    def forward(self, pseudo_pos):
+        """Run a forward (pseudo -> real) calculation"""
+        sim = self.sim_epu_mode.get()
+        key = None if sim else self._forward_key(pseudo_pos)
+        cached = None if key is None else self._forward_cache.get(key)
+        if cached is None:
+            epugap, harmonic = self.gap_harmonic(
+                pseudo_pos.energy,
+                pseudo_pos.polarization,
+                self.scanlock.get(),
+                sim,
+            )
+            epuphase = abs(
+                self.phase(pseudo_pos.energy, pseudo_pos.polarization, sim)
+            )
+            epumode = self.mode(pseudo_pos.polarization, sim)
+            if key is not None:
+                self._forward_cache.put(key, (epugap, epuphase, epumode, harmonic))
+        else:
+            epugap, epuphase, epumode, harmonic = cached
+        self.commit_harmonic(harmonic)
+        return self.RealPosition(
+            epugap=epugap,
+            monoen=pseudo_pos.energy,
+            epuphase=epuphase,
+            epumode=epumode,
+        )
+
+    @real_position_argument
+    def inverse(self, real_pos):
+        """Run an inverse (real -> pseudo) calculation"""
+        key = self._inverse_key(real_pos)
+        cached = None if key is None else self._inverse_cache.get(key)
+        if cached is None:
+            pol = self.pol(real_pos.epuphase, real_pos.epumode)
+            cached = (pol, self.sample_pol(pol))
+            if key is not None:
+                self._inverse_cache.put(key, cached)
+        pol, sample_pol = cached
+        return self.PseudoPosition(
+            energy=real_pos.monoen,
+            polarization=pol,
+            sample_polarization=sample_pol,
+        )
+
+    def _check_cache_generation(self):
+        if self._cache_generation != self._luts.generation:
+            self.clear_caches()
+
+    def _forward_key(self, pseudo_pos):
+        """
+        Everything the forward calculation depends on, with the energy and
+        polarization quantized, or None if it cannot be cached
+        """
+        self._check_cache_generation()
+        try:
+            return (
+                round(pseudo_pos.energy / self._cache_energy_step),
+                round(pseudo_pos.polarization / self._cache_pol_step),
+                self.harmonic.get(),
+                self.offset_gap.get(),
+                bool(self.scanlock.get()),
+                bool(self.use_gap_tables.get()),
+                self._optimizing_harmonic(),
+                self.gap_tables.grating,
+            )
+        except (TypeError, ValueError, OverflowError):
+            # nan or non-numeric positions
+            return None
+
+    def _inverse_key(self, real_pos):
+        self._check_cache_generation()
+        try:
+            return (
+                round(real_pos.epuphase / self._cache_phase_step),
+                real_pos.epumode,
+                round(
+                    self.rotation_motor.user_setpoint.get() / self._cache_pol_step
+                ),
+            )
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            return None
+
+    def clear_caches(self, *args, **kwargs):
+        """Forget every cached forward and inverse calculation"""
+        self._forward_cache.clear()
+        self._inverse_cache.clear()
+        self._cache_generation = self._luts.generation
+
+    def cache_info(self):
+        """Hit/miss counts and sizes of the forward and inverse caches"""
+        return {
+            "forward": self._forward_cache.info(),
+            "inverse": self._inverse_cache.info(),
+        }
+
+    def forward_many(self, energies, pols, locked=None):
+        """
+        Vectorized forward calculation for whole trajectories
+
+        Nothing is written to any signal, so this is safe to use for plan
+        previews and scan planning.
+
+        @param energies: array of beamline energies
+        @param pols: array of polarizations (or a single polarization)
+        @param locked: keep the current harmonic, defaults to scanlock
+        @return: RealPosition whose fields are numpy arrays
+        """
+        energies, pols = np.broadcast_arrays(
+            np.asarray(energies, dtype=float), np.asarray(pols, dtype=float)
+        )
+        if locked is None:
+            locked = self.scanlock.get()
+        sim = self.sim_epu_mode.get()
+        if sim:
+            gaps = np.full(energies.shape, self.epugap.get(), dtype=float)
+            phases = np.full(energies.shape, abs(self.epuphase.get()), dtype=float)
+            modes = np.full(energies.shape, self.epumode.get())
+        else:
+            harmonics = self.choose_harmonic(energies, pols, locked)
+            gaps = self.gap_many(energies, pols, harmonics)
+            phases = np.abs(self.phase_many(pols))
+            modes = self.mode_many(pols)
+        return self.RealPosition(
+            epugap=gaps, monoen=energies.copy(), epuphase=phases, epumode=modes
+        )
+
+    def inverse_many(self, gaps, phases, modes, monoens=None):
+        """
+        Vectorized inverse calculation for whole trajectories
+
+        @param gaps: array of EPU gaps (not needed for the calculation)
+        @param phases: array of EPU phases
+        @param modes: array of EPU modes
+        @param monoens: array of mono energies, defaults to the current readback
+        @return: PseudoPosition whose fields are numpy arrays
+        """
+        gaps, phases, modes = np.broadcast_arrays(
+            np.asarray(gaps, dtype=float),
+            np.asarray(phases, dtype=float),
+            np.asarray(modes),
+        )
+        if monoens is None:
+            monoens = self.monoen.readback.get()
+        energies = np.broadcast_to(np.asarray(monoens, dtype=float), gaps.shape)
+        pols = self.pol_many(phases, modes)
+        return self.PseudoPosition(
+            energy=energies.copy(),
+            polarization=pols,
+            sample_polarization=self.sample_pol(pols),
+        )
+
+    def snapshot(self, timeout=2.0):
+        """
+        Read every setpoint and readback shown by where_sp at once
+
+        @param timeout: seconds to wait for all of the reads together
+        @return: EnergySnapshot, with None for any value that could not be
+                 read and the names of those fields in .missing
+        """
+        signals = [
+            functools.reduce(getattr, path.split("."), self)
+            for _, _, path in SNAPSHOT_FIELDS
+        ]
+        values, failures = get_many(signals, timeout=timeout)
+        missing = tuple(SNAPSHOT_FIELDS[n][0] for n in sorted(failures))
+        for n, err in failures.items():
+            self.log.warning("Could not read %s: %s", signals[n].name, err)
+        return EnergySnapshot(*values, time=time.time(), missing=missing)
+
+    @staticmethod
+    def _format_value(value):
+        if value is None:
+            return "unavailable"
+        if isinstance(value, str):
+            return value
+        return "{:.2f}".format(value).rstrip("0").rstrip(".")
+
+    def where_sp(self, snapshot=None):
+        if snapshot is None:
+            snapshot = self.snapshot()
+        return "\n".join(
+            "{} : {}".format(label, colored(self._format_value(value), "yellow"))
+            for (_, label, _), value in zip(SNAPSHOT_FIELDS, snapshot)
+        )
+
+    def where(self, snapshot=None):
+        if snapshot is None:
+            energy = self.monoen.readback.get()
+        else:
+            energy = snapshot.mono_readback
+        return (
+            "Beamline Energy : {}\nPolarization : {}\nSample Polarization : {}"
+        ).format(
+            colored(self._format_value(energy), "yellow"),
+            colored(self._format_value(self.polarization.readback.get()), "yellow"),
+            colored(
+                self._format_value(self.sample_polarization.readback.get()),
+                "yellow",
+            ),
+        )
+
+    def wh(self):
+        boxed_text(self.name + " location", self.where_sp(), "green", shrink=True)
+
+
+    def preflight(
+        self,
+        start,
+        stop,
+        speed,
+        *args,
+        locked=True,
+        time_resolution=None,
+        capture=None,
+        trajectory=False,
+        trajectory_step=None,
+    ):
+        """
+        Set up a fly scan from start to stop at speed, with optional further
+        (start, stop, speed) segments in args
+
+        capture is "monitor" to record every mono readback update as it
+        arrives, or "poll" to read it every time_resolution seconds
+
+        With trajectory, the gap for every energy the segments cover is
+        calculated here, on a grid of trajectory_step eV (default
+        _flyer_lag_ev), and the gap follows the mono by table lookup
+        instead of recalculating it for each readback.
+        """
+        self._set_scan_parameters(start, stop, speed)
+        if len(args) > 0:
+            if len(args) % 3 != 0:
+                raise ValueError("args must be start2, stop2, speed2[, start3, stop3, speed3, ...] and must be a multiple of 3")
+            else:
+                self.flight_segments = ((args[3*n], args[3*n + 1], args[3*n + 2]) for n in range(len(args)//3))
+        else:
+            self.flight_segments = iter(())
+        segments = [(start, stop, speed)] + [
+            args[3 * n : 3 * n + 3] for n in range(len(args) // 3)
+        ]
+        self._flyer_duration = sum(
+            abs(seg_stop - seg_start) / abs(seg_speed)
+            for seg_start, seg_stop, seg_speed in segments
+            if seg_speed
+        )
+
+        self._flyer_pol = self.polarization.setpoint.get()
+        if trajectory:
+            step = trajectory_step or self._flyer_lag_ev
+            self._flyer_trajectory = GapTrajectory.from_segments(
+                segments,
+                step,
+                self._gap_tracker.max_lead + abs(self._flyer_gap_lead) + step,
+                self._trajectory_gaps,
+            )
+        else:
+            self._flyer_trajectory = None
+        self._trajectory_index = None
+
+        if time_resolution is not None:
+            self._time_resolution = time_resolution
+        elif self._time_resolution is None:
+            self._time_resolution = self._default_time_resolution
+        if capture is None:
+            capture = self._default_flyer_capture
+        if capture not in ("monitor", "poll"):
+            raise ValueError("capture must be 'monitor' or 'poll'")
+        self._flyer_capture = capture
+
+        self.energy.set(start + 10).wait()
+        self.energy.set(start + 10).wait()
+        if locked:
+            self.scanlock.set(True).wait()
+        self.energy.set(start).wait()
+        self.energy.set(start).wait()
+        self._last_mono_value = start
+        self._mono_stop = stop
+        self._gap_tracker.reset()
+        self._gap_tracker.start_segment(start, stop, speed)
+        self._ready_to_fly = True
+
+    def fly(self):
+        """
+        Should be called after all detectors start flying, so that we don't lose data
+        """
+        if not self._ready_to_fly:
+            self._fly_move_st = DeviceStatus(device=self)
+            self._fly_move_st.set_exception(RuntimeError)
+        else:
+            def check_value(*, old_value, value, **kwargs):
+                if (old_value != 1 and value == 1):
+                    try:
+                        segment = next(self.flight_segments)
+                    except StopIteration:
+                        return True
+                    # don't block the CA callback thread on the PV writes
+                    threading.Thread(
+                        target=self._start_next_segment,
+                        args=(segment, time.monotonic()),
+                        daemon=True,
+                    ).start()
+                    return False
+                else:
+                    return False
+
+            self._segment_dead_times = []
+
+            self._fly_move_st = SubscriptionStatus(self.monoen.done, check_value, run=False)
+            self.monoen.Scan_Start.set(1)
+            self._flying = True
+            self._ready_to_fly = False
+        return self._fly_move_st
+
+    def _set_scan_parameters(self, start, stop, speed):
+        # the three writes are independent, but the IOC may clamp one against
+        # the old value of another, so they go out together twice
+        for _ in range(2):
+            set_many(
+                [
+                    (self.monoen.Scan_Start_ev, start),
+                    (self.monoen.Scan_Stop_ev, stop),
+                    (self.monoen.Scan_Speed_ev, speed),
+                ]
+            ).wait()
+
+    def _start_next_segment(self, segment, segment_done_time):
+        start, stop, speed = segment
+        try:
+            self._gap_tracker.start_segment(start, stop, speed)
+            self._set_scan_parameters(start, stop, speed)
+            self.monoen.Scan_Start.set(1)
+        except Exception as exc:
+            self._fly_move_st.set_exception(exc)
+            return
+        self._segment_dead_times.append(time.monotonic() - segment_done_time)
+
+    @property
+    def segment_dead_times(self):
+        """time from the end of each fly segment to the next start command (s)"""
+        return list(self._segment_dead_times)
+
+    def land(self):
+        if self._fly_move_st.done:
+            self._flying = False
+            self._time_resolution = self._default_time_resolution
+            self.scanlock.set(False).wait()
+
+    def _flyer_capacity(self):
+        # preallocate twice the expected number of samples; the buffer grows
+        # if the mono runs slower than commanded, so none are ever dropped
+        if self._flyer_capture == "monitor":
+            period = self._flyer_monitor_period
+        else:
+            period = self._time_resolution
+        samples = 2 * self._flyer_duration / period
+        return int(min(max(samples + 1024, 4096), self._flyer_max_samples))
+
+    def kickoff(self):
+        kickoff_st = DeviceStatus(device=self)
+        self._measuring = True
+        self._flyer_buffer = EventRingBuffer(self._flyer_capacity())
+        if self._flyer_capture == "monitor":
+            self._flyer_sub = self.monoen.readback.subscribe(
+                self._capture_readback, run=False
+            )
+        else:
+            threading.Thread(target=self._aggregate, daemon=True).start()
+        kickoff_st.set_finished()
+        return kickoff_st
+
+    def _aggregate(self):
+        while self._measuring:
+            rb = self.monoen.readback.read()
+            t = time.time()
+            value = rb[self.monoen.readback.name]['value']
+            ts = rb[self.monoen.readback.name]['timestamp']
+            self._flyer_buffer.append(t, value, ts)
+            self._track_gap(value, ts)
+            time.sleep(self._time_resolution)
+        return
+
+    def _capture_readback(self, *, value, timestamp, **kwargs):
+        # monitor callback on the mono readback, runs once per IOC update
+        if not self._measuring:
+            return
+        self._flyer_buffer.append(time.time(), value, timestamp)
+        self._track_gap(value, timestamp)
+
+    def _trajectory_gaps(self, energies):
+        harmonics = self.choose_harmonic(energies, self._flyer_pol, False)
+        gaps = self.gap_many(energies, self._flyer_pol, harmonics)
+        if not np.all(np.isfinite(gaps)):
+            raise ValueError(
+                "no EPU gap for polarization {} over {} to {} eV".format(
+                    self._flyer_pol, energies[0], energies[-1]
+                )
+            )
+        return gaps, harmonics
+
+    def _track_gap(self, value, timestamp):
+        self._gap_tracker.add_sample(timestamp, value)
+        trajectory = self._flyer_trajectory
+        if trajectory is None:
+            if abs(self._last_mono_value - value) <= self._flyer_lag_ev:
+                return
+            self._last_mono_value = value
+        if self._flyer_adaptive_lead:
+            # lead the mono by as far as it will move while the gap responds
+            target = self._gap_tracker.predict() + self._flyer_gap_lead
+        else:
+            target = value + self._flyer_gap_lead
+        if trajectory is None:
+            gap, harmonic = self.gap_harmonic(target, self._flyer_pol, False)
+        else:
+            found = trajectory.follow(target, self._trajectory_index)
+            if found is None:
+                return
+            self._trajectory_index, gap, harmonic = found
+        st = self.epugap.set(gap)
+        self.commit_harmonic(harmonic)
+        self._gap_tracker.gap_moved(st, target)
+
+    def collect(self):
+        name = 'energy_readback'
+        # event dicts are only built as the caller consumes them
+        for t, value, ts in self._flyer_buffer.drain().tolist():
+            yield {'time': t, 'data': {name: value}, 'timestamps': {name: ts}}
+
+    def collect_pages(self):
+        name = 'energy_readback'
+        rows = self._flyer_buffer.drain()
+        if len(rows):
+            yield {
+                'time': rows[:, 0].tolist(),
+                'data': {name: rows[:, 1].tolist()},
+                'timestamps': {name: rows[:, 2].tolist()},
+            }
+
+    def complete(self):
+        if self._measuring:
+            self._measuring = False
+        if self._flyer_sub is not None:
+            self.monoen.readback.unsubscribe(self._flyer_sub)
+            self._flyer_sub = None
+        self._gap_tracker.finish_segment()
+        if self._segment_dead_times:
+            self.log.info(
+                "%s fly segment dead times (s): %s, total %.3f s",
+                self.name,
+                ", ".join("{:.3f}".format(t) for t in self._segment_dead_times),
+                sum(self._segment_dead_times),
+            )
+        for seg in self._gap_tracker.segments:
+            self.log.info(
+                "%s gap tracking, segment %d (%s to %s eV at %s eV/s): "
+                "rms error %.3f eV, max error %.3f eV over %d gap moves",
+                self.name,
+                seg["segment"],
+                seg["start"],
+                seg["stop"],
+                seg["speed"],
+                seg["rms_error_ev"],
+                seg["max_error_ev"],
+                seg["moves"],
+            )
+        completion_status = DeviceStatus(self)
+        completion_status.set_finished()
+        self._time_resolution = None
+        return completion_status
+
+    def describe_collect(self):
+        dd = dict({"energy_readback": {'source': self.monoen.readback.pvname, 'dtype': 'number', 'shape': []}})
+        return {"energy_readback_monitor": dd}
+
+    @property
+    def gap_tracking(self):
+        """per-segment EPU gap tracking error from the last fly scan"""
+        return list(self._gap_tracker.segments)
+
+
+    # end class methods, begin internal methods
+
+    # begin LUT Functions
+
+    def __init__(
+        self,
+        a,
+        rotation_motor=None,
+        configpath=CONFIG_PATH,
+        harmonic_weights=None,
+        **kwargs,
+    ):
+        self.gap_fitnew = LINEAR_GAP_COEFFS
+        self._gap_poly = Poly2D(self.gap_fitnew)
+        
+
+        # values for the minimum energy as a function of angle polynomial 10th deg
+        # 80.934 ± 0.0698
+        # -0.91614 ± 0.0446
+        # 0.39635 ± 0.00925
+        # -0.020478 ± 0.000881
+        # 0.00069047 ± 4.54e-05
+        # -1.5413e-05 ± 1.37e-06
+        # 2.1448e-07 ± 2.49e-08
+        # -1.788e-09 ± 2.68e-10
+        # 8.162e-12 ± 1.57e-12
+        # -1.5545e-14 ± 3.88e-15
+
+        self._luts = get_registry(configpath)
+        polphase = self._luts.get("polphase")
+        # cubic splines fitted once, same as polphase/phasepol.interp(method="cubic")
+        self._phase_spline = CubicSplineTable(polphase.coords["pol"], polphase.values)
+        self._pol_spline = CubicSplineTable(polphase.values, polphase.coords["pol"])
+        self.gap_tables = GapTables(self._luts)
+        # {harmonic: weight} measured for the flux tables, see HarmonicOptimizer
+        self.harmonic_optimizer = HarmonicOptimizer(
+            self.gap_tables, weights=harmonic_weights
+        )
+        self.rotation_motor = rotation_motor
+        # forward/inverse results, keyed on positions rounded to these steps
+        self._cache_energy_step = 1e-4
+        self._cache_pol_step = 1e-4
+        self._cache_phase_step = 1e-2
+        self._forward_cache = LRUCache(4096)
+        self._inverse_cache = LRUCache(4096)
+        self._cache_generation = self._luts.generation
+        super().__init__(a, **kwargs)
+        self.epugap.tolerance.set(3).wait()
+        self.epuphase.tolerance.set(10).wait()
+        #self.mir3Pitch.tolerance.set(0.01)
+        self.monoen.tolerance.set(0.01).wait()
+        # which grating and mirror stripe are in, read once and then cached
+        self.optics = OpticsConfig(
+            self.monoen.gratingx.readback,
+            self.monoen.mirror2x.readback,
+            name=self.name + "_optics",
+        )
+        self.optics.grating.subscribe(self.gap_tables.update_grating)
+        self.offset_gap.subscribe(self.clear_caches, run=False)
+        self.optimize_harmonic.subscribe(self._check_optimize_harmonic, run=False)
+        self._ready_to_fly = False
+        self._fly_move_st = None
+        self._default_time_resolution = 0.05
+        self._flyer_lag_ev = 0.1
+        self._flyer_gap_lead = 0.0
+        self._flyer_duration = 0
+        # largest flyer buffer preallocated at kickoff
+        self._flyer_max_samples = 2 ** 22
+        self._flyer_buffer = EventRingBuffer(1)
+        self._default_flyer_capture = "monitor"
+        self._flyer_capture = self._default_flyer_capture
+        # shortest expected interval between mono readback updates
+        self._flyer_monitor_period = 0.005
+        self._flyer_sub = None
+        self._gap_tracker = GapLeadTracker()
+        self._flyer_adaptive_lead = True
+        self._segment_dead_times = []
+        self._flyer_trajectory = None
+        self._trajectory_index = None
+        self._time_resolution = None
+        self._flying = False
+    """
+    def stage(self):
+        if self.scanlock.get():
+            self.epuphase.tolerance.set(10)
+        super().stage()
+
+    def unstage(self):
+        self.epuphase.tolerance.set(0)
+        super().unstage()
+    """
+
+    @property
+    def polphase(self):
+        """polphase.nc as an xarray DataArray, only built if asked for"""
+        return self._luts.dataarray("polphase")
+
+    @property
+    def phasepol(self):
+        import xarray as xr
+
+        polphase = self.polphase
+        return xr.DataArray(
+            data=polphase.pol,
+            coords={"phase": polphase.values},
+            dims={"phase"},
+        )
+
+    def gap(self, energy, pol, locked, sim=0):
+        """
+        gap for energy and pol, updating the harmonic signal to the harmonic
+        it was calculated for
+        """
+        gap, harmonic = self.gap_harmonic(energy, pol, locked, sim)
+        self.commit_harmonic(harmonic)
+        return gap
+
+    def commit_harmonic(self, harmonic):
+        """Write harmonic to the harmonic signal, only if it has changed"""
+        if harmonic != self.harmonic.get():
+            self.harmonic.set(harmonic).wait()
+
+    def gap_harmonic(self, energy, pol, locked, sim=0):
+        """
+        calculate the gap without writing to any signal
+        @param energy: photon energy
+        @param pol: polarization
+        @param locked: keep the current harmonic
+        @param sim: simulated EPU mode, the gap stays where it is
+        @return: (gap in microns, harmonic it was calculated for)
+        """
+        if sim:
+            return (
+                self.epugap.get(),
+                self.harmonic.get(),
+            )  # never move the gap if we are in simulated gap mode
+            # this might cause problems if someone else is moving the gap, we might move it back
+            # but I think this is not a common reason for this mode
+
+        harmonic = self.choose_harmonic(energy, pol, locked)
+        return self._gap_for_harmonic(energy / harmonic, pol), harmonic
+
+    def _gap_for_harmonic(self, energy, pol):
+        # energy is the fundamental, energy / harmonic.  With gap tables on,
+        # a measured gap wins over the fits; see sst_hw.gap_tables
+        if self._use_gap_tables() and (pol in (-1, -0.5) or 0 <= pol <= 180):
+            gap = self.gap_tables.lookup(energy, self.phase(energy, pol), self.mode(pol))
+            if np.isfinite(gap):
+                return max(14000.0, min(100000.0, gap)) + self.offset_gap.get()
+            # no measured value here, fall back to the polynomial fits
+
+        if (pol == -1) or (pol == -0.5):
+            gap = circular_gap(energy)
+            return max(14000.0, min(100000.0, gap)) + self.offset_gap.get()
+        elif 0 <= pol <= 90:
+            return (
+                max(14000.0, min(100000.0, self.epu_gap(energy, pol)))
+                + self.offset_gap.get()
+            )
+        elif 90 < pol <= 180:
+            return (
+                max(14000.0, min(100000.0, self.epu_gap(energy, 180.0 - pol)))
+                + self.offset_gap.get()
+            )
+        else:
+            return np.nan
+    
+    def epu_gap(self, en, pol ):
+        """
+        calculate the epu gap from the energy and polarization, using a 2D polynomial fit
+        @param en: energy (valid between ~70 and 1300
+        @param pol: polarization (valid between 0 and 90)
+        @return: gap in microns
+
+        en and pol may be scalars or broadcastable numpy arrays
+        """
+        if np.ndim(pol) == 0:
+            x = float(self.phase(en, pol))
+        else:
+            pol = np.asarray(pol, dtype=float)
+            x = np.clip(self._phase_spline(pol), 0.0, 29500.0)
+        return self._gap_poly(x, en)
+
+    def phase(self, en, pol, sim=0):
+        if sim:
+            return (
+                self.epuphase.get()
+            )  # never move the gap if we are in simulated gap mode
+            # this might cause problems if someone else is moving the gap, we might move it back
+            # but I think this is not a common reason for this mode
+        if pol == -1:
+            return 15000
+        elif pol == -0.5:
+            return 15000
+        elif 90 < pol <= 180:
+            return -min(29500.0, max(0.0, self._phase_spline(180 - pol)))
+        else:
+            return min(29500.0, max(0.0, self._phase_spline(pol)))
+
+    def pol(self, phase, mode):
+        if mode == 0:
+            return -1
+        elif mode == 1:
+            return -0.5
+        elif mode == 2:
+            return self._pol_spline(abs(phase))
+        elif mode == 3:
+            return 180 - self._pol_spline(abs(phase))
+
+    def mode(self, pol, sim=0):
+        """
+        @param pol:
+        @return:
+        """
+        if sim:
+            return (
+                self.epumode.get()
+            )  # never move the gap if we are in simulated gap mode
+            # this might cause problems if someone else is moving the gap, we might move it back
+            # but I think this is not a common reason for this mode
+        if pol == -1:
+            return 0
+        elif pol == -0.5:
+            return 1
+        elif 90 < pol <= 180:
+            return 3
+        else:
+            return 2
+
+    def sample_pol(self, pol):
+        th = self.rotation_motor.user_setpoint.get()
+        return (
+            np.arccos(np.cos(pol * np.pi / 180) * np.sin(th * np.pi / 180))
+            * 180
+            / np.pi
+        )
+
+    def _use_gap_tables(self):
+        # the optimizer can choose harmonic 1 past the range of the polynomial
+        # fits (e.g. circular up to ~1400 eV), so its gaps come from the tables
+        return bool(self.use_gap_tables.get() or self._optimizing_harmonic())
+
+    def _optimizing_harmonic(self):
+        # uncalibrated weights overstate the higher harmonics, see
+        # HarmonicOptimizer, so they never choose the harmonic
+        return bool(
+            self.optimize_harmonic.get() and self.harmonic_optimizer.calibrated
+        )
+
+    def _check_optimize_harmonic(self, value, **kwargs):
+        if value and not self.harmonic_optimizer.calibrated:
+            self.log.warning(
+                "%s: optimize_harmonic needs harmonic_weights calibrated for "
+                "harmonics %s, keeping the fixed harmonic rule",
+                self.name,
+                self.harmonic_optimizer.harmonics,
+            )
+            self.optimize_harmonic.put(0)
+
+    def choose_harmonic(self, energy, pol, locked):
+        if locked:
+            return self.harmonic.get()
+        elif self._optimizing_harmonic():
+            best = self.best_harmonic(energy, pol)
+            # keep the fixed rule wherever there is no tabulated flux
+            rule = np.where(np.asarray(energy) < 1200, 1, 3)
+            harmonic = np.where(best > 0, best, rule)
+            return int(harmonic) if np.ndim(harmonic) == 0 else harmonic
+        elif np.ndim(energy) > 0:
+            return np.where(np.asarray(energy) < 1200, 1, 3)
+        elif energy < 1200:
+            return 1
+        else:
+            return 3
+
+    def best_harmonic(self, energy, pol):
+        """
+        harmonic with the highest tabulated flux from the EPU_*_intens tables,
+        among those with a tabulated gap
+        @return: harmonic (or array of harmonics), 0 where nothing is tabulated
+        """
+        if np.ndim(energy) == 0 and np.ndim(pol) == 0:
+            if not (pol in (-1, -0.5) or 0 <= pol <= 180):
+                return 0
+            harmonic, gap = self.harmonic_optimizer.best(
+                energy, self.phase(energy, pol), self.mode(pol)
+            )
+            return harmonic if np.isfinite(gap) else 0
+        energy, pol = np.broadcast_arrays(
+            np.asarray(energy, dtype=float), np.asarray(pol, dtype=float)
+        )
+        harmonics = np.zeros(energy.shape, dtype=int)
+        phases = self.phase_many(pol)
+        circ = (pol == -1) | (pol == -0.5)
+        lin = (0 <= pol) & (pol <= 180) & ~circ
+        for mask, mode in [(circ, 0), (lin, 2)]:
+            if mask.any():
+                best, gaps = self.harmonic_optimizer.best(
+                    energy[mask], phases[mask], mode
+                )
+                harmonics[mask] = np.where(np.isfinite(gaps), best, 0)
+        return harmonics
+
+    # vectorized versions of the LUT functions, used for trajectory planning
+
+    def gap_many(self, energies, pols, harmonics):
+        """
+        @param energies: array of beamline energies
+        @param pols: array of polarizations
+        @param harmonics: harmonic (or array of harmonics) to use
+        @return: array of gaps, nan where the polarization is invalid
+        """
+        energies, pols, harmonics = np.broadcast_arrays(
+            np.asarray(energies, dtype=float),
+            np.asarray(pols, dtype=float),
+            np.asarray(harmonics, dtype=float),
+        )
+        fundamental = energies / harmonics
+        gaps = np.full(energies.shape, np.nan)
+        circ = (pols == -1) | (pols == -0.5)
+        lin = (0 <= pols) & (pols <= 90)
+        lin_rev = (90 < pols) & (pols <= 180)
+        gaps[circ] = circular_gap(fundamental[circ])
+        if lin.any():
+            gaps[lin] = self.epu_gap(fundamental[lin], pols[lin])
+        if lin_rev.any():
+            gaps[lin_rev] = self.epu_gap(fundamental[lin_rev], 180.0 - pols[lin_rev])
+        if self._use_gap_tables():
+            phases = self.phase_many(pols)
+            for mask, mode in [(circ, 0), (lin | lin_rev, 2)]:
+                if mask.any():
+                    table = self.gap_tables.lookup(fundamental[mask], phases[mask], mode)
+                    gaps[mask] = np.where(np.isfinite(table), table, gaps[mask])
+        valid = circ | lin | lin_rev
+        gaps[valid] = np.clip(gaps[valid], 14000.0, 100000.0) + self.offset_gap.get()
+        return gaps
+
+    def phase_many(self, pols):
+        pols = np.asarray(pols, dtype=float)
+        phases = np.full(pols.shape, 15000.0)
+        lin = ~((pols == -1) | (pols == -0.5))
+        rev = lin & (90 < pols) & (pols <= 180)
+        folded = np.where(rev, 180 - pols, pols)[lin]
+        if folded.size:
+            phases[lin] = np.clip(self._phase_spline(folded), 0.0, 29500.0)
+        phases[rev] *= -1
+        return phases
+
+    def mode_many(self, pols):
+        pols = np.asarray(pols, dtype=float)
+        return np.select(
+            [pols == -1, pols == -0.5, (90 < pols) & (pols <= 180)], [0, 1, 3], 2
+        )
+
+    def pol_many(self, phases, modes):
+        phases, modes = np.broadcast_arrays(
+            np.asarray(phases, dtype=float), np.asarray(modes)
+        )
+        pols = np.full(phases.shape, np.nan)
+        pols[modes == 0] = -1
+        pols[modes == 1] = -0.5
+        lin = (modes == 2) | (modes == 3)
+        if lin.any():
+            pols[lin] = self._pol_spline(np.abs(phases[lin]))
+        pols[modes == 3] = 180 - pols[modes == 3]
+        return pols
+
+
+def base_set_polarization(pol, en):
+    yield from bps.mv(en.polarization, pol)
+    return 0
+
+
+def base_grating_to_250(mono_en, en):
+    if en.optics.at_grating(Grating.G250):
+        print("the grating is already at 250 l/mm")
+        return 0  # the grating is already here
+    print("Moving the grating to 250 l/mm.  This will take a minute...")
+    yield from shutters.psh4.close()
+    yield from bps.abs_set(mono_en.gratingx, 2, wait=True)
+    # yield from bps.sleep(60)
+    # yield from bps.mv(mirror2.user_offset, 0.04) #0.0315)
+    # yield from bps.mv(grating.user_offset, -0.0874)#-0.0959)
+    # yield from bps.mv(en.m3offset, 7.90)
+    yield from bps.mv(mono_en.cff, 1.385)
+    yield from bps.mv(en, 270)
+    yield from shutters.psh4.open()
+    print("the grating is now at 250 l/mm signifigant higher order")
+    return 1
+
+
+def base_grating_to_1200(mono_en, en):
+    if en.optics.at_grating(Grating.G1200):
+        print("the grating is already at 1200 l/mm")
+        return 0  # the grating is already here
+    print("Moving the grating to 1200 l/mm.  This will take a minute...")
+    yield from shutters.psh4.close()
+    yield from bps.abs_set(mono_en.gratingx, 9, wait=True)
+    # yield from bps.sleep(60)
+    # yield from bps.mv(mirror2.user_offset, 0.2044) #0.1962) #0.2052) # 0.1745)  # 8.1264)
+    # yield from bps.mv(grating.user_offset, 0.0769) #0.0687) # 0.0777) # 0.047)  # 7.2964)  # 7.2948)#7.2956
+    yield from bps.mv(mono_en.cff, 1.7)
+    # yield from bps.mv(en.m3offset, 7.791)
+    yield from bps.mv(en, 270)
+    yield from shutters.psh4.open()
+    print("the grating is now at 1200 l/mm")
+    return 1
+
+
+def base_grating_to_rsoxs(mono_en, en):
+    if en.optics.at_grating(Grating.RSOXS):
+        print("the grating is already at RSoXS")
+        return 0  # the grating is already here
+    print("Moving the grating to RSoXS 250 l/mm.  This will take a minute...")
+    yield from shutters.psh4.close()
+    yield from bps.abs_set(mono_en.gratingx, 10, wait=True)
+    # yield from bps.sleep(60)
+    # yield from bps.mv(mirror2.user_offset, 0.2044) #0.1962) #0.2052) # 0.1745)  # 8.1264)
+    # yield from bps.mv(grating.user_offset, 0.0769) #0.0687) # 0.0777) # 0.047)  # 7.2964)  # 7.2948)#7.2956
+    # yield from bps.mv(mono_en.cff, 1.7)
+    # yield from bps.mv(en.m3offset, 7.87)
+    yield from bps.mv(en, 270)
+    yield from shutters.psh4.open()
+    print("the grating is now at RSoXS 250 l/mm with low higher order")
+    return 1
+
@@ -0,0 +1,265 @@
+"""
+Pure numerical helpers for the SST-1 EPU60 energy calculations.
+
+Nothing in here talks to EPICS, so these can be used for trajectory planning
+and benchmarking without a live beamline.
+"""
+from bisect import bisect_right
+
+import numpy as np
+
+
+# 2D polynomial fit of the linear-mode EPU gap (microns).  Row j holds the
+# coefficients of phase**j, column i the coefficients of energy**i.
+LINEAR_GAP_COEFFS = np.array(
+    [
+        [
+            -2.02817540e+03, 3.02264723e+02, -1.78252111e+00,
+            7.43668353e-03, -1.91232012e-05, 2.51973358e-08,
+            4.79962799e-12, -8.29186995e-14, 1.57617047e-16,
+            -1.59186547e-19, 9.43016130e-23, -3.09532281e-26,
+            4.36145287e-30,
+        ],
+        [
+            4.03257973e-01, -1.16153798e-02, 1.42259540e-04,
+            -9.21569724e-07, 3.64833617e-09, -9.41596905e-12,
+            1.63464324e-14, -1.92640661e-17, 1.52209377e-20,
+            -7.72874330e-24, 2.28187017e-27, -2.98088495e-31,
+            0.00000000e+00,
+        ],
+        [
+            4.56475603e-05, -4.07999403e-07, 1.18075497e-09,
+            -2.87363757e-12, 3.75535610e-15, 3.29862492e-18,
+            -1.94014184e-20, 2.74619195e-23, -1.83395988e-26,
+            5.77828602e-30, -6.21442519e-34, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            -5.25493975e-08, 9.13848518e-11, -8.89125498e-14,
+            -7.70071244e-17, 1.56845096e-19, 2.27044971e-22,
+            -3.84069721e-25, 1.07113860e-28, 6.45500669e-32,
+            -3.56486225e-35, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            1.69412943e-11, -1.72741103e-14, 2.32736978e-17,
+            -1.27270356e-20, -2.28179895e-23, 1.64992858e-26,
+            5.41608428e-30, -6.86000848e-33, 2.31195976e-36,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            -3.28740709e-15, 1.72993353e-18, -1.95111611e-21,
+            2.04503884e-24, 1.86619961e-28, -8.41281283e-31,
+            1.99741076e-34, -6.65135708e-38, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            4.12832071e-19, -1.08634915e-22, 9.38953584e-26,
+            -9.25160150e-29, 2.47681044e-32, 1.24161680e-35,
+            1.18873213e-39, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            -3.46595227e-23, 3.42794252e-27, -3.81112396e-30,
+            1.81952044e-33, -8.72888305e-37, -1.72881705e-40,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            1.97641466e-27, 2.15621764e-32, 1.26835147e-34,
+            -8.69314807e-39, 1.16321066e-41, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            -7.55639549e-32, -5.20717157e-36, -2.61944925e-39,
+            -1.53939901e-43, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            1.84709041e-36, 1.46245833e-40, 2.35251768e-44,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            -2.59793922e-41, -1.36029553e-45, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+        [
+            1.59420902e-46, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00, 0.00000000e+00, 0.00000000e+00,
+            0.00000000e+00,
+        ],
+    ]
+)
+
+
+class Poly2D:
+    """
+    A 2D polynomial ``sum(coeffs[j, i] * x**j * y**i)`` compiled for
+    repeated evaluation with nested Horner's rule.
+
+    Trailing zero coefficients of each row are dropped once at construction,
+    so the triangular fits used here only cost the terms they actually have.
+    Accepts scalars or broadcastable numpy arrays for ``x`` and ``y``.
+    """
+
+    def __init__(self, coeffs):
+        coeffs = np.asarray(coeffs, dtype=float)
+        if coeffs.ndim != 2:
+            raise ValueError("coeffs must be a 2D array")
+        self.coeffs = coeffs
+        rows = []
+        for row in coeffs:
+            nonzero = np.flatnonzero(row)
+            rows.append(tuple(row[: nonzero[-1] + 1]) if len(nonzero) else (0.0,))
+        while len(rows) > 1 and rows[-1] == (0.0,):
+            rows.pop()
+        self._rows = tuple(tuple(reversed(row)) for row in reversed(rows))
+
+    def __call__(self, x, y):
+        scalar = np.ndim(x) == 0 and np.ndim(y) == 0
+        if scalar:
+            x = float(x)
+            y = float(y)
+        else:
+            x, y = np.broadcast_arrays(
+                np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+            )
+        z = 0.0
+        for row in self._rows:
+            # inner Horner in y for this power of x
+            p = 0.0
+            for c in row:
+                p = p * y + c
+            z = z * x + p
+        return z
+
+
+# 9th order polynomial fit of the circular-mode EPU gap (microns) against the
+# fundamental energy, lowest order first.
+CIRCULAR_GAP_COEFFS = np.array(
+    [
+        6202.6,
+        74.094,
+        0.14654,
+        -0.001609,
+        5.443e-06,
+        -1.0023e-08,
+        1.1005e-11,
+        -7.1779e-15,
+        2.5652e-18,
+        -3.86e-22,
+    ]
+)
+
+
+def circular_gap(energy):
+    """Circular-mode gap for a fundamental energy (scalar or array)."""
+    return np.polynomial.polynomial.polyval(energy, CIRCULAR_GAP_COEFFS)
+
+
+class CubicSplineTable:
+    """
+    A not-a-knot cubic spline through tabulated points, fitted once and kept
+    as plain piecewise-polynomial coefficients.
+
+    This is the same spline xarray builds for ``interp(method="cubic")``,
+    including nan outside the tabulated range, but lookups are a bisection
+    plus one cubic instead of building a new interpolator on every call.
+    Accepts scalars or numpy arrays.
+    """
+
+    def __init__(self, x, y):
+        from scipy.interpolate import CubicSpline
+
+        spline = CubicSpline(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float), bc_type="not-a-knot"
+        )
+        self.x = np.ascontiguousarray(spline.x)
+        # (4, n - 1) array, highest power first, in powers of (x - x[i])
+        self.coeffs = np.ascontiguousarray(spline.c)
+        self._x = self.x.tolist()
+        self._c = self.coeffs.T.tolist()
+
+    def __call__(self, xi):
+        if np.ndim(xi) == 0:
+            return self._scalar(float(xi))
+        xi = np.asarray(xi, dtype=float)
+        idx = np.clip(np.searchsorted(self.x, xi, side="right") - 1, 0, len(self.x) - 2)
+        dx = xi - self.x[idx]
+        c = self.coeffs[:, idx]
+        y = ((c[0] * dx + c[1]) * dx + c[2]) * dx + c[3]
+        y[(xi < self.x[0]) | (xi > self.x[-1]) | np.isnan(xi)] = np.nan
+        return y
+
+    def _scalar(self, xi):
+        x = self._x
+        if not x[0] <= xi <= x[-1]:
+            return np.nan
+        i = min(bisect_right(x, xi) - 1, len(x) - 2)
+        c0, c1, c2, c3 = self._c[i]
+        dx = xi - x[i]
+        return ((c0 * dx + c1) * dx + c2) * dx + c3
+
+
+class GridInterpolator:
+    """
+    Bilinear interpolation of ``values[i, j]`` tabulated on a rectilinear
+    grid of ``x[i]`` and ``y[j]`` (both increasing).
+
+    The grid is copied once at construction; lookups are vectorized and
+    return nan outside the grid or where any neighbouring table entry is nan,
+    so callers can fall back to another calculation there.  A table with a
+    single x row is interpolated along y only.
+    """
+
+    def __init__(self, x, y, values):
+        self.x = np.ascontiguousarray(x, dtype=float)
+        self.y = np.ascontiguousarray(y, dtype=float)
+        self.values = np.ascontiguousarray(values, dtype=float)
+        if self.values.shape != (len(self.x), len(self.y)):
+            raise ValueError("values must have shape (len(x), len(y))")
+
+    @staticmethod
+    def _locate(axis, points):
+        idx = np.clip(np.searchsorted(axis, points, side="right") - 1, 0, len(axis) - 2)
+        frac = (points - axis[idx]) / (axis[idx + 1] - axis[idx])
+        outside = (points < axis[0]) | (points > axis[-1]) | np.isnan(points)
+        return idx, frac, outside
+
+    def __call__(self, x, y):
+        scalar = np.ndim(x) == 0 and np.ndim(y) == 0
+        x, y = np.broadcast_arrays(
+            np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+        )
+        j, fy, outside = self._locate(self.y, y)
+        if len(self.x) == 1:
+            i, fx = np.zeros_like(j), np.zeros_like(fy)
+        else:
+            i, fx, outside_x = self._locate(self.x, x)
+            outside = outside | outside_x
+        last = len(self.x) - 1
+        z = np.zeros(fy.shape)
+        for di, wx in ((0, 1 - fx), (1, fx)):
+            for dj, wy in ((0, 1 - fy), (1, fy)):
+                w = wx * wy
+                # a neighbour with no weight must not spread its nan
+                v = self.values[np.minimum(i + di, last), j + dj]
+                z += np.where(w == 0, 0.0, w * v)
+        z[outside] = np.nan
+        return float(z) if scalar else z
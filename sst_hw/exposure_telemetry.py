@@ -0,0 +1,146 @@
+"""
+Measured shutter timing for every exposure.
+
+Each exposure is followed through the diode box signals: the trigger (or
+setpoint) write that commands it, the rise and fall of the shutter
+readback (the edges ShutterSet.set waits for) and the shutter counter
+counting it.  From those edges come the command to open latency, the time
+the shutter was actually open against the requested opening time, and the
+close to counted latency.  Each finished exposure updates the soft
+signals of ExposureTelemetry, so they can be recorded with
+``bps.monitor``, and the recent exposures are kept for percentiles.
+"""
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from ophyd import Component as Cpt
+from ophyd import Device, Signal
+
+FIELDS = ("command_to_rise", "open_time", "open_error", "fall_to_count", "overhead")
+
+
+class ExposureTelemetry(Device):
+    """
+    Parameters
+    ----------
+    commands : list of signals
+        writes that start an exposure (e.g. the MTO trigger)
+    readback : signal
+        shutter state, 1 while open
+    counters : list of signals
+        shutter counters, an exposure is finished when one of them counts
+    requested : signal
+        requested opening time (ms)
+    window : int
+        number of recent exposures kept for percentiles
+    """
+
+    command_to_rise = Cpt(Signal, value=np.nan, kind="hinted")
+    open_time = Cpt(Signal, value=np.nan, kind="normal")
+    open_error = Cpt(Signal, value=np.nan, kind="hinted")
+    fall_to_count = Cpt(Signal, value=np.nan, kind="hinted")
+    overhead = Cpt(Signal, value=np.nan, kind="normal")
+    overhead_p50 = Cpt(Signal, value=np.nan, kind="normal")
+    overhead_p95 = Cpt(Signal, value=np.nan, kind="normal")
+
+    def __init__(
+        self, commands, readback, counters, requested, *, name, window=200, **kwargs
+    ):
+        super().__init__("", name=name, **kwargs)
+        self._history = {field: deque(maxlen=int(window)) for field in FIELDS}
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._readback_value = None
+        self._requested = None
+        self._counts = {}
+        self.exposures = 0
+        for command in commands:
+            command.subscribe(self._on_command, run=False)
+        readback.subscribe(self._on_readback, run=False)
+        for counter in counters:
+            counter.subscribe(self._on_count, run=False)
+        requested.subscribe(self._on_requested, run=True)
+
+    @staticmethod
+    def _time(timestamp):
+        return time.time() if timestamp is None else timestamp
+
+    def _on_requested(self, value, **kwargs):
+        self._requested = value
+
+    def _on_command(self, value, timestamp=None, **kwargs):
+        with self._lock:
+            self._pending = {"command": self._time(timestamp)}
+
+    def _on_readback(self, value, timestamp=None, **kwargs):
+        with self._lock:
+            old, self._readback_value = self._readback_value, value
+            if value == 1 and old != 1:
+                self._pending["rise"] = self._time(timestamp)
+            elif value == 0 and old == 1:
+                self._pending["fall"] = self._time(timestamp)
+
+    def _on_count(self, value, timestamp=None, obj=None, **kwargs):
+        key = id(obj)
+        # counters update from their own CA threads; checking the count and
+        # taking the pending edges together means only one counter claims
+        # each exposure
+        with self._lock:
+            old = self._counts.get(key)
+            self._counts[key] = value
+            if old is None or value == old:
+                return
+            pending, self._pending = self._pending, {}
+        if "rise" not in pending or "fall" not in pending:
+            # an edge was missed, nothing sensible to report
+            return
+        self._publish(pending, self._time(timestamp))
+
+    def _publish(self, edges, counted):
+        command_to_rise = np.nan
+        if "command" in edges:
+            command_to_rise = edges["rise"] - edges["command"]
+        open_time = edges["fall"] - edges["rise"]
+        try:
+            open_error = open_time - float(self._requested) / 1000
+        except (TypeError, ValueError):
+            open_error = np.nan
+        fall_to_count = counted - edges["fall"]
+        values = {
+            "command_to_rise": command_to_rise,
+            "open_time": open_time,
+            "open_error": open_error,
+            "fall_to_count": fall_to_count,
+            "overhead": float(np.nansum([command_to_rise, fall_to_count])),
+        }
+        with self._lock:
+            for field, value in values.items():
+                self._history[field].append(value)
+            self.exposures += 1
+            overhead = np.array(self._history["overhead"])
+        for field, value in values.items():
+            getattr(self, field).put(value)
+        p50, p95 = np.percentile(overhead, [50, 95])
+        self.overhead_p50.put(float(p50))
+        self.overhead_p95.put(float(p95))
+
+    def percentiles(self, q=(50, 95, 99)):
+        """
+        {field: {percentile: seconds}} over the recent exposures, for each
+        of command_to_rise, open_time, open_error, fall_to_count and
+        overhead (command to rise plus fall to count)
+        """
+        with self._lock:
+            history = {
+                field: np.array(values) for field, values in self._history.items()
+            }
+        result = {}
+        for field, values in history.items():
+            values = values[~np.isnan(values)]
+            if len(values):
+                result[field] = dict(zip(q, np.percentile(values, q).tolist()))
+            else:
+                result[field] = dict.fromkeys(q, np.nan)
+        return result
@@ -0,0 +1,261 @@
+"""
+Table-driven EPU gap from the measured EPU_{C,L}_{250,1200}_gap.nc optima.
+
+The tables are indexed by fundamental energy (eV) and, for the linear
+modes, by the signed EPU phase in mm.  Lookups return nan wherever there is
+no table or no measured value, so EnPos can fall back to its polynomials.
+
+EnPos uses the polynomial fits (circular_gap, and its 2D fit for the linear
+modes) unless use_gap_tables is set.  When it is set, the measured tables
+are authoritative wherever they have a value, and the fits only fill in
+outside them.  The two disagree by up to ~10 mm (circular, 800 eV on
+the 1200 l/mm grating), and circular_gap is not usable above ~1400 eV.
+"""
+import threading
+
+import numpy as np
+
+from sst_hw.epu_calc import GridInterpolator
+from sst_hw.lut import luts
+from sst_hw.optics_config import parse_grating
+
+
+def mode_key(mode):
+    """EPU mode (0-3) -> "C" for the circular modes, "L" for the linear ones"""
+    return "C" if mode in (0, 1) else "L"
+
+
+class GapTables:
+    """
+    Cached grid interpolators over the shipped gap tables, one per
+    (grating, mode) pair, built the first time each pair is used.
+
+    The current grating can be kept up to date by subscribing
+    ``update_grating`` to the mono's gratingx readback, or to
+    OpticsConfig.grating.
+    """
+
+    def __init__(self, registry=luts, prefer_merged=True):
+        self.registry = registry
+        self.prefer_merged = prefer_merged
+        self.grating = None
+        self._interpolators = {}
+        self._generation = registry.generation
+        self._lock = threading.Lock()
+
+    def update_grating(self, value=None, **kwargs):
+        self.grating = parse_grating(value).key
+
+    def table_name(self, grating, mode):
+        names = ["EPU_{}_{}_gap".format(mode, grating)]
+        if mode == "L" and self.prefer_merged:
+            names.insert(0, names[0] + "_mrg")
+        available = self.registry.names()
+        for name in names:
+            if name in available:
+                return name
+        return None
+
+    def interpolator(self, grating, mode):
+        """The GridInterpolator for a grating ("250"/"1200") and mode ("C"/"L")"""
+        if self._generation != self.registry.generation:
+            self.clear()
+        key = (grating, mode)
+        try:
+            return self._interpolators[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._interpolators:
+                name = self.table_name(grating, mode) if grating else None
+                if name is None:
+                    interp = None
+                else:
+                    table = self.registry.get(name)
+                    interp = GridInterpolator(
+                        table.coords["phase"], table.coords["Energies"], table.values
+                    )
+                self._interpolators[key] = interp
+            return self._interpolators[key]
+
+    def lookup(self, energy, phase, mode, grating=None):
+        """
+        @param energy: fundamental energy (scalar or array)
+        @param phase: signed EPU phase in microns, as returned by EnPos.phase
+        @param mode: EPU mode (0-3)
+        @param grating: grating key, defaults to the last one seen
+        @return: gap in microns, nan where there is no tabulated value
+        """
+        interp = self.interpolator(grating or self.grating, mode_key(mode))
+        if interp is None:
+            if np.ndim(energy) == 0 and np.ndim(phase) == 0:
+                return np.nan
+            return np.full(np.broadcast(energy, phase).shape, np.nan)
+        phase = np.asarray(phase, dtype=float) / 1000.0
+        if interp.x[-1] <= 0:
+            # only the negative phase half was measured, the gap is symmetric
+            phase = -np.abs(phase)
+        return interp(phase, energy)
+
+    def clear(self):
+        with self._lock:
+            self._interpolators = {}
+            self._generation = self.registry.generation
+
+
+class HarmonicOptimizer:
+    """
+    Pick the EPU harmonic with the highest tabulated flux, using the
+    EPU_{C,L}_{250,1200}_intens.nc tables.
+
+    Like the gap tables, the intensity tables are tuning curves over the
+    fundamental energy, so harmonic h at photon energy E is scored with the
+    table value at E / h, times a per-harmonic weight.  The tables only
+    measure the fundamental, so without weights calibrated against measured
+    harmonic flux (1 for any harmonic not given) the higher harmonics are
+    overstated, and the optimizer switches to harmonic 3 far too low (around
+    700 eV on the 250 l/mm grating).  Until every harmonic has a weight the
+    optimizer is not ``calibrated``, and EnPos will not let it choose the
+    harmonic.
+
+    The best harmonic is precomputed for every energy of the table grid and
+    every tabulated phase the first time a (grating, mode) pair is used, so
+    a lookup is an index computation on the uniform energy grid.
+    """
+
+    def __init__(self, gap_tables, harmonics=(1, 3), weights=None):
+        self.gap_tables = gap_tables
+        self.harmonics = tuple(harmonics)
+        self.weights = dict(weights or {})
+        self._best = {}
+        self._generation = gap_tables.registry.generation
+        self._lock = threading.Lock()
+
+    @property
+    def calibrated(self):
+        """True if every harmonic has a measured weight"""
+        return all(h in self.weights for h in self.harmonics)
+
+    def table_name(self, grating, mode):
+        names = ["EPU_{}_{}_intens".format(mode, grating)]
+        if mode == "L":
+            # the un-merged linear intensity tables hold no data
+            names = [names[0] + "_mrg"]
+        available = self.gap_tables.registry.names()
+        for name in names:
+            if name in available:
+                return name
+        return None
+
+    def _build(self, grating, mode):
+        name = self.table_name(grating, mode) if grating else None
+        if name is None:
+            return None
+        table = self.gap_tables.registry.get(name)
+        phases = table.coords["phase"]
+        energies = table.coords["Energies"]
+        step = (energies[-1] - energies[0]) / (len(energies) - 1)
+        flux = np.full((len(self.harmonics),) + table.values.shape, -np.inf)
+        for n, h in enumerate(self.harmonics):
+            weight = self.weights.get(h, 1)
+            for i, row in enumerate(table.values):
+                f = np.interp(energies / h, energies, row, left=np.nan, right=np.nan)
+                flux[n, i] = np.where(np.isfinite(f), f * weight, -np.inf)
+        best = np.argmax(flux, axis=0)
+        best_flux = np.take_along_axis(flux, best[None], axis=0)[0]
+        harmonic = np.where(
+            np.isfinite(best_flux), np.asarray(self.harmonics)[best], 0
+        ).astype(int)
+        return phases, energies[0], step, harmonic, np.where(
+            np.isfinite(best_flux), best_flux, np.nan
+        )
+
+    def best_table(self, grating, mode):
+        """
+        (phases, energy0, energy_step, harmonic, flux) for a grating and mode,
+        where harmonic[i, k] is the best harmonic at phases[i] and energy
+        energy0 + k * energy_step (0 if none), or None if there is no table
+        """
+        if self._generation != self.gap_tables.registry.generation:
+            with self._lock:
+                self._best = {}
+                self._generation = self.gap_tables.registry.generation
+        key = (grating, mode)
+        try:
+            return self._best[key]
+        except KeyError:
+            pass
+        with self._lock:
+            if key not in self._best:
+                self._best[key] = self._build(grating, mode)
+            return self._best[key]
+
+    def lookup(self, energy, phase, mode, grating=None):
+        """
+        @param energy: photon energy (scalar or array)
+        @param phase: signed EPU phase in microns, as returned by EnPos.phase
+        @param mode: EPU mode (0-3)
+        @param grating: grating key, defaults to the gap tables' current one
+        @return: (harmonic, flux); harmonic is 0 where there is no data
+        """
+        best = self.best_table(grating or self.gap_tables.grating, mode_key(mode))
+        scalar = np.ndim(energy) == 0 and np.ndim(phase) == 0
+        energy, phase = np.broadcast_arrays(
+            np.asarray(energy, dtype=float), np.asarray(phase, dtype=float)
+        )
+        if best is None:
+            harmonic = np.zeros(energy.shape, dtype=int)
+            flux = np.full(energy.shape, np.nan)
+        else:
+            phases, energy0, step, harmonics, fluxes = best
+            k = np.rint((energy - energy0) / step)
+            outside = (k < 0) | (k >= harmonics.shape[1]) | np.isnan(k)
+            k = np.where(outside, 0, k).astype(int)
+            phase = phase / 1000.0
+            if phases[-1] <= 0:
+                phase = -np.abs(phase)
+            # nearest tabulated phase
+            i = np.abs(phase[..., None] - phases).argmin(axis=-1)
+            harmonic = np.where(outside, 0, harmonics[i, k])
+            flux = np.where(outside, np.nan, fluxes[i, k])
+        if scalar:
+            return int(harmonic), float(flux)
+        return harmonic, flux
+
+    def flux(self, energy, phase, mode, harmonic, grating=None):
+        """Tabulated flux for a given harmonic, nan where there is none"""
+        grating = grating or self.gap_tables.grating
+        name = self.table_name(grating, mode_key(mode)) if grating else None
+        if name is None:
+            return np.full(np.broadcast(energy, phase).shape, np.nan)
+        table = self.gap_tables.registry.get(name)
+        phases = table.coords["phase"]
+        phase = np.asarray(phase, dtype=float) / 1000.0
+        if phases[-1] <= 0:
+            phase = -np.abs(phase)
+        i = np.abs(phase[..., None] - phases).argmin(axis=-1)
+        energy, i = np.broadcast_arrays(np.asarray(energy, dtype=float), i)
+        result = np.full(energy.shape, np.nan)
+        for row in np.unique(i):
+            mask = i == row
+            result[mask] = np.interp(
+                energy[mask] / harmonic,
+                table.coords["Energies"],
+                table.values[row],
+                left=np.nan,
+                right=np.nan,
+            )
+        return result * self.weights.get(harmonic, 1)
+
+    def best(self, energy, phase, mode, grating=None):
+        """
+        (harmonic, gap) with the highest tabulated flux, with harmonic 0 and
+        a nan gap where nothing is tabulated
+        """
+        harmonic, _ = self.lookup(energy, phase, mode, grating)
+        fundamental = np.asarray(energy, dtype=float) / np.maximum(harmonic, 1)
+        gap = self.gap_tables.lookup(fundamental, phase, mode, grating)
+        gap = np.where(harmonic > 0, gap, np.nan)
+        if np.ndim(gap) == 0:
+            return harmonic, float(gap)
+        return harmonic, gap
@@ -0,0 +1,161 @@
+"""
+Predictive EPU gap lead for fly scans.
+
+The mono moves continuously during a fly scan while the EPU gap only
+follows it, so by the time a gap move finishes the mono has moved on.
+GapLeadTracker estimates the mono velocity from the most recent readbacks
+(falling back to the segment's commanded speed until it has enough of
+them), learns how long the gap takes to respond, and predicts where the
+energy will be once the gap gets there.  It also records, for each
+segment, how far the energy actually was from the gap's target when each
+gap move completed.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+
+class GapLeadTracker:
+    """
+    Parameters
+    ----------
+    window : int
+        number of recent (time, energy) samples used for the velocity fit
+    response_time : float
+        initial guess for the gap response time (s), refined from measured
+        gap moves
+    smoothing : float
+        weight of each new response time measurement in the running average
+    max_lead : float
+        largest lead (eV) that will ever be applied
+    """
+
+    def __init__(self, window=10, response_time=0.5, smoothing=0.2, max_lead=20.0):
+        self.window = window
+        self.response_time = response_time
+        self.smoothing = smoothing
+        self.max_lead = max_lead
+        self.segments = []
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._segment = None
+
+    def reset(self):
+        """Forget all recorded segments, e.g. at the start of a new scan"""
+        with self._lock:
+            self._segment = None
+            self._samples.clear()
+        self.segments = []
+
+    def start_segment(self, start, stop, speed):
+        """Begin tracking a new (start, stop, speed) fly segment"""
+        direction = 1 if stop >= start else -1
+        # swapped under the lock, so that a monitor callback sees either the
+        # old segment and its samples or the new one, never a mix
+        with self._lock:
+            self._finish_segment()
+            self._samples.clear()
+            self._segment = {
+                "segment": len(self.segments),
+                "start": start,
+                "stop": stop,
+                "speed": speed,
+                "nominal_velocity": direction * abs(speed),
+                "errors": [],
+                "response_times": [],
+            }
+
+    def finish_segment(self):
+        """Summarize the tracking error of the current segment, if any"""
+        with self._lock:
+            return self._finish_segment()
+
+    def _finish_segment(self):
+        # called with the lock held
+        segment, self._segment = self._segment, None
+        if segment is None:
+            return None
+        errors = segment.pop("errors")
+        responses = segment.pop("response_times")
+        segment["moves"] = len(errors)
+        if errors:
+            segment["mean_error_ev"] = sum(errors) / len(errors)
+            segment["rms_error_ev"] = math.sqrt(
+                sum(e * e for e in errors) / len(errors)
+            )
+            segment["max_error_ev"] = max(errors, key=abs)
+        else:
+            segment["mean_error_ev"] = segment["rms_error_ev"] = float("nan")
+            segment["max_error_ev"] = float("nan")
+        if responses:
+            segment["mean_response_s"] = sum(responses) / len(responses)
+        else:
+            segment["mean_response_s"] = float("nan")
+        self.segments.append(segment)
+        return segment
+
+    def add_sample(self, t, energy):
+        # under the lock, so it cannot land in the samples of a segment that
+        # start_segment is replacing
+        with self._lock:
+            self._samples.append((t, energy))
+
+    @property
+    def energy(self):
+        with self._lock:
+            return self._energy()
+
+    def _energy(self):
+        # called with the lock held
+        return self._samples[-1][1] if self._samples else float("nan")
+
+    def velocity(self):
+        """Least squares mono velocity (eV/s) over the recent samples"""
+        with self._lock:
+            segment = self._segment
+            samples = list(self._samples)
+        nominal = segment["nominal_velocity"] if segment else 0.0
+        n = len(samples)
+        if n < 3:
+            return nominal
+        t0 = samples[0][0]
+        ts = [t - t0 for t, _ in samples]
+        es = [e for _, e in samples]
+        t_mean = sum(ts) / n
+        e_mean = sum(es) / n
+        var = sum((t - t_mean) ** 2 for t in ts)
+        if var <= 0:
+            return nominal
+        slope = sum((t - t_mean) * (e - e_mean) for t, e in zip(ts, es)) / var
+        if nominal and (slope * nominal < 0 or abs(slope) > 2 * abs(nominal)):
+            # noise or a segment transition, trust the commanded speed
+            return nominal
+        return slope
+
+    def predict(self):
+        """Energy the mono is expected to reach when a gap move now completes"""
+        lead = self.velocity() * self.response_time
+        lead = max(-self.max_lead, min(self.max_lead, lead))
+        return self.energy + lead
+
+    def gap_moved(self, status, target):
+        """
+        Watch a gap move towards target (eV) and record its response time
+        and the tracking error when it finishes
+        """
+        t0 = time.monotonic()
+        with self._lock:
+            segment = self._segment
+
+        def finished(status):
+            if not status.success:
+                return
+            elapsed = time.monotonic() - t0
+            self.response_time += self.smoothing * (elapsed - self.response_time)
+            with self._lock:
+                if segment is not None and segment is self._segment:
+                    segment["errors"].append(target - self._energy())
+                    segment["response_times"].append(elapsed)
+
+        status.add_callback(finished)
@@ -1,69 +1,104 @@
-from sst_base.shutters import EPS_Shutter
+from sst_hw.registry import DeviceRegistry
+from sst_hw.shutter_group import ShutterGroup
+from sst_hw.shutters import make_eps_shutter
 
-gv14 = EPS_Shutter(
-    "XF:07IDA-VA:2{FS:6-GV:1}", name="Pre Mono Gate Valve", kind="hinted"
-)
-gv14.shutter_type = "GV"
-gv14.openval = 0
-gv14.closeval = 1
-
-gv14a = EPS_Shutter("XF:07IDA-VA:2{FS:6-GV:2}", name="Mono Gate Valve", kind="hinted")
-gv14a.shutter_type = "GV"
-gv14a.openval = 0
-gv14a.closeval = 1
+registry = DeviceRegistry(__name__)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
 
-gv15 = EPS_Shutter(
-    "XF:07IDB-VA:2{Mono:PGM-GV:1}", name="Pre Shutter Gate Valve", kind="hinted"
+registry.add(
+    "gv14",
+    make_eps_shutter,
+    "XF:07IDA-VA:2{FS:6-GV:1}",
+    "Pre Mono Gate Valve",
+    "GV",
+    0,
+    1,
 )
-gv15.shutter_type = "GV"
-gv15.openval = 0
-gv15.closeval = 1
-
-gv26 = EPS_Shutter(
-    "XF:07IDB-VA:2{Mir:M3C-GV:1}", name="Post Shutter Gate Valve", kind="hinted"
+registry.add(
+    "gv14a", make_eps_shutter, "XF:07IDA-VA:2{FS:6-GV:2}", "Mono Gate Valve", "GV", 0, 1
 )
-gv26.shutter_type = "GV"
-gv26.openval = 1
-gv26.closeval = 0
-
-gv27 = EPS_Shutter(
-    "XF:07IDB-VA:3{Slt:C-GV:1}", name="Upstream Gate Valve", kind="hinted"
+registry.add(
+    "gv15",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{Mono:PGM-GV:1}",
+    "Pre Shutter Gate Valve",
+    "GV",
+    0,
+    1,
 )
-gv27.shutter_type = "GV"
-gv27.openval = 1
-gv27.closeval = 0
-
-gv27a = EPS_Shutter(
-    "XF:07IDB-VA:2{RSoXS:Main-GV:1}", name="Izero-Main Gate Valve", kind="hinted"
+registry.add(
+    "gv26",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{Mir:M3C-GV:1}",
+    "Post Shutter Gate Valve",
+    "GV",
+    1,
+    0,
 )
-gv27a.shutter_type = "GV"
-gv27a.openval = 1
-gv27a.closeval = 0
-
-gv28 = EPS_Shutter(
-    "XF:07IDB-VA:2{BT:1-GV:1}", name="Downstream Gate Valve", kind="hinted"
+registry.add(
+    "gv27",
+    make_eps_shutter,
+    "XF:07IDB-VA:3{Slt:C-GV:1}",
+    "Upstream Gate Valve",
+    "GV",
+    1,
+    0,
 )
-gv28.shutter_type = "GV"
-gv28.openval = 1
-gv28.closeval = 0
-
-gvTEM = EPS_Shutter(
-    "XF:07IDB-VA:2{RSoXS:Main-GV:2}", name="TEM Load Lock Gate Valve", kind="hinted"
+registry.add(
+    "gv27a",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{RSoXS:Main-GV:1}",
+    "Izero-Main Gate Valve",
+    "GV",
+    1,
+    0,
 )
-gvTEM.shutter_type = "GV"
-gvTEM.openval = 0
-gvTEM.closeval = 1
-
-gvll = EPS_Shutter(
-    "XF:07IDB-VA:2{RSoXS:LL-GV:1}", name="Load Lock Gate Valve", kind="hinted"
+registry.add(
+    "gv28",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{BT:1-GV:1}",
+    "Downstream Gate Valve",
+    "GV",
+    1,
+    0,
 )
-gvll.shutter_type = "GV"
-gvll.openval = 0
-gvll.closeval = 1
-
-gvturbo = EPS_Shutter(
-    "XF:07IDB-VA:2{RSoXS:TP-GV:1}", name="Turbo Gate Valve", kind="hinted"
+registry.add(
+    "gvTEM",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{RSoXS:Main-GV:2}",
+    "TEM Load Lock Gate Valve",
+    "GV",
+    0,
+    1,
+)
+registry.add(
+    "gvll",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{RSoXS:LL-GV:1}",
+    "Load Lock Gate Valve",
+    "GV",
+    0,
+    1,
+)
+registry.add(
+    "gvturbo",
+    make_eps_shutter,
+    "XF:07IDB-VA:2{RSoXS:TP-GV:1}",
+    "Turbo Gate Valve",
+    "GV",
+    0,
+    1,
 )
-gvturbo.shutter_type = "GV"
-gvturbo.openval = 0
-gvturbo.closeval = 1
+
+
+# the gate valves between the front end and the RSoXS main chamber
+@registry.device("rsoxs_beampath_valves")
+def _rsoxs_beampath_valves():
+    valves = ["gv14", "gv14a", "gv15", "gv26", "gv27", "gv27a"]
+    return ShutterGroup(
+        [registry.build(valve) for valve in valves], name="rsoxs_beampath_valves"
+    )
+
+# star imports build and export every device
+__all__ = registry.names()
@@ -0,0 +1,207 @@
+"""
+One device reading a group of gauges from a monitor-fed cache.
+
+Every gauge signal is subscribed to once, and each monitor update is
+written into a small NumPy record (value, IOC timestamp, time received).
+read() answers from that record.  A gauge whose pressure is steady sends
+no monitors, and its cached value stays good for as long as its channel
+is connected, so read() only goes back to the IOC, all such gauges at
+once, for gauges that have never sent a value, are disconnected or are in
+INVALID alarm (and, if max_age is given, that have been quiet for longer
+than max_age).  The last ``window`` values of each gauge are kept for
+rolling statistics, and every update also goes into a decimated
+PressureHistory per gauge for long term trends.
+"""
+import threading
+import time
+
+import numpy as np
+from ophyd import Device
+
+from sst_hw.batch import get_many
+from sst_hw.pressure_history import PressureHistory
+
+# EPICS alarm severity of a value the IOC could not read
+INVALID_ALARM = 3
+
+RECORD_DTYPE = np.dtype([("value", "f8"), ("timestamp", "f8"), ("received", "f8")])
+
+
+def _as_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class GaugeCache(Device):
+    """
+    Parameters
+    ----------
+    gauges : dict
+        {key: signal}, the data keys are "<name>_<key>"
+    max_age : float, optional
+        seconds since its last update after which a connected gauge is read
+        directly anyway, None to trust its monitors for as long as it is
+        connected
+    window : int
+        number of recent values of each gauge kept for statistics()
+    timeout : float
+        seconds to wait for the direct reads of stale gauges
+    history_bucket : float
+        bucket width (s) of each gauge's PressureHistory
+    history_capacity : int
+        number of buckets each PressureHistory keeps
+    """
+
+    def __init__(
+        self,
+        gauges,
+        *,
+        name,
+        max_age=None,
+        window=600,
+        timeout=2.0,
+        history_bucket=10.0,
+        history_capacity=25920,
+        **kwargs,
+    ):
+        super().__init__("", name=name, **kwargs)
+        self.gauges = dict(gauges)
+        self.max_age = max_age
+        self.timeout = timeout
+        self._keys = ["{}_{}".format(name, key) for key in self.gauges]
+        self._gauge_signals = list(self.gauges.values())
+        n = len(self._gauge_signals)
+        self._record = np.zeros(n, dtype=RECORD_DTYPE)
+        self._record["value"] = np.nan
+        self._history = np.full((n, int(window)), np.nan)
+        self._history_count = np.zeros(n, dtype=int)
+        self.histories = {
+            key: PressureHistory(history_bucket, history_capacity)
+            for key in self._keys
+        }
+        self._histories = list(self.histories.values())
+        self._lock = threading.Lock()
+        self.direct_reads = 0
+        for index, sig in enumerate(self._gauge_signals):
+            sig.subscribe(self._updater(index), run=True)
+
+    def _updater(self, index):
+        def update(value, timestamp=None, **kwargs):
+            self._store(index, value, timestamp)
+
+        return update
+
+    def _store(self, index, value, timestamp):
+        value = _as_float(value)
+        now = time.time()
+        with self._lock:
+            self._record[index] = (value, now if timestamp is None else timestamp, now)
+            window = self._history.shape[1]
+            self._history[index, self._history_count[index] % window] = value
+            self._history_count[index] += 1
+        self._histories[index].append(now, value)
+
+    def stale(self, max_age=None):
+        """
+        indices of the gauges whose cached value cannot be trusted: never
+        received, disconnected, in INVALID alarm, or (with max_age) not
+        updated within max_age seconds
+        """
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            received = self._record["received"].copy()
+        stale = received == 0
+        if max_age is not None:
+            stale |= time.time() - received > max_age
+        for index, sig in enumerate(self._gauge_signals):
+            # both come from the channel's connection and monitor metadata,
+            # so checking them sends nothing to the IOC
+            if not getattr(sig, "connected", True):
+                stale[index] = True
+            elif getattr(sig, "alarm_severity", 0) == INVALID_ALARM:
+                stale[index] = True
+        return np.flatnonzero(stale)
+
+    def refresh(self, max_age=None):
+        """
+        Read the stale gauges directly (concurrently) into the cache
+
+        Returns
+        -------
+        dict
+            {key: exception} for the gauges that could not be read
+        """
+        indices = self.stale(max_age)
+        if not len(indices):
+            return {}
+        signals = [self._gauge_signals[i] for i in indices]
+        values, failures = get_many(signals, self.timeout)
+        self.direct_reads += len(indices) - len(failures)
+        for n, index in enumerate(indices):
+            if n not in failures:
+                self._store(index, values[n], None)
+        return {self._keys[indices[n]]: ex for n, ex in failures.items()}
+
+    def record(self):
+        """copy of the cached (value, timestamp, received) of every gauge"""
+        with self._lock:
+            return self._record.copy()
+
+    def read(self):
+        self.refresh()
+        record = self.record()
+        return {
+            key: {"value": float(row["value"]), "timestamp": float(row["timestamp"])}
+            for key, row in zip(self._keys, record)
+        }
+
+    def describe(self):
+        return {
+            key: {
+                "source": "PV:{}".format(getattr(sig, "pvname", sig.name)),
+                "dtype": "number",
+                "shape": [],
+            }
+            for key, sig in zip(self._keys, self._gauge_signals)
+        }
+
+    def statistics(self):
+        """
+        Mean, standard deviation, minimum and maximum of the last window
+        values of each gauge
+
+        Returns
+        -------
+        dict
+            {key: {"mean", "std", "min", "max", "count"}}, nan for gauges
+            with no values yet
+        """
+        with self._lock:
+            history = self._history.copy()
+            counts = np.minimum(self._history_count, history.shape[1])
+        stats = {}
+        for key, values, count in zip(self._keys, history, counts):
+            values = values[~np.isnan(values)]
+            if len(values):
+                stats[key] = {
+                    "mean": float(values.mean()),
+                    "std": float(values.std()),
+                    "min": float(values.min()),
+                    "max": float(values.max()),
+                    "count": int(count),
+                }
+            else:
+                stats[key] = dict.fromkeys(("mean", "std", "min", "max"), np.nan)
+                stats[key]["count"] = int(count)
+        return stats
+
+    def trends(self, start=None, stop=None):
+        """
+        {key: PressureHistory.export(start, stop)} for every gauge, the
+        decimated history as one array per gauge
+        """
+        return {
+            key: history.export(start, stop) for key, history in self.histories.items()
+        }
@@ -0,0 +1,134 @@
+"""
+Lazy registry for the EPU lookup tables shipped in sst_hw/config.
+
+Tables are only read the first time they are asked for, and each one is
+converted to native numpy arrays exactly once.  NetCDF3 files are read
+through a memory map with scipy; the HDF5-based tables fall back to xarray,
+which is only imported if one of those is actually used.
+"""
+import pathlib
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+CONFIG_PATH = pathlib.Path(__file__).parent.absolute() / "config"
+
+LookupTable = namedtuple("LookupTable", ["name", "values", "dims", "coords"])
+LookupTable.__doc__ = """
+A table from sst_hw/config as plain numpy arrays
+
+name : the data variable name in the file (e.g. "EPUGaps")
+values : n-dimensional array of the tabulated data
+dims : names of the dimensions of values, in order
+coords : dict of dimension name -> 1D coordinate array
+"""
+
+
+def _native(array):
+    return np.ascontiguousarray(array, dtype=np.dtype(array.dtype).newbyteorder("="))
+
+
+def _read_netcdf3(path):
+    from scipy.io import netcdf_file
+
+    with netcdf_file(path, mode="r", mmap=True, maskandscale=False) as f:
+        names = [k for k in f.variables if k not in f.dimensions]
+        if len(names) != 1:
+            raise ValueError(f"{path} does not hold exactly one data variable")
+        var = f.variables[names[0]]
+        table = LookupTable(
+            name=names[0],
+            values=_native(var.data),
+            dims=tuple(var.dimensions),
+            coords={
+                dim: _native(f.variables[dim].data)
+                for dim in var.dimensions
+                if dim in f.variables
+            },
+        )
+        del var
+    return table
+
+
+def _read_xarray(path):
+    import xarray as xr
+
+    da = xr.load_dataarray(path)
+    return LookupTable(
+        name=da.name,
+        values=_native(da.values),
+        dims=tuple(da.dims),
+        coords={dim: _native(da[dim].values) for dim in da.dims},
+    )
+
+
+class LUTRegistry:
+    """
+    Lazily loaded, cached lookup tables from one config directory
+
+    Use ``registry.get("EPU_L_1200_gap")`` (with or without the ``.nc``)
+    to get a LookupTable.  Loading is thread safe and happens at most once
+    per table until ``clear`` is called.
+    """
+
+    def __init__(self, path=CONFIG_PATH):
+        self.path = pathlib.Path(path)
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.generation = 0
+
+    def names(self):
+        return sorted(p.stem for p in self.path.glob("*.nc"))
+
+    def loaded(self):
+        return sorted(self._tables)
+
+    def get(self, name):
+        name = name[:-3] if name.endswith(".nc") else name
+        try:
+            return self._tables[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._tables:
+                self._tables[name] = self._load(self.path / (name + ".nc"))
+            return self._tables[name]
+
+    def dataarray(self, name):
+        """The same table as an xarray DataArray (imports xarray)"""
+        import xarray as xr
+
+        table = self.get(name)
+        return xr.DataArray(
+            table.values, coords=table.coords, dims=table.dims, name=table.name
+        )
+
+    def clear(self):
+        """Forget all loaded tables so they are re-read on next use"""
+        with self._lock:
+            self._tables = {}
+            self.generation += 1
+
+    def _load(self, path):
+        if not path.exists():
+            raise KeyError(f"no lookup table {path.name} in {self.path}")
+        with open(path, "rb") as f:
+            magic = f.read(3)
+        if magic == b"CDF":
+            return _read_netcdf3(path)
+        return _read_xarray(path)
+
+
+_registries = {}
+
+
+def get_registry(path=CONFIG_PATH):
+    """The shared LUTRegistry for a config directory"""
+    path = pathlib.Path(path).absolute()
+    if path not in _registries:
+        _registries[path] = LUTRegistry(path)
+    return _registries[path]
+
+
+luts = get_registry()
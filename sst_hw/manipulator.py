@@ -2,9 +2,18 @@ from sst_base.manipulator import Manipulator1AxBase
 from sst_base.motors import PrettyMotor
 from ophyd import Component as Cpt
 
+from sst_hw.registry import DeviceRegistry
+
+registry = DeviceRegistry(__name__)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
+
 
 class MultiMesh(Manipulator1AxBase):
     x = Cpt(PrettyMotor, "MMesh}Mtr", name="Multimesh")
 
 
-multimesh = MultiMesh(None, "XF:07ID1-BI{I0Up-Ax:", name="i0upmultimesh")
+registry.add("multimesh", MultiMesh, None, "XF:07ID1-BI{I0Up-Ax:", name="i0upmultimesh")
+
+# star imports build and export every device
+__all__ = registry.names()
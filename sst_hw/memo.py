@@ -0,0 +1,59 @@
+"""
+Bounded least-recently-used cache for pseudo positioner calculations.
+
+functools.lru_cache works on functions, but the EnPos caches need to be
+per instance, keyed on values read from signals, and cleared when the
+lookup tables or a calibration offset change, so they are kept explicitly.
+"""
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+class LRUCache:
+    """
+    Parameters
+    ----------
+    maxsize : int
+        number of entries kept before the least recently used is dropped,
+        0 disables the cache
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry, the hit and miss counts are kept"""
+        with self._lock:
+            self._data.clear()
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
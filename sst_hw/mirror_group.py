@@ -0,0 +1,141 @@
+"""
+Move and read several hexapod mirrors as one device.
+
+Alignment moves one axis of one mirror at a time, and reading a mirror
+reads each of its axes in turn.  MirrorGroup starts every axis move of
+every mirror at once and returns a single status, and reads all of the
+axes concurrently.
+"""
+import bluesky.plan_stubs as bps
+from ophyd import Device, Signal
+from ophyd.positioner import PositionerBase
+
+from sst_hw.batch import get_many, set_many
+
+
+class MirrorGroup(Device):
+    """
+    Parameters
+    ----------
+    mirrors : dict
+        {key: mirror device}, the keys are used in the targets of set()
+    timeout : float
+        seconds to wait for the concurrent reads in read() and positions()
+    """
+
+    def __init__(self, mirrors, *, name, timeout=2.0, **kwargs):
+        super().__init__("", name=name, **kwargs)
+        self.mirrors = dict(mirrors)
+        self.timeout = timeout
+
+    @staticmethod
+    def axes(mirror):
+        """{axis name: positioner} of a mirror"""
+        axes = {}
+        for attr in mirror.component_names:
+            child = getattr(mirror, attr)
+            if isinstance(child, PositionerBase):
+                axes[attr] = child
+        return axes
+
+    def _pairs(self, targets):
+        pairs = []
+        for key, axis_targets in targets.items():
+            if key not in self.mirrors:
+                raise KeyError(
+                    "{} has no mirror {!r}, only {}".format(
+                        self.name, key, ", ".join(self.mirrors)
+                    )
+                )
+            axes = self.axes(self.mirrors[key])
+            for axis, value in axis_targets.items():
+                if axis not in axes:
+                    raise KeyError(
+                        "{} has no axis {!r}, only {}".format(
+                            key, axis, ", ".join(axes)
+                        )
+                    )
+                pairs.append((axes[axis], value))
+        return pairs
+
+    def set(self, targets):
+        """
+        Move every given axis of every given mirror at once
+
+        Parameters
+        ----------
+        targets : dict
+            {mirror key: {axis: position}}, e.g.
+            {"mir1": {"pitch": 0.62}, "mir3": {"x": 26.6, "pitch": 7.9}}.
+            Every mirror and axis is checked before anything moves.
+
+        Returns
+        -------
+        Status
+            finishes when every axis has finished moving
+        """
+        return set_many(self._pairs(targets))
+
+    def move(self, targets):
+        """plan moving every axis in targets together, see set()"""
+        yield from bps.mv(self, targets)
+
+    def _readable_signals(self):
+        signals = []
+        for mirror in self.mirrors.values():
+            for attr in mirror.read_attrs:
+                sig = getattr(mirror, attr)
+                if isinstance(sig, Signal):
+                    signals.append(sig)
+        return signals
+
+    def _get_all(self, signals):
+        # read concurrently, failing with every signal that could not be read
+        values, failures = get_many(signals, self.timeout)
+        if failures:
+            names = ", ".join(signals[n].name for n in failures)
+            raise TimeoutError(
+                "{} could not read {}: {}".format(
+                    self.name, names, next(iter(failures.values()))
+                )
+            )
+        return values
+
+    def read(self):
+        """every mirror's read(), with all of the signals read concurrently"""
+        signals = self._readable_signals()
+        values = self._get_all(signals)
+        return {
+            sig.name: {"value": value, "timestamp": sig.timestamp}
+            for sig, value in zip(signals, values)
+        }
+
+    def describe(self):
+        description = {}
+        for mirror in self.mirrors.values():
+            description.update(mirror.describe())
+        return description
+
+    def positions(self):
+        """
+        {mirror key: {axis: position}}, read concurrently; raises
+        TimeoutError naming every axis that could not be read, as read() does
+        """
+        axes = [
+            (key, axis, positioner)
+            for key, mirror in self.mirrors.items()
+            for axis, positioner in self.axes(mirror).items()
+        ]
+        values = self._get_all([_readback(positioner) for _, _, positioner in axes])
+        positions = {key: {} for key in self.mirrors}
+        for (key, axis, _), value in zip(axes, values):
+            positions[key][axis] = value
+        return positions
+
+
+def _readback(positioner):
+    for attr in ("user_readback", "readback"):
+        sig = getattr(positioner, attr, None)
+        if sig is not None:
+            return sig
+    raise TypeError("{} has no readback signal".format(positioner.name))
@@ -1,24 +1,73 @@
 from ophyd import EpicsSignal
 from sst_base.mirrors import HexapodMirror, FMBHexapodMirror
 
-mir2_type = EpicsSignal(
-    "XF:07ID1-OP{Mono:PGM1-Ax:MirX}Mtr_TYPE_MON", name="SST 1 Mirror 2 Stripe"
+from sst_hw.mirror_group import MirrorGroup
+from sst_hw.registry import DeviceRegistry
+
+registry = DeviceRegistry(__name__)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
+
+registry.add(
+    "mir2_type",
+    EpicsSignal,
+    "XF:07ID1-OP{Mono:PGM1-Ax:MirX}Mtr_TYPE_MON",
+    name="SST 1 Mirror 2 Stripe",
 )
 
-mir4OLD = HexapodMirror(
-    "XF:07ID2-OP{Mir:M4CD-Ax:", name="SST 1 Mirror 4", kind="hinted"
+
+# the legacy hexapod records, only built (and connected) when asked for
+registry.add_optional(
+    "mir4OLD",
+    HexapodMirror,
+    "XF:07ID2-OP{Mir:M4CD-Ax:",
+    name="SST 1 Mirror 4",
+    kind="hinted",
+)
+registry.add_optional(
+    "mir3OLD",
+    HexapodMirror,
+    "XF:07ID1-OP{Mir:M3ABC-Ax:",
+    name="SST 1 Mirror 3",
+    kind="hinted",
 )
-mir3OLD = HexapodMirror(
-    "XF:07ID1-OP{Mir:M3ABC-Ax:", name="SST 1 Mirror 3", kind="hinted"
+registry.add_optional(
+    "mir1OLD",
+    HexapodMirror,
+    "XF:07IDA-OP{Mir:M1-Ax:",
+    name="SST 1 Mirror 1",
+    kind="hinted",
 )
-mir1OLD = HexapodMirror("XF:07IDA-OP{Mir:M1-Ax:", name="SST 1 Mirror 1",
-                        kind="hinted")
 
-mir4 = FMBHexapodMirror(
-    "XF:07ID2-OP{Mir:M4CD", name="SST 1 Mirror 4 fmb", kind="hinted"
+registry.add(
+    "mir4",
+    FMBHexapodMirror,
+    "XF:07ID2-OP{Mir:M4CD",
+    name="SST 1 Mirror 4 fmb",
+    kind="hinted",
 )
-mir3 = FMBHexapodMirror(
-    "XF:07ID1-OP{Mir:M3ABC", name="SST 1 Mirror 3 fmb", kind="hinted"
+registry.add(
+    "mir3",
+    FMBHexapodMirror,
+    "XF:07ID1-OP{Mir:M3ABC",
+    name="SST 1 Mirror 3 fmb",
+    kind="hinted",
 )
-mir1 = FMBHexapodMirror("XF:07IDA-OP{Mir:M1", name="SST 1 Mirror 1 fmb",
-                        kind="hinted")
+registry.add(
+    "mir1",
+    FMBHexapodMirror,
+    "XF:07IDA-OP{Mir:M1",
+    name="SST 1 Mirror 1 fmb",
+    kind="hinted",
+)
+
+
+@registry.device("mirror_group")
+def _mirror_group():
+    return MirrorGroup(
+        {key: registry.build(key) for key in ("mir1", "mir3", "mir4")},
+        name="SST 1 Mirrors",
+    )
+
+# star imports build and export every device
+__all__ = registry.names()
@@ -0,0 +1,113 @@
+"""
+Which mono grating and mirror 2 stripe are in, from a monitor-fed cache.
+
+The grating and mirror type PVs (gratingx / mirror2x ``_TYPE_MON``) are
+strings that used to be read, and searched for "250l/mm" and the like,
+every time a plan or where_sp needed them.  OpticsConfig subscribes to
+them once and keeps the parsed result in soft signals, which change (and
+so notify their subscribers) only when the optics actually change.
+"""
+import enum
+
+from ophyd import Component as Cpt
+from ophyd import Device, Signal
+
+
+class Grating(enum.Enum):
+    G250 = "250"
+    G1200 = "1200"
+    RSOXS = "RSoXS"
+    UNKNOWN = "unknown"
+
+    @property
+    def key(self):
+        """grating key of the gap tables, "250" / "1200" / None"""
+        if self is Grating.G1200:
+            return "1200"
+        if self in (Grating.G250, Grating.RSOXS):
+            return "250"
+        return None
+
+
+def parse_grating(grating_type):
+    """gratingx type string -> Grating"""
+    if not isinstance(grating_type, str):
+        return Grating.UNKNOWN
+    if "RSoXS" in grating_type:
+        return Grating.RSOXS
+    if "1200" in grating_type:
+        return Grating.G1200
+    if "250" in grating_type:
+        return Grating.G250
+    return Grating.UNKNOWN
+
+
+# what the grating plans have always looked for in the type string to
+# decide that a grating is already in
+_GRATING_MARKERS = {
+    Grating.G250: "250l/mm",
+    Grating.G1200: "1200",
+    Grating.RSOXS: "RSoXS",
+}
+
+
+def grating_in(grating_type, grating):
+    """True if the gratingx type string says grating is in"""
+    marker = _GRATING_MARKERS.get(grating)
+    return isinstance(grating_type, str) and marker is not None and (
+        marker in grating_type
+    )
+
+
+class OpticsConfig(Device):
+    """
+    Parameters
+    ----------
+    grating_type : signal
+        mono grating type string (gratingx readback)
+    mirror_type : signal
+        mono mirror 2 stripe string (mirror2x readback / mir2_type)
+
+    ``grating`` holds the Grating value ("250", "1200", "RSoXS" or
+    "unknown"), ``grating_type`` and ``mirror_type`` the strings as the IOC
+    reports them.  Subscribe to these signals to hear about changes.
+    """
+
+    grating = Cpt(Signal, value=Grating.UNKNOWN.value, kind="config")
+    grating_type = Cpt(Signal, value="", kind="config")
+    mirror_type = Cpt(Signal, value="", kind="config")
+
+    def __init__(self, grating_type, mirror_type, *, name, **kwargs):
+        super().__init__("", name=name, **kwargs)
+        self.grating_type_source = grating_type
+        self.mirror_type_source = mirror_type
+        grating_type.subscribe(self._grating_type_changed, run=True)
+        mirror_type.subscribe(self._mirror_type_changed, run=True)
+
+    @staticmethod
+    def _update(sig, value):
+        if sig.get() != value:
+            sig.put(value)
+
+    def _grating_type_changed(self, value, **kwargs):
+        value = "" if value is None else str(value)
+        self._update(self.grating_type, value)
+        self._update(self.grating, parse_grating(value).value)
+
+    def _mirror_type_changed(self, value, **kwargs):
+        self._update(self.mirror_type, "" if value is None else str(value).strip())
+
+    def current_grating_type(self):
+        """
+        the grating type string, from the cache, or read from the source
+        signal if no monitor update has arrived yet
+        """
+        grating_type = self.grating_type.get()
+        if not grating_type:
+            self._grating_type_changed(self.grating_type_source.get())
+            grating_type = self.grating_type.get()
+        return grating_type
+
+    def at_grating(self, grating):
+        """True if grating is in, see grating_in and current_grating_type"""
+        return grating_in(self.current_grating_type(), grating)
@@ -0,0 +1,127 @@
+"""
+Bounded, decimated time series for a slowly changing signal such as a
+vacuum gauge.
+
+Updates are not stored one by one.  Time is cut into fixed buckets and
+each bucket keeps only the minimum, maximum, mean, number and last value
+of the updates that fell in it, so a pump-down lasting days fits in a
+fixed number of rows however often the gauge updates.  Once ``capacity``
+buckets are full the oldest are overwritten.  Bucket start times only
+increase, so any time window is found by binary search.
+"""
+import threading
+
+import numpy as np
+
+BUCKET_DTYPE = np.dtype(
+    [
+        ("time", "f8"),
+        ("min", "f8"),
+        ("max", "f8"),
+        ("mean", "f8"),
+        ("last", "f8"),
+        ("count", "i8"),
+    ]
+)
+
+
+class PressureHistory:
+    """
+    Parameters
+    ----------
+    bucket : float
+        width of each bucket (s)
+    capacity : int
+        number of buckets kept, so the history covers bucket * capacity
+        seconds (by default 10 s buckets for 3 days)
+    """
+
+    def __init__(self, bucket=10.0, capacity=25920):
+        self.bucket = float(bucket)
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=BUCKET_DTYPE)
+        self._head = 0  # buckets started so far
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._head, self.capacity)
+
+    def append(self, time, value):
+        """Add one update, value at time (s since the epoch)"""
+        if value != value:  # nan, the gauge had nothing to report
+            return
+        start = time - time % self.bucket
+        with self._lock:
+            if self._head:
+                row = self._data[(self._head - 1) % self.capacity]
+                if start <= row["time"]:
+                    # same bucket (or a late update, folded into the newest)
+                    count = row["count"] + 1
+                    row["min"] = min(row["min"], value)
+                    row["max"] = max(row["max"], value)
+                    row["mean"] += (value - row["mean"]) / count
+                    row["last"] = value
+                    row["count"] = count
+                    return
+            self._data[self._head % self.capacity] = (
+                start,
+                value,
+                value,
+                value,
+                value,
+                1,
+            )
+            self._head += 1
+
+    def _time_at(self, first, i):
+        return self._data["time"][(first + i) % self.capacity]
+
+    def _bisect(self, first, n, time):
+        """number of the n buckets from first that start before time"""
+        low, high = 0, n
+        while low < high:
+            mid = (low + high) // 2
+            if self._time_at(first, mid) < time:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def window(self, start=None, stop=None):
+        """
+        Copy of the buckets overlapping start <= t < stop, oldest first
+
+        Parameters
+        ----------
+        start, stop : float, optional
+            times (s since the epoch), default the whole history
+
+        Returns
+        -------
+        ndarray
+            structured array with fields time (bucket start), min, max,
+            mean, last and count
+        """
+        with self._lock:
+            n = len(self)
+            first = self._head - n
+            low = 0 if start is None else max(self._bisect(first, n, start) - 1, 0)
+            if (
+                start is not None
+                and low < n
+                and self._time_at(first, low) + self.bucket <= start
+            ):
+                low += 1
+            high = n if stop is None else self._bisect(first, n, stop)
+            if high <= low:
+                return np.zeros(0, dtype=BUCKET_DTYPE)
+            indices = np.arange(first + low, first + high) % self.capacity
+            return self._data[indices]
+
+    def export(self, start=None, stop=None):
+        """
+        window() as a single (n, 6) float array, columns time, min, max,
+        mean, last, count, for putting into one event or file
+        """
+        rows = self.window(start, stop)
+        return np.stack([rows[field].astype(float) for field in BUCKET_DTYPE.names], 1)
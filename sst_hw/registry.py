@@ -0,0 +1,330 @@
+"""
+Lazily built devices for the sst_hw modules.
+
+Each device module registers a factory for every device it provides
+instead of building it at import, and hands attribute lookup to its
+registry (PEP 562 module ``__getattr__``).  A device is then built, and
+its PVs connected, the first time it is used::
+
+    from sst_hw.shutters import psh4   # builds psh4 only
+
+The built device is stored in the module namespace, so every later access
+is an ordinary attribute lookup.  Building can also be started ahead of
+time in a background thread with :func:`prewarm`, and the time each device
+took to build is kept for :func:`construction_report`.
+
+:func:`connect` builds the devices and waits for all of their PVs at once,
+reporting how long each device took to connect and which PVs never did.
+"""
+import importlib
+import logging
+import sys
+import threading
+import time
+from collections import namedtuple
+
+from sst_hw.batch import call_many
+
+logger = logging.getLogger(__name__)
+
+# every DeviceRegistry, by module name
+registries = {}
+
+# seconds from the start of connect() until every PV of the device had
+# connected (None if they did not), and the PVs that were still missing
+ConnectionStatus = namedtuple(
+    "ConnectionStatus", ["module", "name", "seconds", "missing"]
+)
+
+MODULES = (
+    "sst_hw.diode",
+    "sst_hw.vacuum",
+    "sst_hw.gatevalves",
+    "sst_hw.shutters",
+    "sst_hw.mirrors",
+    "sst_hw.motors",
+    "sst_hw.manipulator",
+)
+
+
+class DeviceRegistry:
+    """
+    The lazily built devices of one module
+
+    Parameters
+    ----------
+    module_name : str
+        __name__ of the module the devices belong to
+    report : bool
+        call sst_funcs' run_report for the module before its first device
+        is built, as the module used to do on import
+    """
+
+    def __init__(self, module_name, report=False):
+        self.module_name = module_name
+        self.report = report
+        self._factories = {}
+        self._optional = set()
+        self._timings = {}
+        self._reported = False
+        self._lock = threading.RLock()
+        registries[module_name] = self
+
+    @property
+    def _namespace(self):
+        return vars(sys.modules[self.module_name])
+
+    def add(self, attr, factory, *args, **kwargs):
+        """Register attr, to be built as factory(*args, **kwargs)"""
+        self._factories[attr] = (factory, args, kwargs)
+
+    def add_optional(self, attr, factory, *args, **kwargs):
+        """
+        add(), for a device that is only built when asked for by name, not
+        by build_all(), prewarm() or connect()
+        """
+        self.add(attr, factory, *args, **kwargs)
+        self._optional.add(attr)
+
+    def device(self, attr):
+        """Decorator registering a no argument function that builds attr"""
+
+        def register(func):
+            self.add(attr, func)
+            return func
+
+        return register
+
+    def names(self):
+        return list(self._factories)
+
+    def built(self):
+        """names of the devices that have been built"""
+        namespace = self._namespace
+        return [attr for attr in self._factories if attr in namespace]
+
+    def build(self, attr):
+        """Build attr (once) and return it"""
+        namespace = self._namespace
+        if attr in namespace:
+            return namespace[attr]
+        with self._lock:
+            if attr in namespace:
+                return namespace[attr]
+            factory, args, kwargs = self._factories[attr]
+            if self.report and not self._reported:
+                from sst_funcs.printing import run_report
+
+                run_report(namespace["__file__"])
+                self._reported = True
+            t0 = time.perf_counter()
+            device = factory(*args, **kwargs)
+            self._timings[attr] = time.perf_counter() - t0
+            namespace[attr] = device
+            return device
+
+    def build_all(self, names=None, include_optional=False):
+        """
+        Build every device (or those in names), returning the failures
+
+        Devices added with add_optional are left out unless they are in
+        names or include_optional is True.
+        """
+        if names is None:
+            names = [
+                attr
+                for attr in self.names()
+                if include_optional or attr not in self._optional
+            ]
+        failures = {}
+        for attr in names:
+            try:
+                self.build(attr)
+            except Exception as ex:
+                logger.warning("could not build %s.%s: %s", self.module_name, attr, ex)
+                failures[attr] = ex
+        return failures
+
+    def timings(self):
+        """{name: seconds taken to build} for the devices built so far"""
+        return dict(self._timings)
+
+    def getattr(self, attr):
+        """Module __getattr__, only called for names not yet in the module"""
+        if attr in self._factories:
+            return self.build(attr)
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(self.module_name, attr)
+        )
+
+    def dir(self):
+        """Module __dir__, including the devices not built yet"""
+        return sorted(set(self._namespace) | set(self._factories))
+
+
+def _registries(modules=None):
+    for module in MODULES if modules is None else modules:
+        importlib.import_module(module)
+    if modules is None:
+        return list(registries.values())
+    return [registries[module] for module in modules]
+
+
+def prewarm(modules=None, background=True, include_optional=False):
+    """
+    Build every device of modules (default: all of the device modules)
+
+    Parameters
+    ----------
+    modules : list of str, optional
+        module names, e.g. ["sst_hw.shutters"]
+    background : bool
+        build in a daemon thread and return it, instead of building now
+    include_optional : bool
+        also build the devices registered with add_optional
+
+    Returns
+    -------
+    threading.Thread or dict
+        the thread, or {(module, name): exception} for the devices that
+        could not be built
+    """
+
+    def run():
+        failures = {}
+        for registry in _registries(modules):
+            for attr, ex in registry.build_all(None, include_optional).items():
+                failures[(registry.module_name, attr)] = ex
+        return failures
+
+    if not background:
+        return run()
+    thread = threading.Thread(target=run, name="sst_hw_prewarm", daemon=True)
+    thread.start()
+    return thread
+
+
+def construction_report(file=None):
+    """
+    Print how long each device built so far took to build, slowest first
+
+    Returns
+    -------
+    list of (seconds, module, name)
+    """
+    rows = sorted(
+        (
+            (seconds, registry.module_name, attr)
+            for registry in list(registries.values())
+            for attr, seconds in registry.timings().items()
+        ),
+        reverse=True,
+    )
+    for seconds, module, attr in rows:
+        print("{:8.3f} s  {}.{}".format(seconds, module, attr), file=file)
+    total = sum(row[0] for row in rows)
+    print("{:8.3f} s  total, {} devices".format(total, len(rows)), file=file)
+    return rows
+
+
+def _missing_pvs(obj):
+    if hasattr(obj, "walk_signals"):
+        signals = [walk.item for walk in obj.walk_signals()]
+    else:
+        signals = [obj]
+    missing = []
+    for sig in signals:
+        if getattr(sig, "connected", True):
+            continue
+        for attr in ("pvname", "setpoint_pvname"):
+            pvname = getattr(sig, attr, None)
+            if pvname is not None and pvname not in missing:
+                missing.append(pvname)
+        if not hasattr(sig, "pvname"):
+            missing.append(sig.name)
+    return missing
+
+
+def connect(modules=None, timeout=5.0, file=None, include_optional=False):
+    """
+    Build the devices of modules (default: all of the device modules) and
+    wait for all of them to connect at the same time, rather than one after
+    the other on first use
+
+    Parameters
+    ----------
+    modules : list of str, optional
+        module names, e.g. ["sst_hw.gatevalves", "sst_hw.vacuum"]
+    timeout : float
+        seconds to wait for everything to connect
+    file : file-like, optional
+        where to print the table, False to print nothing
+    include_optional : bool
+        also connect the devices registered with add_optional
+
+    Returns
+    -------
+    list of ConnectionStatus
+        failed devices first, then the slowest
+    """
+    devices = []
+    for registry in _registries(modules):
+        registry.build_all(None, include_optional)
+        devices.extend(
+            (registry.module_name, attr, registry._namespace[attr])
+            for attr in registry.built()
+            if include_optional or attr not in registry._optional
+        )
+
+    start = time.perf_counter()
+    deadline = start + timeout
+
+    def waiter(device):
+        def wait():
+            # devices queued behind others only get what is left of timeout
+            remaining = max(deadline - time.perf_counter(), 0.001)
+            device.wait_for_connection(timeout=remaining)
+            return time.perf_counter() - start
+
+        return wait
+
+    seconds, failures = call_many(
+        [waiter(device) for _, _, device in devices], timeout + 1
+    )
+    statuses = []
+    for n, (module, attr, device) in enumerate(devices):
+        if n in failures:
+            missing = _missing_pvs(device)
+            if not missing:
+                logger.warning("%s.%s did not connect: %s", module, attr, failures[n])
+            statuses.append(ConnectionStatus(module, attr, None, missing))
+        else:
+            statuses.append(ConnectionStatus(module, attr, seconds[n], []))
+    statuses.sort(
+        key=lambda status: (status.seconds is not None, -(status.seconds or 0))
+    )
+
+    if file is not False:
+        connected = sum(status.seconds is not None for status in statuses)
+        print(
+            "{} of {} devices connected in {:.3f} s".format(
+                connected, len(statuses), time.perf_counter() - start
+            ),
+            file=file,
+        )
+        for status in statuses:
+            if status.seconds is None:
+                print(
+                    "  FAILED   {}.{}  missing: {}".format(
+                        status.module, status.name, ", ".join(status.missing) or "?"
+                    ),
+                    file=file,
+                )
+            else:
+                print(
+                    "{:8.3f} s  {}.{}".format(
+                        status.seconds, status.module, status.name
+                    ),
+                    file=file,
+                )
+    return statuses
@@ -0,0 +1,69 @@
+"""
+Preallocated ring buffer for flyer samples.
+
+One thread appends (time, value, timestamp) samples while another drains
+them.  Neither side takes a lock: the producer only ever advances ``_head``
+and the consumer only ever advances ``_tail``, and each is a single int
+assignment.  When the producer catches up with the consumer the buffer
+doubles in size, so no sample is ever overwritten or lost.
+"""
+import numpy as np
+
+
+class EventRingBuffer:
+    """
+    Ring buffer of (time, value, timestamp) rows
+
+    Parameters
+    ----------
+    capacity : int
+        number of samples preallocated
+    """
+
+    def __init__(self, capacity):
+        self._data = np.zeros((max(int(capacity), 1), 3))
+        self._head = 0  # samples written, only advanced by the producer
+        self._tail = 0  # samples consumed, only advanced by the consumer
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def __len__(self):
+        return self._head - self._tail
+
+    def _grow(self):
+        # copy the unconsumed rows into a buffer twice the size before
+        # swapping it in; the old array is never written again, so a drain
+        # reading it at the same time still sees every row it expects
+        data = self._data
+        tail = self._tail
+        new = np.zeros((2 * len(data), 3))
+        index = np.arange(tail, self._head)
+        new[index % len(new)] = data.take(index, axis=0, mode="wrap")
+        self._data = new
+
+    def append(self, time, value, timestamp):
+        if self._head - self._tail >= self.capacity:
+            self._grow()
+        row = self._data[self._head % self.capacity]
+        row[0] = time
+        row[1] = value
+        row[2] = timestamp
+        self._head += 1
+
+    def drain(self):
+        """
+        Take everything written since the last drain
+
+        Returns
+        -------
+        ndarray
+            (n, 3) copy of the (time, value, timestamp) rows, oldest first
+        """
+        head = self._head
+        # read after head, so the rows up to head are in this array
+        data = self._data
+        rows = data.take(np.arange(self._tail, head), axis=0, mode="wrap")
+        self._tail = head
+        return rows
@@ -0,0 +1,156 @@
+"""
+Open or close several EPS shutters and gate valves at the same time.
+
+EPS_Shutter.open() / close() are plans that command one shutter, then
+sleep and check it in turn, so bringing up a beam path takes the sum of
+every valve's actuation time.  ShutterGroup commands all of them at once.
+It is meant for several shutters; a single shutter is better served by
+its own open() / close().
+
+Each shutter is commanded again every ``retry_time`` seconds until its
+state reaches its own openval / closeval, up to its ``maxcount`` commands,
+as EPS_Shutter does.  set() returns one status that finishes once every
+shutter has either arrived or used up its commands; it fails if any did
+not arrive, naming all of those that did not.  The open() / close() plans
+then print which shutters failed and carry on, as EPS_Shutter's do.
+"""
+import threading
+import time
+
+import bluesky.plan_stubs as bps
+from bluesky.utils import FailedStatus
+from ophyd import Device
+from ophyd.status import DeviceStatus
+
+from sst_hw.batch import combine_statuses
+
+
+class ShutterGroup(Device):
+    """
+    Parameters
+    ----------
+    shutters : list of EPS_Shutter
+    retry_time : float
+        seconds to wait for a shutter to arrive before commanding it again,
+        1.5 as in EPS_Shutter
+    timeout : float, optional
+        seconds to wait for each shutter before failing
+    """
+
+    def __init__(self, shutters, *, name, retry_time=1.5, timeout=None, **kwargs):
+        super().__init__("", name=name, **kwargs)
+        self.shutters = list(shutters)
+        self.retry_time = retry_time
+        self.timeout = timeout
+        self.timings = {}
+
+    def _actuate(self, shutter, action):
+        if action == "open":
+            target, command = shutter.openval, shutter.opn
+        else:
+            target, command = shutter.closeval, shutter.cls
+        attempts = getattr(shutter, "maxcount", 3)
+        status = DeviceStatus(shutter, timeout=self.timeout)
+        start = time.monotonic()
+        state = {"tries": 0, "timer": None}
+
+        def arrived(value, **kwargs):
+            if value == target and not status.done:
+                self.timings[shutter.name] = time.monotonic() - start
+                status.set_finished()
+
+        def command_again():
+            if status.done:
+                return
+            if state["tries"] >= attempts:
+                status.set_exception(
+                    RuntimeError(
+                        "tried {} times and failed to {} {}".format(
+                            attempts, action, shutter.name
+                        )
+                    )
+                )
+                return
+            state["tries"] += 1
+            command.put(1)
+            state["timer"] = threading.Timer(self.retry_time, command_again)
+            state["timer"].daemon = True
+            state["timer"].start()
+
+        def finished(status):
+            shutter.state.clear_sub(arrived)
+            if state["timer"] is not None:
+                state["timer"].cancel()
+
+        shutter.state.subscribe(arrived, run=True)
+        status.add_callback(finished)
+        if not status.done:
+            command_again()
+        return status
+
+    def set(self, value):
+        """
+        Open or close every shutter in the group at once
+
+        Parameters
+        ----------
+        value : {"open", "close"}
+        """
+        if value not in ("open", "close"):
+            raise ValueError("value must be 'open' or 'close', not {!r}".format(value))
+        self.timings = {}
+        statuses = [self._actuate(shutter, value) for shutter in self.shutters]
+        if not statuses:
+            return combine_statuses(statuses)
+        # rather than an AndStatus, so that every shutter gets all of its
+        # tries and the failure names each shutter that did not move
+        group = DeviceStatus(self)
+        remaining = [len(statuses)]
+        failures = []
+        lock = threading.Lock()
+
+        def one_done(status):
+            with lock:
+                if not status.success:
+                    failures.append(str(status.exception()))
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            if failures:
+                group.set_exception(RuntimeError("; ".join(failures)))
+            else:
+                group.set_finished()
+
+        for status in statuses:
+            status.add_callback(one_done)
+        return group
+
+    def _move(self, value, done):
+        try:
+            yield from bps.mv(self, value)
+        except FailedStatus as ex:
+            print("{} :(".format(ex.__cause__ or ex))
+        else:
+            print(
+                "{} {}".format(
+                    done, ", ".join(shutter.name for shutter in self.shutters)
+                )
+            )
+
+    def open(self):
+        yield from self._move("open", "Opened")
+
+    def close(self):
+        yield from self._move("close", "Closed")
+
+    def status(self):
+        """{name: "open" or "closed"} for every shutter"""
+        return {
+            shutter.name: "open" if shutter.state.get() == shutter.openval else "closed"
+            for shutter in self.shutters
+        }
+
+    def report(self):
+        """print how long each shutter took to arrive in the last set"""
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            print("{:8.3f} s  {}".format(seconds, name))
@@ -0,0 +1,158 @@
+"""
+Fire a series of shutter pulses from the diode box MTO pulse generator.
+
+The MTO holds one delay and one width, so a series is still fired one
+pulse at a time, but without a plan step per pulse: set() takes the whole
+list of (delay, width) exposures and a worker thread programs each pulse,
+triggers it and waits for the shutter counter to count it before starting
+the next.  Delay and width are only written when they differ from the
+previous pulse, and then together, so a run of identical exposures costs
+one trigger put per pulse.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from ophyd import Device
+from ophyd.status import DeviceStatus
+
+from sst_hw.batch import set_many
+
+# times are time.monotonic() seconds
+Shot = namedtuple("Shot", ["delay", "width", "triggered", "counted"])
+
+
+class ShutterSequencer(Device):
+    """
+    Parameters
+    ----------
+    delay, width, trigger : signals
+        the MTO delay (ms), opening time (ms) and trigger
+    counters : list of signals
+        shutter pulse counters, a pulse is confirmed when any of them
+        has counted it
+    margin : float
+        seconds allowed on top of delay + width for each pulse to be counted
+    """
+
+    def __init__(
+        self, delay, width, trigger, counters, *, name, margin=1.0, **kwargs
+    ):
+        super().__init__("", name=name, **kwargs)
+        self.delay_signal = delay
+        self.width_signal = width
+        self.trigger_signal = trigger
+        self.counters = list(counters)
+        self.margin = margin
+        self.shots = []
+        self._counts = [None] * len(self.counters)
+        self._count_changed = threading.Condition()
+        self._stop_requested = threading.Event()
+        self._worker = None
+        for index, counter in enumerate(self.counters):
+            counter.subscribe(self._counter_updater(index), run=True)
+
+    def _counter_updater(self, index):
+        def update(value, **kwargs):
+            with self._count_changed:
+                self._counts[index] = value
+                self._count_changed.notify_all()
+
+        return update
+
+    def _counted(self, baseline, shots):
+        return any(
+            count is not None and base is not None and count - base >= shots
+            for count, base in zip(self._counts, baseline)
+        )
+
+    def set(self, exposures):
+        """
+        Fire every exposure in turn
+
+        Parameters
+        ----------
+        exposures : list of (delay, width)
+            in ms, as the MTO takes them
+
+        Returns
+        -------
+        DeviceStatus
+            finishes once every pulse has been counted, fails with the
+            first pulse that was not
+        """
+        if self._worker is not None and self._worker.is_alive():
+            raise RuntimeError("{} is already firing".format(self.name))
+        exposures = [(float(delay), float(width)) for delay, width in exposures]
+        status = DeviceStatus(self)
+        self.shots = []
+        self._stop_requested.clear()
+        self._worker = threading.Thread(
+            target=self._run,
+            args=(exposures, status),
+            name="{}_sequence".format(self.name),
+            daemon=True,
+        )
+        self._worker.start()
+        return status
+
+    def _run(self, exposures, status):
+        try:
+            self._fire(exposures)
+        except Exception as ex:
+            status.set_exception(ex)
+        else:
+            status.set_finished()
+
+    def _fire(self, exposures):
+        with self._count_changed:
+            baseline = list(self._counts)
+        # no monitor update yet, e.g. just after the device was built
+        baseline = [
+            counter.get() if count is None else count
+            for counter, count in zip(self.counters, baseline)
+        ]
+        programmed = (self.delay_signal.get(), self.width_signal.get())
+        for n, (delay, width) in enumerate(exposures):
+            if self._stop_requested.is_set():
+                raise RuntimeError(
+                    "{} stopped after {} of {} pulses".format(
+                        self.name, n, len(exposures)
+                    )
+                )
+            changes = [
+                (sig, value)
+                for sig, value, old in zip(
+                    (self.delay_signal, self.width_signal), (delay, width), programmed
+                )
+                if value != old
+            ]
+            if changes:
+                set_many(changes).wait(timeout=self.margin + 5)
+                programmed = (delay, width)
+            timeout = (delay + width) / 1000 + self.margin
+            triggered = time.monotonic()
+            self.trigger_signal.put(1)
+            with self._count_changed:
+                counted = self._count_changed.wait_for(
+                    lambda: self._counted(baseline, n + 1), timeout
+                )
+            if not counted:
+                raise TimeoutError(
+                    "pulse {} of {} (delay {} ms, width {} ms) was not counted "
+                    "within {:.2f} s".format(
+                        n + 1, len(exposures), delay, width, timeout
+                    )
+                )
+            self.shots.append(Shot(delay, width, triggered, time.monotonic()))
+
+    def stop(self, *, success=False):
+        """stop before the next pulse, the status then fails"""
+        self._stop_requested.set()
+
+    def timings(self):
+        """seconds from trigger to count, and between triggers, per pulse"""
+        latency = [shot.counted - shot.triggered for shot in self.shots]
+        shots = self.shots
+        period = [b.triggered - a.triggered for a, b in zip(shots, shots[1:])]
+        return latency, period
@@ -1,25 +1,29 @@
 from sst_base.shutters import EPS_Shutter
 
-FEsh1 = EPS_Shutter("XF:07ID-PPS{Sh:FE}", name="Front-End Shutter",
-                   kind="hinted")
-FEsh1.shutter_type = "FE"
-FEsh1.openval = 0
-FEsh1.closeval = 1
-
-psh4 = EPS_Shutter("XF:07IDA-PPS{PSh:4}", name="Hutch Photon Shutter",
-                   kind="hinted")
-psh4.shutter_type = "PH"
-psh4.openval = 0
-psh4.closeval = 1
-
-psh10 = EPS_Shutter("XF:07IDA-PPS{PSh:10}", name="Upstream Photon Shutter",
-                    kind="hinted")
-psh10.shutter_type = "PH"
-psh10.openval = 0
-psh10.closeval = 1
-
-psh7 = EPS_Shutter("XF:07IDA-PPS{PSh:7}", name="Downstream Photon Shutter",
-                   kind="hinted")
-psh7.shutter_type = "PH"
-psh7.openval = 0
-psh7.closeval = 1
+from sst_hw.registry import DeviceRegistry
+
+registry = DeviceRegistry(__name__)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
+
+
+def make_eps_shutter(prefix, name, shutter_type, openval, closeval):
+    shutter = EPS_Shutter(prefix, name=name, kind="hinted")
+    shutter.shutter_type = shutter_type
+    shutter.openval = openval
+    shutter.closeval = closeval
+    return shutter
+
+
+registry.add("FEsh1", make_eps_shutter, "XF:07ID-PPS{Sh:FE}",
+             "Front-End Shutter", "FE", 0, 1)
+registry.add("psh4", make_eps_shutter, "XF:07IDA-PPS{PSh:4}",
+             "Hutch Photon Shutter", "PH", 0, 1)
+registry.add("psh10", make_eps_shutter, "XF:07IDA-PPS{PSh:10}",
+             "Upstream Photon Shutter", "PH", 0, 1)
+registry.add("psh7", make_eps_shutter, "XF:07IDA-PPS{PSh:7}",
+             "Downstream Photon Shutter", "PH", 0, 1)
+
+
+# star imports build and export every device
+__all__ = registry.names()
@@ -0,0 +1,442 @@
+"""
+Offline simulated backend for the sst_hw devices.
+
+Every device here is an ordinary ophyd device that talks to EPICS through
+ophyd's control layer.  This module provides a stand-in control layer that
+keeps each PV in memory, so that the same device tree can be built,
+exercised and profiled away from the beamline.  Monitor, connection and
+put callbacks are delivered on ophyd's usual event dispatcher threads, and
+every get that is not served from a monitor and every put waits
+``get_latency`` / ``put_latency`` seconds to stand in for a Channel Access
+round trip.
+
+Simulation has to be switched on before any device is created, either by
+setting SST_HW_SIMULATE=1 in the environment (checked when sst_hw is first
+imported) or by calling :func:`enable` before importing the device modules::
+
+    from sst_hw import sim
+    sim.enable(get_latency=0.001)
+    from sst_hw.diode import Shutter_control
+
+PVs start at 0 (or whatever :func:`seed` gave them).  Nothing moves on its
+own; :func:`simulate_positioners` makes the motors and PV positioners of a
+device follow their setpoints.
+"""
+import functools
+import logging
+import threading
+import time
+import types
+
+import ophyd
+from ophyd import EpicsMotor, PVPositioner
+
+from sst_hw import _env_flag
+
+# the ophyd releases the stand-in control layer has been checked against;
+# it uses ophyd's private event dispatcher (ophyd._dispatch), which only
+# enable() imports
+OPHYD_VERSIONS = ("1.11",)
+
+logger = logging.getLogger(__name__)
+
+_ioc = None
+_dispatcher = None
+_dispatch = None  # ophyd._dispatch, once enable() has imported it
+
+
+def requested():
+    """True if SST_HW_SIMULATE asks for the simulated backend"""
+    return _env_flag("SST_HW_SIMULATE")
+
+
+def enabled():
+    return _ioc is not None
+
+
+class SimIOC:
+    """
+    In-memory PV values, shared by every SimPV of the same name
+
+    Parameters
+    ----------
+    get_latency : float
+        seconds each get not served from a monitor takes
+    put_latency : float
+        seconds each put takes
+    """
+
+    def __init__(self, get_latency=0.0005, put_latency=0.001):
+        self.get_latency = get_latency
+        self.put_latency = put_latency
+        self.gets = 0
+        self.puts = 0
+        self._values = {}
+        self._timestamps = {}
+        self._monitors = {}
+        self._put_hooks = {}
+        self._lock = threading.RLock()
+
+    def pvnames(self):
+        with self._lock:
+            return sorted(self._values)
+
+    def _ensure(self, pvname):
+        if pvname not in self._values:
+            self._values[pvname] = 0.0
+            self._timestamps[pvname] = time.time()
+            self._monitors[pvname] = {}
+
+    def get(self, pvname):
+        with self._lock:
+            self._ensure(pvname)
+            return self._values[pvname], self._timestamps[pvname]
+
+    def put(self, pvname, value, callback=None):
+        """
+        Write value as an IOC would: update the PV, post monitors, and run
+        any hook registered for it.  callback is called once the hook says
+        the put is complete.
+        """
+        with self._lock:
+            self._ensure(pvname)
+            self._values[pvname] = value
+            self._timestamps[pvname] = timestamp = time.time()
+            monitors = list(self._monitors[pvname].values())
+            hook = self._put_hooks.get(pvname)
+        for monitor in monitors:
+            monitor(pvname, value, timestamp)
+        if hook is not None:
+            hook(value, callback)
+        elif callback is not None:
+            callback()
+
+    def add_monitor(self, pvname, key, monitor):
+        with self._lock:
+            self._ensure(pvname)
+            self._monitors[pvname][key] = monitor
+
+    def remove_monitor(self, pvname, key):
+        with self._lock:
+            self._monitors.get(pvname, {}).pop(key, None)
+
+    def set_put_hook(self, pvname, hook):
+        """hook(value, callback) runs after every put to pvname"""
+        with self._lock:
+            self._put_hooks[pvname] = hook
+
+
+class SimPV:
+    """The parts of the pyepics PV interface that ophyd's signals use"""
+
+    _next_index = 0
+
+    def __init__(
+        self,
+        ioc,
+        pvname,
+        *,
+        auto_monitor=None,
+        connection_callback=None,
+        access_callback=None,
+        **kwargs,
+    ):
+        self._ioc = ioc
+        self.pvname = pvname
+        self.auto_monitor = auto_monitor
+        self.connected = True
+        self._reference_count = 0
+        self._callbacks = {}
+        with ioc._lock:
+            ioc._ensure(pvname)
+        if connection_callback is not None:
+            _dispatch.wrap_callback(_dispatcher, "metadata", connection_callback)(
+                pvname=pvname, conn=True, pv=self
+            )
+        if access_callback is not None:
+            _dispatch.wrap_callback(_dispatcher, "metadata", access_callback)(
+                True, True, pv=self
+            )
+
+    def wait_for_connection(self, timeout=None):
+        return True
+
+    def _metadata(self, timestamp):
+        return {
+            "timestamp": timestamp,
+            "status": 0,
+            "severity": 0,
+            "precision": 4,
+            "units": "",
+            "lower_ctrl_limit": 0.0,
+            "upper_ctrl_limit": 0.0,
+        }
+
+    def get_ctrlvars(self, **kwargs):
+        return self._metadata(self._ioc.get(self.pvname)[1])
+
+    get_timevars = get_ctrlvars
+
+    def get_all_metadata_blocking(self, timeout):
+        return self._metadata(self._ioc.get(self.pvname)[1])
+
+    def get_all_metadata_callback(self, callback, *, timeout):
+        _dispatcher.schedule_utility_task(
+            callback, self.pvname, self.get_all_metadata_blocking(timeout)
+        )
+
+    def get_with_metadata(
+        self, as_string=False, use_monitor=True, form="time", timeout=None, **kwargs
+    ):
+        if not (use_monitor and self._callbacks) and self._ioc.get_latency:
+            time.sleep(self._ioc.get_latency)
+        self._ioc.gets += 1
+        value, timestamp = self._ioc.get(self.pvname)
+        info = self._metadata(timestamp)
+        info["value"] = str(value) if as_string else value
+        return info
+
+    def get(self, **kwargs):
+        return self.get_with_metadata(**kwargs)["value"]
+
+    def put(
+        self,
+        value,
+        wait=False,
+        timeout=None,
+        use_complete=False,
+        callback=None,
+        callback_data=None,
+    ):
+        if self._ioc.put_latency:
+            time.sleep(self._ioc.put_latency)
+        self._ioc.puts += 1
+        on_complete = None
+        if callback is not None:
+            on_complete = functools.partial(
+                _dispatch.wrap_callback(_dispatcher, "get_put", callback),
+                pvname=self.pvname,
+                data=callback_data,
+            )
+        self._ioc.put(self.pvname, value, on_complete)
+
+    def add_callback(self, callback=None, index=None, run_now=False, **kwargs):
+        callback = _dispatch.wrap_callback(_dispatcher, "monitor", callback)
+        if index is None:
+            SimPV._next_index += 1
+            index = SimPV._next_index
+        self._callbacks[index] = callback
+
+        def monitor(pvname, value, timestamp):
+            callback(
+                pvname=pvname,
+                value=value,
+                char_value=str(value),
+                timestamp=timestamp,
+                status=0,
+                severity=0,
+            )
+
+        self._ioc.add_monitor(self.pvname, (id(self), index), monitor)
+        if run_now:
+            value, timestamp = self._ioc.get(self.pvname)
+            monitor(self.pvname, value, timestamp)
+        return index
+
+    def remove_callback(self, index):
+        self._callbacks.pop(index, None)
+        self._ioc.remove_monitor(self.pvname, (id(self), index))
+
+    def clear_callbacks(self):
+        for index in list(self._callbacks):
+            self.remove_callback(index)
+
+    def clear_auto_monitor(self):
+        self.auto_monitor = None
+
+
+def _setup(logger):
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = _dispatch.EventDispatcher(
+            thread_class=_dispatch._CallbackThread, context=None, logger=logger
+        )
+
+
+def _get_pv(pvname, *args, **kwargs):
+    return SimPV(_ioc, pvname, **kwargs)
+
+
+def _caget(pvname, **kwargs):
+    return _get_pv(pvname).get(**kwargs)
+
+
+def _caput(pvname, value, **kwargs):
+    return _get_pv(pvname).put(value, **kwargs)
+
+
+def _release_pvs(*pvs):
+    for pv in pvs:
+        pv._reference_count -= 1
+        if pv._reference_count == 0:
+            pv.clear_callbacks()
+
+
+# what enable() relies on in ophyd's control layer
+_CONTROL_LAYER_ATTRS = (
+    "setup",
+    "caput",
+    "caget",
+    "get_pv",
+    "thread_class",
+    "name",
+    "release_pvs",
+    "get_dispatcher",
+)
+
+
+def _import_dispatch():
+    global _dispatch
+    version = ".".join(ophyd.__version__.split(".")[:2])
+    if version not in OPHYD_VERSIONS:
+        raise RuntimeError(
+            "the simulated backend supports ophyd {}, not {}".format(
+                ", ".join(OPHYD_VERSIONS), ophyd.__version__
+            )
+        )
+    missing = []
+    try:
+        from ophyd import _dispatch
+    except ImportError:
+        _dispatch = None
+    if not all(
+        hasattr(_dispatch, attr)
+        for attr in ("EventDispatcher", "_CallbackThread", "wrap_callback")
+    ):
+        missing.append(
+            "ophyd._dispatch (EventDispatcher, _CallbackThread, wrap_callback)"
+        )
+    control_layer = getattr(ophyd, "cl", None)
+    missing.extend(
+        "ophyd.cl." + attr
+        for attr in _CONTROL_LAYER_ATTRS
+        if not hasattr(control_layer, attr)
+    )
+    if missing:
+        raise RuntimeError(
+            "the simulated backend does not support ophyd {}, it needs {}".format(
+                ophyd.__version__, ", ".join(missing)
+            )
+        )
+
+
+def enable(get_latency=0.0005, put_latency=0.001):
+    """
+    Use the simulated backend for every EPICS signal created from now on
+
+    Parameters
+    ----------
+    get_latency, put_latency : float
+        seconds each get (not served from a monitor) and each put takes
+
+    Returns
+    -------
+    SimIOC
+        holding every simulated PV
+    """
+    global _ioc
+    if _ioc is None:
+        _import_dispatch()
+        _ioc = SimIOC(get_latency, put_latency)
+        _setup(logger)
+        ophyd.cl = types.SimpleNamespace(
+            setup=_setup,
+            caput=_caput,
+            caget=_caget,
+            get_pv=_get_pv,
+            thread_class=threading.Thread,
+            name="sst_hw.sim",
+            release_pvs=_release_pvs,
+            get_dispatcher=lambda: _dispatcher,
+        )
+        logger.info("sst_hw devices are simulated, nothing will talk to EPICS")
+    else:
+        _ioc.get_latency = get_latency
+        _ioc.put_latency = put_latency
+    return _ioc
+
+
+def ioc():
+    """The SimIOC holding the simulated PVs"""
+    if _ioc is None:
+        raise RuntimeError("the simulated backend is not enabled")
+    return _ioc
+
+
+def seed(values):
+    """Set simulated PVs, {pvname: value}, posting monitors as a put would"""
+    for pvname, value in values.items():
+        ioc().put(pvname, value)
+
+
+def _follow(setpoint, readback, done=None, done_value=1, move_time=0.01):
+    sim = ioc()
+
+    def hook(value, callback):
+        if done is not None:
+            sim.put(done, 1 - done_value if done_value in (0, 1) else 0)
+
+        def arrive():
+            sim.put(readback, value)
+            if done is not None:
+                sim.put(done, done_value)
+            if callback is not None:
+                callback()
+
+        if move_time > 0:
+            timer = threading.Timer(move_time, arrive)
+            timer.daemon = True
+            timer.start()
+        else:
+            arrive()
+
+    sim.set_put_hook(setpoint, hook)
+
+
+def simulate_positioner(positioner, move_time=0.01):
+    """
+    Make an EpicsMotor or PVPositioner arrive at each new setpoint after
+    move_time seconds, with its done signal dropping while it moves
+    """
+    if isinstance(positioner, EpicsMotor):
+        _follow(
+            positioner.user_setpoint.setpoint_pvname,
+            positioner.user_readback.pvname,
+            positioner.motor_done_move.pvname,
+            1,
+            move_time,
+        )
+        ioc().put(positioner.motor_done_move.pvname, 1)
+    elif isinstance(positioner, PVPositioner):
+        done = getattr(positioner, "done", None)
+        done_pv = getattr(done, "pvname", None)
+        _follow(
+            positioner.setpoint.setpoint_pvname,
+            positioner.readback.pvname,
+            done_pv,
+            positioner.done_value,
+            move_time,
+        )
+        if done_pv is not None:
+            ioc().put(done_pv, positioner.done_value)
+    else:
+        raise TypeError("{} is not an EpicsMotor or PVPositioner".format(positioner))
+
+
+def simulate_positioners(device, move_time=0.01):
+    """simulate_positioner for every EpicsMotor and PVPositioner in device"""
+    devices = [device] + [child for _, child in device.walk_subdevices()]
+    found = [dev for dev in devices if isinstance(dev, (EpicsMotor, PVPositioner))]
+    for dev in found:
+        simulate_positioner(dev, move_time)
+    return found
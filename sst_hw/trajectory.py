@@ -0,0 +1,86 @@
+"""
+Precomputed energy -> EPU gap trajectories for fly scans.
+
+The polarization is fixed for the whole of a fly scan, so the gap is a
+function of the mono energy alone and can be tabulated on a dense energy
+grid before the scan starts.  While flying, following the mono is then a
+binary search into that table rather than a gap calculation per readback.
+"""
+import bisect
+
+import numpy as np
+
+
+class GapTrajectory:
+    """
+    Gap and harmonic tabulated on a uniform, increasing energy grid
+
+    Parameters
+    ----------
+    energies : array
+        uniformly spaced, increasing energies (eV)
+    gaps : array
+        gap (microns) for each energy
+    harmonics : array or int
+        harmonic the gap was calculated for
+    """
+
+    def __init__(self, energies, gaps, harmonics):
+        self.energies = np.asarray(energies, dtype=float)
+        self.gaps = np.asarray(gaps, dtype=float)
+        self.harmonics = np.broadcast_to(harmonics, self.energies.shape).astype(int)
+        if len(self.energies) > 1:
+            self.step = float(self.energies[1] - self.energies[0])
+        else:
+            self.step = 0.0
+        # plain lists, bisect on them is much faster than numpy for one value
+        self._midpoints = ((self.energies[1:] + self.energies[:-1]) / 2).tolist()
+        self._energies = self.energies.tolist()
+        self._gaps = self.gaps.tolist()
+        self._harmonics = self.harmonics.tolist()
+
+    @classmethod
+    def from_segments(cls, segments, step, margin, calculate):
+        """
+        Tabulate the gap over every energy the fly segments can reach
+
+        Parameters
+        ----------
+        segments : iterable of (start, stop, speed)
+        step : float
+            energy grid spacing (eV)
+        margin : float
+            extra energy range (eV) below and above the segments, for the
+            gap lead
+        calculate : callable
+            energies -> (gaps, harmonics), evaluated once for the whole grid
+        """
+        ends = [e for segment in segments for e in segment[:2]]
+        low = min(ends) - margin
+        high = max(ends) + margin
+        energies = low + step * np.arange(int(np.ceil((high - low) / step)) + 1)
+        gaps, harmonics = calculate(energies)
+        return cls(energies, gaps, harmonics)
+
+    def __len__(self):
+        return len(self._energies)
+
+    def index(self, energy):
+        """index of the grid point nearest energy, clamped to the table"""
+        return bisect.bisect_left(self._midpoints, energy)
+
+    def lookup(self, energy):
+        """(index, gap, harmonic) of the grid point nearest energy"""
+        i = bisect.bisect_left(self._midpoints, energy)
+        return i, self._gaps[i], self._harmonics[i]
+
+    def follow(self, energy, last=None):
+        """
+        lookup(energy), or None if energy is still less than one grid step
+        from the point at index last, so that readback noise around a grid
+        midpoint does not send the gap back and forth
+        """
+        if last is not None and abs(energy - self._energies[last]) < self.step:
+            return None
+        found = self.lookup(energy)
+        return None if found[0] == last else found
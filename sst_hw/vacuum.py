@@ -1,51 +1,94 @@
 from ophyd import EpicsSignalRO, EpicsSignal
 
-from sst_funcs.printing import run_report
+from sst_hw.gauge_cache import GaugeCache
+from sst_hw.registry import DeviceRegistry
 
+registry = DeviceRegistry(__name__, report=True)
+__getattr__ = registry.getattr
+__dir__ = registry.dir
 
-run_report(__file__)
-
-
-rsoxs_ccg_izero = EpicsSignalRO(
+registry.add(
+    "rsoxs_ccg_izero",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:DM-CCG:1}P:Raw-I",
     name="IZero Chamber Cold Cathode Gauge",
     kind="hinted",
 )
-rsoxs_pg_izero = EpicsSignalRO(
+registry.add(
+    "rsoxs_pg_izero",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:DM-TCG:1}P:Raw-I",
     name="IZero Chamber Pirani Gauge",
     kind="hinted",
 )
-rsoxs_ccg_main = EpicsSignalRO(
+registry.add(
+    "rsoxs_ccg_main",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:Main-CCG:1}P:Raw-I",
     name="Main Chamber Chamber Cold Cathode Gauge",
     kind="hinted",
 )
-rsoxs_ccg_main_val = EpicsSignalRO(
+registry.add(
+    "rsoxs_ccg_main_val",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:Main-CCG:1}P-I",
     name="Main Chamber Chamber Cold Cathode Gauge",
     kind="hinted",
 )
-rsoxs_pg_main = EpicsSignalRO(
+registry.add(
+    "rsoxs_pg_main",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:Main-TCG:1}P:Raw-I",
     name="Main Chamber Pirani Gauge",
     kind="hinted",
 )
-rsoxs_pg_main_val = EpicsSignalRO(
+registry.add(
+    "rsoxs_pg_main_val",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:Main-TCG:1}P-I",
     name="Main Chamber Pirani Gauge value",
     kind="hinted",
 )
-rsoxs_ccg_ll = EpicsSignalRO(
+registry.add(
+    "rsoxs_ccg_ll",
+    EpicsSignalRO,
     "XF:07IDB-VA:2{RSoXS:LL-CCG:1}P:Raw-I",
     name="Load Lock Chamber Cold Cathode Gauge",
     kind="hinted",
 )
-rsoxs_pg_ll = EpicsSignalRO(
-    "XF:07IDB-VA:2{RSoXS:LL-TCG:1}P:Raw-I", name="Load Lock Pirani Gauge", kind="hinted"
+registry.add(
+    "rsoxs_pg_ll",
+    EpicsSignalRO,
+    "XF:07IDB-VA:2{RSoXS:LL-TCG:1}P:Raw-I",
+    name="Load Lock Pirani Gauge",
+    kind="hinted",
 )
-rsoxs_ll_gpwr = EpicsSignal(
+registry.add(
+    "rsoxs_ll_gpwr",
+    EpicsSignal,
     "XF:07IDB-VA:2{RSoXS:LL-CCG:1}Pwr-Cmd",
     name="Power to Load Lock Gauge",
     kind="hinted",
 )
+
+
+@registry.device("rsoxs_vacuum")
+def _rsoxs_vacuum():
+    gauges = [
+        "rsoxs_ccg_izero",
+        "rsoxs_pg_izero",
+        "rsoxs_ccg_main",
+        "rsoxs_ccg_main_val",
+        "rsoxs_pg_main",
+        "rsoxs_pg_main_val",
+        "rsoxs_ccg_ll",
+        "rsoxs_pg_ll",
+    ]
+    return GaugeCache(
+        {gauge: registry.build(gauge) for gauge in gauges},
+        name="rsoxs_vacuum",
+        kind="hinted",
+    )
+
+# star imports build and export every device
+__all__ = registry.names()
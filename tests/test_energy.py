@@ -0,0 +1,108 @@
+"""
+EnPos on the simulated backend: its forward/inverse caches are dropped
+whenever their inputs change, the vectorized calculations agree with the
+scalar ones, and the measured gap tables fall back to the polynomial fits
+wherever they have no value.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("sst_base")
+pytest.importorskip("sst_funcs")
+
+from sst_hw import sim  # noqa: E402
+
+ENERGIES = [150.0, 400.0, 800.0, 1100.0, 1500.0, 2000.0]
+POLS = [-1, -0.5, 0.0, 30.0, 90.0, 135.0]
+
+
+@pytest.fixture(scope="module")
+def en():
+    sim.enable(get_latency=0, put_latency=0)
+    from ophyd import EpicsMotor
+
+    from sst_hw.energy import EnPos
+
+    rotation = EpicsMotor("SIM{Rot}Mtr", name="sim_rotation")
+    en = EnPos("", name="en", rotation_motor=rotation)
+    en.wait_for_connection(timeout=10)
+    sim.seed({en.monoen.gratingx.readback.pvname: "1200l/mm"})
+    return en
+
+
+@pytest.fixture(autouse=True)
+def defaults(en):
+    yield
+    en.use_gap_tables.put(0)
+    en.offset_gap.put(0)
+    en.scanlock.put(0)
+
+
+def forward(en, energy, pol):
+    return en.forward(en.PseudoPosition(energy, pol, 0))
+
+
+def test_offset_gap_clears_the_caches(en):
+    forward(en, 500.0, 45.0)
+    en.inverse(en.RealPosition(30000.0, 500.0, 10000.0, 2))
+    assert en.cache_info()["forward"].currsize
+    assert en.cache_info()["inverse"].currsize
+    before = forward(en, 500.0, 45.0).epugap
+    en.offset_gap.put(100)
+    assert en.cache_info()["forward"].currsize == 0
+    assert en.cache_info()["inverse"].currsize == 0
+    assert forward(en, 500.0, 45.0).epugap == pytest.approx(before + 100)
+
+
+def test_lut_reload_clears_the_caches(en):
+    forward(en, 500.0, 45.0)
+    assert en.cache_info()["forward"].currsize
+    en._luts.clear()
+    forward(en, 600.0, 45.0)
+    # only the calculation made after the reload is cached
+    assert en.cache_info()["forward"].currsize == 1
+
+
+@pytest.mark.parametrize("use_gap_tables", [0, 1])
+def test_forward_many_matches_forward(en, use_gap_tables):
+    en.use_gap_tables.put(use_gap_tables)
+    energies, pols = (a.ravel() for a in np.meshgrid(ENERGIES, POLS))
+    many = en.forward_many(energies, pols, locked=False)
+    for n, (energy, pol) in enumerate(zip(energies, pols)):
+        one = forward(en, energy, pol)
+        assert many.epugap[n] == pytest.approx(one.epugap)
+        assert many.epuphase[n] == pytest.approx(one.epuphase)
+        assert many.epumode[n] == one.epumode
+
+
+def test_inverse_many_matches_inverse(en):
+    phases = np.array([15000.0, 15000.0, 0.0, 8000.0, 20000.0, 29500.0])
+    modes = np.array([0, 1, 2, 2, 3, 3])
+    gaps = np.full(len(phases), 30000.0)
+    many = en.inverse_many(gaps, phases, modes, monoens=500.0)
+    for n, (phase, mode) in enumerate(zip(phases, modes)):
+        one = en.inverse(en.RealPosition(30000.0, 500.0, phase, mode))
+        assert many.polarization[n] == pytest.approx(one.polarization)
+        assert many.sample_polarization[n] == pytest.approx(
+            one.sample_polarization
+        )
+
+
+@pytest.mark.parametrize("pol", [-1, 45.0])
+def test_gap_tables_fall_back_to_the_fits(en, pol):
+    mode = en.mode(pol)
+    energies = np.array(ENERGIES)
+    table = en.gap_tables.lookup(energies, en.phase_many(np.full(6, pol)), mode)
+    assert np.isnan(table).any() and np.isfinite(table).any()
+    fits = en.gap_many(energies, pol, 1)
+    en.use_gap_tables.put(1)
+    gaps = en.gap_many(energies, pol, 1)
+    measured = np.isfinite(table)
+    np.testing.assert_allclose(gaps[~measured], fits[~measured])
+    np.testing.assert_allclose(
+        gaps[measured], np.clip(table[measured], 14000.0, 100000.0)
+    )
+    # the scalar path, locked to the same harmonic
+    en.harmonic.put(1)
+    for energy, gap in zip(energies, gaps):
+        assert en.gap_harmonic(energy, pol, True)[0] == pytest.approx(gap)
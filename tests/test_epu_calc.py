@@ -0,0 +1,46 @@
+"""
+The polarization <-> phase splines EnPos uses must agree with the xarray
+``interp(method="cubic")`` calls they replaced.
+"""
+import numpy as np
+import pytest
+
+from sst_hw.epu_calc import CubicSplineTable
+from sst_hw.lut import CONFIG_PATH
+
+xr = pytest.importorskip("xarray")
+pytest.importorskip("scipy")
+
+POLS = np.linspace(-1, 91, 4001)
+PHASES = np.linspace(-100, 30100, 4001)
+
+
+@pytest.fixture(scope="module")
+def polphase():
+    return xr.load_dataarray(CONFIG_PATH / "polphase.nc")
+
+
+@pytest.fixture(scope="module")
+def phasepol(polphase):
+    return xr.DataArray(
+        data=polphase.pol, coords={"phase": polphase.values}, dims={"phase"}
+    )
+
+
+def test_phase_from_pol(polphase):
+    spline = CubicSplineTable(polphase.pol.values, polphase.values)
+    expected = polphase.interp(pol=POLS, method="cubic").values
+    assert np.allclose(spline(POLS), expected, rtol=0, atol=1e-6, equal_nan=True)
+
+
+def test_pol_from_phase(phasepol, polphase):
+    spline = CubicSplineTable(polphase.values, polphase.pol.values)
+    expected = phasepol.interp(phase=PHASES, method="cubic").values
+    assert np.allclose(spline(PHASES), expected, rtol=0, atol=1e-6, equal_nan=True)
+
+
+def test_phase_from_scalar_pol(polphase):
+    spline = CubicSplineTable(polphase.pol.values, polphase.values)
+    for pol in POLS[40:-40:50]:
+        expected = float(polphase.interp(pol=pol, method="cubic"))
+        assert np.allclose(spline(pol), expected, rtol=0, atol=1e-6, equal_nan=True)
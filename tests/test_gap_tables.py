@@ -0,0 +1,27 @@
+"""
+Measured EPU gap tables and the flux-table harmonic optimizer.
+"""
+import numpy as np
+
+from sst_hw.gap_tables import GapTables, HarmonicOptimizer
+from sst_hw.lut import LUTRegistry
+
+
+def test_optimizer_needs_a_weight_for_every_harmonic():
+    gap_tables = GapTables(LUTRegistry())
+    assert not HarmonicOptimizer(gap_tables).calibrated
+    assert not HarmonicOptimizer(gap_tables, weights={3: 0.1}).calibrated
+    assert HarmonicOptimizer(gap_tables, weights={1: 1.0, 3: 0.1}).calibrated
+
+
+def test_weights_scale_the_harmonic_scores():
+    gap_tables = GapTables(LUTRegistry())
+    energies = np.arange(300.0, 2000.0, 100.0)
+    unweighted = HarmonicOptimizer(gap_tables)
+    weighted = HarmonicOptimizer(gap_tables, weights={1: 1.0, 3: 0.1})
+    # scoring harmonic 3 with the fundamental table overstates it
+    assert 3 in unweighted.lookup(energies, 15000.0, 0, "250")[0]
+    assert (
+        weighted.flux(900.0, 15000.0, 0, 3, "250")
+        == 0.1 * unweighted.flux(900.0, 15000.0, 0, 3, "250")
+    )
@@ -0,0 +1,75 @@
+"""
+The grating plans must decide that a grating is already in exactly as they
+did when they searched the gratingx type string themselves.
+"""
+import pytest
+
+pytest.importorskip("ophyd")
+
+from ophyd import Signal  # noqa: E402
+
+from sst_hw.optics_config import (  # noqa: E402
+    Grating,
+    OpticsConfig,
+    grating_in,
+    parse_grating,
+)
+
+# gratingx _TYPE_MON strings, and the gap table key each should give
+TYPE_STRINGS = {
+    "250l/mm": "250",
+    "1200l/mm": "1200",
+    "RSoXS": "250",
+    "RSoXS 250l/mm": "250",
+    "": None,
+    "moving": None,
+}
+
+
+def baseline_at(grating_type, grating):
+    # the tests base_grating_to_250 / _1200 / _rsoxs made before the cache
+    return {
+        Grating.G250: "250l/mm" in grating_type,
+        Grating.G1200: "1200" in grating_type,
+        Grating.RSOXS: "RSoXS" in grating_type,
+    }[grating]
+
+
+@pytest.mark.parametrize("grating_type", list(TYPE_STRINGS))
+@pytest.mark.parametrize("grating", [Grating.G250, Grating.G1200, Grating.RSOXS])
+def test_grating_in_matches_the_plans(grating_type, grating):
+    assert grating_in(grating_type, grating) == baseline_at(grating_type, grating)
+
+
+@pytest.mark.parametrize("grating_type, key", list(TYPE_STRINGS.items()))
+def test_gap_table_key(grating_type, key):
+    assert parse_grating(grating_type).key == key
+
+
+def test_not_a_string():
+    assert parse_grating(None) is Grating.UNKNOWN
+    assert not grating_in(None, Grating.G250)
+
+
+def test_reads_the_source_until_the_cache_is_filled():
+    grating_type = Signal(name="grating_type", value="1200l/mm")
+    config = OpticsConfig(grating_type, Signal(name="mirror", value=""), name="optics")
+    # as if no monitor update had arrived yet
+    config.grating_type.put("")
+    config.grating.put(Grating.UNKNOWN.value)
+    assert config.at_grating(Grating.G1200)
+    assert config.grating.get() == Grating.G1200.value
+
+
+def test_updates_only_on_change():
+    grating_type = Signal(name="grating_type", value="")
+    config = OpticsConfig(grating_type, Signal(name="mirror", value=""), name="optics")
+    grating_type.put("250l/mm")
+    seen = []
+    config.grating.subscribe(lambda value, **kwargs: seen.append(value), run=False)
+    grating_type.put("250l/mm")
+    grating_type.put("1200l/mm")
+    grating_type.put("1200l/mm")
+    assert seen == ["1200"]
+    assert config.at_grating(Grating.G1200)
+    assert not config.at_grating(Grating.G250)
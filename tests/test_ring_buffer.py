@@ -0,0 +1,55 @@
+"""
+EventRingBuffer keeps every row, in order, however far the producer gets
+ahead of the consumer.
+"""
+import threading
+
+import numpy as np
+
+from sst_hw.ring_buffer import EventRingBuffer
+
+
+def rows(start, stop):
+    return np.array([(n, 10.0 * n, 100.0 * n) for n in range(start, stop)])
+
+
+def fill(buffer, start, stop):
+    for n in range(start, stop):
+        buffer.append(n, 10.0 * n, 100.0 * n)
+
+
+def test_grows_instead_of_overwriting():
+    buffer = EventRingBuffer(4)
+    fill(buffer, 0, 10)
+    assert len(buffer) == 10
+    assert buffer.capacity == 16
+    np.testing.assert_array_equal(buffer.drain(), rows(0, 10))
+    assert len(buffer) == 0
+    assert len(buffer.drain()) == 0
+
+
+def test_wraps_around():
+    buffer = EventRingBuffer(4)
+    fill(buffer, 0, 3)
+    np.testing.assert_array_equal(buffer.drain(), rows(0, 3))
+    # the next four rows wrap past the end of the array, without growing it
+    fill(buffer, 3, 7)
+    assert buffer.capacity == 4
+    np.testing.assert_array_equal(buffer.drain(), rows(3, 7))
+    # and growing keeps the wrapped rows in order
+    fill(buffer, 7, 13)
+    assert buffer.capacity == 8
+    np.testing.assert_array_equal(buffer.drain(), rows(7, 13))
+
+
+def test_concurrent_drains_see_every_row():
+    buffer = EventRingBuffer(8)
+    count = 20000
+    producer = threading.Thread(target=fill, args=(buffer, 0, count))
+    drained = []
+    producer.start()
+    while producer.is_alive():
+        drained.append(buffer.drain())
+    producer.join()
+    drained.append(buffer.drain())
+    np.testing.assert_array_equal(np.concatenate(drained), rows(0, count))
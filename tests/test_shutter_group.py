@@ -0,0 +1,105 @@
+"""
+ShutterGroup commands every shutter at once, retries each as EPS_Shutter
+does, and only fails once every shutter has had all of its tries.
+"""
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ophyd")
+pytest.importorskip("bluesky")
+
+from bluesky import RunEngine  # noqa: E402
+from ophyd import Component as Cpt  # noqa: E402
+from ophyd import Device, Signal  # noqa: E402
+
+from sst_hw.shutter_group import ShutterGroup  # noqa: E402
+
+
+class FakeShutter(Device):
+    """
+    An EPS shutter whose state follows opn / cls after delay seconds,
+    unless it is stuck
+    """
+
+    state = Cpt(Signal, value=1)
+    opn = Cpt(Signal, value=0)
+    cls = Cpt(Signal, value=0)
+
+    def __init__(self, *, name, delay=0.05, openval=0, closeval=1, stuck=False):
+        super().__init__("", name=name)
+        self.openval = openval
+        self.closeval = closeval
+        self.maxcount = 3
+        self.delay = delay
+        self.stuck = stuck
+        self.commands = 0
+        self.state.put(closeval)
+        self.opn.subscribe(self._command(openval), run=False)
+        self.cls.subscribe(self._command(closeval), run=False)
+
+    def _command(self, target):
+        def commanded(value, **kwargs):
+            self.commands += 1
+            if not self.stuck:
+                timer = threading.Timer(self.delay, self.state.put, (target,))
+                timer.daemon = True
+                timer.start()
+
+        return commanded
+
+
+def test_opens_all_at_once():
+    shutters = [
+        FakeShutter(name="gv1", delay=0.2),
+        FakeShutter(name="gv2", delay=0.2),
+        # openval / closeval the other way round
+        FakeShutter(name="gv3", delay=0.2, openval=1, closeval=0),
+    ]
+    group = ShutterGroup(shutters, name="group", retry_time=1.0)
+    start = time.monotonic()
+    group.set("open").wait(5)
+    assert time.monotonic() - start < 0.5
+    assert all(shutter.state.get() == shutter.openval for shutter in shutters)
+    assert [shutter.commands for shutter in shutters] == [1, 1, 1]
+    assert set(group.timings) == {"gv1", "gv2", "gv3"}
+    assert group.status() == dict.fromkeys(["gv1", "gv2", "gv3"], "open")
+
+
+def test_retries_and_names_every_failure():
+    good = FakeShutter(name="good", delay=0.05)
+    stuck = [
+        FakeShutter(name="stuck1", stuck=True),
+        FakeShutter(name="stuck2", stuck=True),
+    ]
+    group = ShutterGroup([good] + stuck, name="group", retry_time=0.05)
+    status = group.set("open")
+    with pytest.raises(RuntimeError) as info:
+        status.wait(5)
+    assert "stuck1" in str(info.value) and "stuck2" in str(info.value)
+    assert good.state.get() == good.openval
+    assert [shutter.commands for shutter in stuck] == [3, 3]
+
+
+def test_already_there_is_not_commanded():
+    shutter = FakeShutter(name="gv1")
+    group = ShutterGroup([shutter], name="group")
+    group.set("close").wait(1)
+    assert shutter.commands == 0
+
+
+def test_plan_reports_failure_and_carries_on(capsys):
+    group = ShutterGroup(
+        [FakeShutter(name="stuck", stuck=True)], name="group", retry_time=0.05
+    )
+
+    carried_on = []
+
+    def plan():
+        yield from group.open()
+        carried_on.append(True)
+
+    RunEngine({})(plan())
+    assert carried_on
+    assert "failed to open stuck" in capsys.readouterr().out